@@ -1,4 +1,5 @@
 from backend.app.db import Base, CURRENT_DATABASE_URL as APP_CONFIGURED_DATABASE_URL
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -24,6 +25,18 @@ import backend.app.models  # noqa
 
 target_metadata = Base.metadata
 
+# Monthly and default partitions of the partitioned tables are created by
+# migrations and app/jobs/partitions.py, not declared as models; leave them
+# out of autogenerate and `alembic check`.
+from backend.app.jobs.partitions import PARTITIONED_TABLES  # noqa: E402
+
+_PARTITION_RE = re.compile(rf"^({'|'.join(PARTITIONED_TABLES)})_(default|y\d{{4}}m\d{{2}})$")
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    table_name = name if type_ == "table" else getattr(getattr(obj, "table", None), "name", None)
+    return not (reflected and compare_to is None and table_name and _PARTITION_RE.match(table_name))
+
 # Override sqlalchemy.url from alembic.ini with the one determined by db.py (which is test-aware)
 # This ensures Alembic targets the same database as the application based on the TESTING env var.
 if APP_CONFIGURED_DATABASE_URL:
@@ -58,6 +71,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -81,7 +95,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,52 @@
+"""add book_rating_stats aggregate table
+
+Revision ID: 1a6f3c9e2d85
+Revises: e5d2b8a4c710
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a6f3c9e2d85'
+down_revision: Union[str, None] = 'e5d2b8a4c710'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COUNTERS = ['review_count', 'rating_sum'] + [f'rating_{r}' for r in range(1, 6)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_rating_stats',
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        *[sa.Column(name, sa.Integer(), server_default='0', nullable=False)
+          for name in _COUNTERS],
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('book_id'),
+    )
+    # Backfill from existing reviews; crud_review keeps it current afterwards
+    op.execute("""
+        INSERT INTO book_rating_stats
+            (book_id, review_count, rating_sum,
+             rating_1, rating_2, rating_3, rating_4, rating_5)
+        SELECT book_id, count(*), sum(rating),
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+        FROM reviews
+        GROUP BY book_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_rating_stats')
@@ -0,0 +1,43 @@
+"""add keyset pagination indexes
+
+Revision ID: 3f1c9a7d2b64
+Revises: da250e002da0
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = 'da250e002da0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_popularity_score_id', 'books',
+                    ['popularity_score', 'id'], unique=False)
+    op.create_index('ix_books_created_at_id', 'books',
+                    ['created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_book_id_created_at_id', 'reviews',
+                    ['book_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_user_favorites_user_id_favorited_at_book_id', 'user_favorites',
+                    ['user_id', 'favorited_at', 'book_id'], unique=False)
+    op.create_index('ix_learning_activities_user_id_created_at_id', 'learning_activities',
+                    ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_learning_activities_user_id_created_at_id',
+                  table_name='learning_activities')
+    op.drop_index('ix_user_favorites_user_id_favorited_at_book_id',
+                  table_name='user_favorites')
+    op.drop_index('ix_reviews_book_id_created_at_id', table_name='reviews')
+    op.drop_index('ix_books_created_at_id', table_name='books')
+    op.drop_index('ix_books_popularity_score_id', table_name='books')
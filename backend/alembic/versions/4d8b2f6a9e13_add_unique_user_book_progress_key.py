@@ -0,0 +1,55 @@
+"""add unique (user, book, child) key on user_book_progress
+
+Revision ID: 4d8b2f6a9e13
+Revises: 7c3e9a1f5b28
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f6a9e13'
+down_revision: Union[str, None] = '7c3e9a1f5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_CHILD_KEY = "coalesce(child_id, '00000000-0000-0000-0000-000000000000'::uuid)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge duplicates created by the old SELECT-then-INSERT: keep the most
+    # recently read row and move the others' bookmarks and notes onto it.
+    op.execute(f"""
+        CREATE TEMPORARY TABLE progress_duplicates ON COMMIT DROP AS
+        SELECT id, first_value(id) OVER (
+                   PARTITION BY user_id, book_id, {_CHILD_KEY}
+                   ORDER BY last_read_at DESC NULLS LAST, id
+               ) AS keep_id
+        FROM user_book_progress
+    """)
+    op.execute("DELETE FROM progress_duplicates WHERE id = keep_id")
+    op.execute("""
+        UPDATE user_book_bookmarks b SET progress_id = d.keep_id
+        FROM progress_duplicates d WHERE b.progress_id = d.id
+    """)
+    op.execute("""
+        UPDATE user_book_notes n SET progress_id = d.keep_id
+        FROM progress_duplicates d WHERE n.progress_id = d.id
+    """)
+    op.execute("""
+        DELETE FROM user_book_progress p
+        USING progress_duplicates d WHERE p.id = d.id
+    """)
+    op.create_index('uq_user_book_progress_user_id_book_id_child_id', 'user_book_progress',
+                    ['user_id', 'book_id', sa.text(_CHILD_KEY)], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_user_book_progress_user_id_book_id_child_id',
+                  table_name='user_book_progress')
@@ -0,0 +1,48 @@
+"""add natural keys for the bulk catalog import
+
+Revision ID: 7c3e9a1f5b28
+Revises: 1a6f3c9e2d85
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a1f5b28'
+down_revision: Union[str, None] = '1a6f3c9e2d85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('external_id', sa.String(length=255), nullable=True))
+    op.create_unique_constraint('books_external_id_key', 'books', ['external_id'])
+
+    # Drop duplicate rows left from one-at-a-time loading before adding the keys
+    op.execute("""
+        DELETE FROM book_pages a USING book_pages b
+        WHERE a.book_id = b.book_id AND a.page_number = b.page_number AND a.id > b.id
+    """)
+    op.execute("""
+        DELETE FROM book_toc_items a USING book_toc_items b
+        WHERE a.book_id = b.book_id AND a.page_number = b.page_number
+          AND a.title = b.title AND a.id > b.id
+    """)
+    op.create_unique_constraint('uq_book_pages_book_id_page_number',
+                                'book_pages', ['book_id', 'page_number'])
+    op.create_unique_constraint('uq_book_toc_items_book_id_page_number_title',
+                                'book_toc_items', ['book_id', 'page_number', 'title'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_book_toc_items_book_id_page_number_title',
+                       'book_toc_items', type_='unique')
+    op.drop_constraint('uq_book_pages_book_id_page_number', 'book_pages', type_='unique')
+    op.drop_constraint('books_external_id_key', 'books', type_='unique')
+    op.drop_column('books', 'external_id')
@@ -0,0 +1,40 @@
+"""add maintained themes.book_count
+
+Revision ID: 8b2e4d6f1a90
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a90'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('themes', sa.Column('book_count', sa.Integer(),
+                                      server_default='0', nullable=False))
+    # Backfill from the existing links; crud_book keeps it current afterwards
+    op.execute("""
+        UPDATE themes
+        SET book_count = counts.book_count
+        FROM (
+            SELECT theme_id, count(*) AS book_count
+            FROM book_themes
+            GROUP BY theme_id
+        ) AS counts
+        WHERE themes.id = counts.theme_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('themes', 'book_count')
@@ -0,0 +1,51 @@
+"""add partitioned reading_events log
+
+Revision ID: 9f4b1d7c2a36
+Revises: 4d8b2f6a9e13
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f4b1d7c2a36'
+down_revision: Union[str, None] = '4d8b2f6a9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'reading_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('occurred_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('child_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('page_number', sa.Integer(), nullable=False),
+        sa.Column('dwell_ms', sa.Integer(), nullable=False),
+        sa.Column('received_at', sa.TIMESTAMP(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['child_id'], ['children.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', 'occurred_at'),
+        postgresql_partition_by='RANGE (occurred_at)',
+    )
+    op.create_index('ix_reading_events_user_id_occurred_at', 'reading_events',
+                    ['user_id', 'occurred_at'], unique=False)
+    # Monthly partitions are created by app/jobs/partitions.py
+    op.execute("CREATE TABLE reading_events_default PARTITION OF reading_events DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reading_events_user_id_occurred_at', table_name='reading_events')
+    # Drops every partition with it
+    op.drop_table('reading_events')
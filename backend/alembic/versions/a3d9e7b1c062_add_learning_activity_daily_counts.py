@@ -0,0 +1,54 @@
+"""add learning_activity_daily_counts rollup
+
+Revision ID: a3d9e7b1c062
+Revises: f1c6a3e8b294
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d9e7b1c062'
+down_revision: Union[str, None] = 'f1c6a3e8b294'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_CHILD_KEY = "coalesce(child_id, '00000000-0000-0000-0000-000000000000'::uuid)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'learning_activity_daily_counts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('child_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('activity_type', postgresql.ENUM(name='activity_type_enum', create_type=False),
+                  nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['child_id'], ['children.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('uq_learning_activity_daily_counts_key', 'learning_activity_daily_counts',
+                    ['user_id', sa.text(_CHILD_KEY), 'activity_type', 'day'], unique=True)
+    # Backfill from the existing history
+    op.execute("""
+        INSERT INTO learning_activity_daily_counts (id, user_id, child_id, activity_type, day, count)
+        SELECT gen_random_uuid(), user_id, child_id, activity_type,
+               (created_at AT TIME ZONE 'UTC')::date, count(*)
+        FROM learning_activities
+        GROUP BY user_id, child_id, activity_type, (created_at AT TIME ZONE 'UTC')::date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_learning_activity_daily_counts_key', table_name='learning_activity_daily_counts')
+    op.drop_table('learning_activity_daily_counts')
@@ -0,0 +1,40 @@
+"""add full-text search column on user_book_notes
+
+Revision ID: b7e3c5a1d948
+Revises: 9f4b1d7c2a36
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c5a1d948'
+down_revision: Union[str, None] = '9f4b1d7c2a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites the table once to fill the generated column
+    op.add_column('user_book_notes', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', regexp_replace(text, "
+                    "'([\\u3040-\\u30ff\\u3400-\\u4dbf\\u4e00-\\u9fff\\uf900-\\ufaff\\uff66-\\uff9f])', "
+                    "chr(1) || '\\1' || chr(1), 'g'))", persisted=True), nullable=True))
+    op.create_index('ix_user_book_notes_search_vector', 'user_book_notes',
+                    ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_user_book_notes_progress_id_created_at', 'user_book_notes',
+                    ['progress_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_book_notes_progress_id_created_at', table_name='user_book_notes')
+    op.drop_index('ix_user_book_notes_search_vector', table_name='user_book_notes')
+    op.drop_column('user_book_notes', 'search_vector')
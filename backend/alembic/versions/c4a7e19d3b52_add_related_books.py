@@ -0,0 +1,42 @@
+"""add precomputed related_books table
+
+Revision ID: c4a7e19d3b52
+Revises: 8b2e4d6f1a90
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e19d3b52'
+down_revision: Union[str, None] = '8b2e4d6f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'related_books',
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('related_book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.TIMESTAMP(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['related_book_id'], ['books.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('book_id', 'related_book_id'),
+    )
+    op.create_index('ix_related_books_book_id_score', 'related_books',
+                    ['book_id', 'score'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_related_books_book_id_score', table_name='related_books')
+    op.drop_table('related_books')
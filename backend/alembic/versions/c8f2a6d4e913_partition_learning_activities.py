@@ -0,0 +1,95 @@
+"""partition learning_activities by month
+
+Revision ID: c8f2a6d4e913
+Revises: a3d9e7b1c062
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2a6d4e913'
+down_revision: Union[str, None] = 'a3d9e7b1c062'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = "id, user_id, child_id, activity_type, description, related_entity_id, related_link, created_at"
+
+
+def _columns() -> list:
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('child_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('activity_type', postgresql.ENUM(name='activity_type_enum', create_type=False),
+                  nullable=False),
+        sa.Column('description', sa.TEXT(), nullable=False),
+        sa.Column('related_entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('related_link', sa.TEXT(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['child_id'], ['children.id'], ondelete='CASCADE'),
+    ]
+
+
+def _set_aside_old_table() -> None:
+    # Free the names of the table's index-backed objects
+    op.rename_table('learning_activities', 'learning_activities_old')
+    op.execute("ALTER TABLE learning_activities_old "
+               "RENAME CONSTRAINT learning_activities_pkey TO learning_activities_old_pkey")
+    op.execute("ALTER INDEX ix_learning_activities_user_id_created_at_id "
+               "RENAME TO ix_learning_activities_old_user_id_created_at_id")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _set_aside_old_table()
+    op.create_table(
+        'learning_activities', *_columns(),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index('ix_learning_activities_user_id_created_at_id', 'learning_activities',
+                    ['user_id', 'created_at', 'id'], unique=False)
+    op.execute("CREATE TABLE learning_activities_default PARTITION OF learning_activities DEFAULT")
+
+    # One partition per month that has history (named as in app/jobs/partitions.py);
+    # the API creates the current and upcoming months on startup
+    months = op.get_bind().execute(sa.text("""
+        SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date
+        FROM learning_activities_old WHERE created_at IS NOT NULL
+    """)).scalars().all()
+    for month in months:
+        following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE learning_activities_y{month:%Y}m{month:%m} PARTITION OF learning_activities "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{following:%Y-%m-%d} 00:00:00+00')"
+        )
+    op.execute(f"""
+        INSERT INTO learning_activities ({_COLUMNS})
+        SELECT id, user_id, child_id, activity_type, description, related_entity_id, related_link,
+               coalesce(created_at, now())
+        FROM learning_activities_old
+    """)
+    op.drop_table('learning_activities_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_aside_old_table()
+    op.create_table(
+        'learning_activities', *_columns(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_learning_activities_user_id_created_at_id', 'learning_activities',
+                    ['user_id', 'created_at', 'id'], unique=False)
+    op.execute(f"INSERT INTO learning_activities ({_COLUMNS}) SELECT {_COLUMNS} FROM learning_activities_old")
+    # Drops every partition with it
+    op.drop_table('learning_activities_old')
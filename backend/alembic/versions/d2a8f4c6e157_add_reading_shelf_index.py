@@ -0,0 +1,30 @@
+"""add (user_id, last_read_at desc, id desc) index for the reading shelf
+
+Revision ID: d2a8f4c6e157
+Revises: b7e3c5a1d948
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a8f4c6e157'
+down_revision: Union[str, None] = 'b7e3c5a1d948'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_book_progress_user_id_last_read_at_id', 'user_book_progress',
+                    ['user_id', sa.text('last_read_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_book_progress_user_id_last_read_at_id',
+                  table_name='user_book_progress')
@@ -0,0 +1,34 @@
+"""add recency indexes for popularity scoring
+
+Revision ID: e5d2b8a4c710
+Revises: c4a7e19d3b52
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d2b8a4c710'
+down_revision: Union[str, None] = 'c4a7e19d3b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_book_progress_last_read_at', 'user_book_progress',
+                    ['last_read_at'], unique=False)
+    op.create_index('ix_user_favorites_favorited_at', 'user_favorites',
+                    ['favorited_at'], unique=False)
+    op.create_index('ix_reviews_created_at', 'reviews', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_created_at', table_name='reviews')
+    op.drop_index('ix_user_favorites_favorited_at', table_name='user_favorites')
+    op.drop_index('ix_user_book_progress_last_read_at', table_name='user_book_progress')
@@ -0,0 +1,64 @@
+"""add sync_version columns and sync_tombstones
+
+Revision ID: e6b4a2c8f305
+Revises: c8f2a6d4e913
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b4a2c8f305'
+down_revision: Union[str, None] = 'c8f2a6d4e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SYNC_VERSION = sa.text("pg_current_xact_id()::text::bigint")
+# table -> column its sync_version index leads with
+_VERSIONED = {
+    'user_book_progress': 'user_id',
+    'user_book_bookmarks': 'progress_id',
+    'user_book_notes': 'progress_id',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, lead in _VERSIONED.items():
+        # Existing rows all get this migration's transaction id
+        op.add_column(table, sa.Column('sync_version', sa.BigInteger(), nullable=False,
+                                       server_default=_SYNC_VERSION))
+        op.create_index(f'ix_{table}_{lead}_sync_version', table, [lead, 'sync_version'])
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('child_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.Enum('PROGRESS', 'BOOKMARK', 'NOTE', name='sync_entity_enum'),
+                  nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                  nullable=False),
+        sa.Column('sync_version', sa.BigInteger(), server_default=_SYNC_VERSION, nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sync_tombstones_user_id_sync_version', 'sync_tombstones',
+                    ['user_id', 'sync_version'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sync_tombstones_user_id_sync_version', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    sa.Enum(name='sync_entity_enum').drop(op.get_bind(), checkfirst=False)
+    for table, lead in _VERSIONED.items():
+        op.drop_index(f'ix_{table}_{lead}_sync_version', table_name=table)
+        op.drop_column(table, 'sync_version')
@@ -0,0 +1,37 @@
+"""add REVIEW_POSTED and BOOK_FAVORITED activity types
+
+Revision ID: f1c6a3e8b294
+Revises: d2a8f4c6e157
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a3e8b294'
+down_revision: Union[str, None] = 'd2a8f4c6e157'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New enum values cannot be used in the transaction that adds them
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE activity_type_enum ADD VALUE IF NOT EXISTS 'REVIEW_POSTED'")
+        op.execute("ALTER TYPE activity_type_enum ADD VALUE IF NOT EXISTS 'BOOK_FAVORITED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres cannot drop enum values: rebuild the type without them
+    op.execute("DELETE FROM learning_activities WHERE activity_type IN ('REVIEW_POSTED', 'BOOK_FAVORITED')")
+    op.execute("ALTER TYPE activity_type_enum RENAME TO activity_type_enum_old")
+    op.execute("CREATE TYPE activity_type_enum AS ENUM ('BOOK_READ_COMPLETED', 'QUESTION_ANSWERED', "
+               "'BADGE_EARNED', 'NOTE_TAKEN', 'DISCUSSION_POSTED')")
+    op.execute("ALTER TABLE learning_activities ALTER COLUMN activity_type TYPE activity_type_enum "
+               "USING activity_type::text::activity_type_enum")
+    op.execute("DROP TYPE activity_type_enum_old")
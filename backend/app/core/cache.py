@@ -0,0 +1,191 @@
+"""In-process caches.
+
+LRUTTLCache is a small thread-safe LRU cache whose entries also expire after a
+TTL. Every cache registers itself by name so that its hit/miss/eviction
+counters can be read through GET /metrics/cache.
+
+The caches are per process: with several workers each keeps its own copy, and
+the TTL bounds how long a worker can serve data that another worker changed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+
+_registry: Dict[str, "LRUTTLCache"] = {}
+
+
+class LRUTTLCache:
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to stay within maxsize
+        self.expirations = 0  # Dropped because their TTL passed
+        _registry[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value. `ttl` overrides the cache-wide TTL for this entry."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class VersionedCache(LRUTTLCache):
+    """LRU+TTL cache whose keys include a version counter.
+
+    bump_version() makes every existing entry unreachable at once; the stale
+    entries are then aged out by the LRU and TTL.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        super().__init__(name, maxsize, ttl)
+        self.version = 0
+
+    def get(self, key: Hashable, version: Optional[int] = None) -> Optional[Any]:
+        return super().get((self.version if version is None else version, key))
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            version: Optional[int] = None) -> None:
+        """Store under `version`, by default the current one. Pass the version
+        read before loading `value`: if a write bumped it meanwhile, the value
+        may predate the write and must not become visible under the new one."""
+        super().set((self.version if version is None else version, key), value, ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        super().invalidate((self.version, key))
+
+    def bump_version(self) -> int:
+        with self._lock:
+            self.version += 1
+            return self.version
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "version": self.version}
+
+
+# Per module instance, in case the app is imported under two package names
+_SESSION_KEY = ("cache_invalidations", id(_registry))
+
+
+def invalidate_after_commit(db: Session, cache: LRUTTLCache, key: Hashable) -> None:
+    """Drop `key` now and again once the session's transaction ends.
+
+    The second pass removes an entry that a concurrent request re-read from
+    the database before this transaction committed.
+    """
+    cache.invalidate(key)
+    db.info.setdefault(_SESSION_KEY, []).append((cache, key))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session: Session) -> None:
+    for cache, key in session.info.pop(_SESSION_KEY, ()):
+        cache.invalidate(key)
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def cached_json_response(
+    cache: VersionedCache,
+    key: Hashable,
+    adapter: TypeAdapter,
+    load: Callable[[], Tuple[Any, Dict[str, str]]],
+) -> Response:
+    """Serve a JSON response from `cache`, building it with `load` on a miss.
+
+    `load` returns (ORM objects, extra response headers). The objects are
+    validated against `adapter` and serialized once; hits return the stored
+    bytes without touching the database or Pydantic.
+    """
+    # Read before loading; see VersionedCache.set
+    version = cache.version
+    entry = cache.get(key, version=version)
+    if entry is None:
+        data, headers = load()
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        entry = (body, headers)
+        cache.set(key, entry, version=version)
+    body, headers = entry
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Books and themes. Bumped by every catalog write (see routes/books.py).
+catalog_cache = VersionedCache(
+    "catalog",
+    maxsize=settings.CATALOG_CACHE_MAXSIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+# Authenticated users by id, as detached copies (see core/security.py).
+# Invalidated by every write to a user row.
+principal_cache = LRUTTLCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Claims of verified JWTs by token digest (see core/tokens.py)
+verified_token_cache = LRUTTLCache(
+    "verified_tokens",
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,191 @@
+"""In-process event bus for learning activities.
+
+Crud functions that complete a book, post a review or add a favorite call
+publish_after_commit(); the events are held on the session and handed to
+activity_bus only once that transaction commits. Any rollback, including
+of a savepoint, discards all of them.
+A periodic task (see main.py) drains the bus every
+ACTIVITY_FLUSH_INTERVAL_SECONDS and writes the events as LearningActivity
+rows with multi-row INSERTs, so requests never wait for the bookkeeping.
+
+Like the other in-process buffers, the bus is per process and a crash loses
+at most one flush window. It holds at most ACTIVITY_BUS_MAXSIZE events;
+beyond that new events are dropped and counted. Events whose user or child
+was deleted before the flush are skipped then (counted as `orphaned`)
+instead of failing the batch they are in.
+"""
+import logging
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import ActivityTypeEnum
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ActivityEvent:
+    user_id: uuid.UUID
+    activity_type: ActivityTypeEnum
+    description: str
+    child_id: Optional[uuid.UUID] = None
+    related_entity_id: Optional[uuid.UUID] = None
+    related_link: Optional[str] = None
+    occurred_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+_BOOK_DESCRIPTIONS = {
+    ActivityTypeEnum.BOOK_READ_COMPLETED: 'Finished reading "{title}"',
+    ActivityTypeEnum.REVIEW_POSTED: 'Reviewed "{title}"',
+    ActivityTypeEnum.BOOK_FAVORITED: 'Added "{title}" to favorites',
+}
+
+
+def book_activity(
+    activity_type: ActivityTypeEnum,
+    user_id: uuid.UUID,
+    book_id: uuid.UUID,
+    title: str,
+    child_id: Optional[uuid.UUID] = None,
+) -> ActivityEvent:
+    """An event about one book, linking to it."""
+    return ActivityEvent(
+        user_id=user_id, child_id=child_id, activity_type=activity_type,
+        description=_BOOK_DESCRIPTIONS[activity_type].format(title=title),
+        related_entity_id=book_id, related_link=f"/books/{book_id}",
+    )
+
+
+class ActivityBus:
+    def __init__(self, maxsize: int) -> None:
+        self._events: Deque[ActivityEvent] = deque()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.published = 0
+        self.written = 0
+        self.dropped = 0
+        self.orphaned = 0
+
+    def publish(self, activity: ActivityEvent) -> bool:
+        with self._lock:
+            if len(self._events) >= self.maxsize:
+                self.dropped += 1
+                return False
+            self._events.append(activity)
+            self.published += 1
+            return True
+
+    def drain(self) -> List[ActivityEvent]:
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def restore(self, events: List[ActivityEvent]) -> None:
+        """Put back events from a failed flush ahead of newer ones."""
+        with self._lock:
+            room = max(self.maxsize - len(self._events), 0)
+            kept = events[len(events) - room:] if room < len(events) else events
+            self.dropped += len(events) - len(kept)
+            self._events.extendleft(reversed(kept))
+
+    def drop_orphaned(self, db: Session, events: List[ActivityEvent]) -> List[ActivityEvent]:
+        """The events whose user and child still exist; the rest are skipped."""
+        from ..crud import crud_history
+
+        valid = crud_history.existing_activity_owners(db, ((e.user_id, e.child_id) for e in events))
+        kept = [e for e in events if (e.user_id, e.child_id) in valid]
+        if len(kept) < len(events):
+            logger.warning("activity bus: skipped %d events of deleted users or children",
+                           len(events) - len(kept))
+            with self._lock:
+                self.orphaned += len(events) - len(kept)
+        return kept
+
+    def flush(self, db: Session) -> int:
+        """Write all pending events with `db` (not committed). Returns the count."""
+        events = self.drain()
+        try:
+            events = self.drop_orphaned(db, events)
+            write_activities(db, events)
+        except Exception:
+            self.restore(events)
+            raise
+        self.mark_written(len(events))
+        return len(events)
+
+    def mark_written(self, count: int) -> None:
+        with self._lock:
+            self.written += count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._events), "published": self.published,
+                    "written": self.written, "dropped": self.dropped, "orphaned": self.orphaned}
+
+
+def write_activities(db: Session, events: List[ActivityEvent]) -> None:
+    from ..crud import crud_history
+
+    crud_history.create_learning_activities(db, [
+        {
+            "id": uuid.uuid4(),
+            "user_id": e.user_id,
+            "child_id": e.child_id,
+            "activity_type": e.activity_type,
+            "description": e.description,
+            "related_entity_id": e.related_entity_id,
+            "related_link": e.related_link,
+            "created_at": e.occurred_at,
+        }
+        for e in events
+    ])
+
+
+activity_bus = ActivityBus(maxsize=settings.ACTIVITY_BUS_MAXSIZE)
+
+# Per module instance, in case the app is imported under two package names
+_SESSION_KEY = ("activity_events", id(activity_bus))
+
+
+def publish_after_commit(db: Session, activity: ActivityEvent) -> None:
+    """Publish `activity` once the session's current transaction commits."""
+    db.info.setdefault(_SESSION_KEY, []).append(activity)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    for activity in session.info.pop(_SESSION_KEY, ()):
+        activity_bus.publish(activity)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def flush_activity_events() -> int:
+    """Flush in its own transaction; used by the scheduler and on shutdown."""
+    from ..db import session_scope
+
+    events = activity_bus.drain()
+    try:
+        with session_scope() as db:
+            events = activity_bus.drop_orphaned(db, events)
+            write_activities(db, events)
+    except Exception:
+        # Retried on the next flush
+        activity_bus.restore(events)
+        raise
+    activity_bus.mark_written(len(events))
+    if events:
+        logger.debug("activity bus: wrote %d learning activities", len(events))
+    return len(events)
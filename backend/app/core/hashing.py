@@ -0,0 +1,96 @@
+"""Password hashing.
+
+The one CryptContext of the app: bcrypt with PASSWORD_BCRYPT_ROUNDS rounds
+(cost 2**rounds). Every call runs on the bounded hashing pool (see
+core/password_pool.py).
+
+Hashes made with another number of rounds still verify, and are replaced on
+the next successful login (see crud_user.authenticate), so changing the
+setting migrates users gradually in both directions.
+
+Pick the rounds for the production hardware with
+
+    python -m backend.app.core.hashing --target-ms 250
+
+which times bcrypt at increasing costs and prints the highest one within the
+target.
+"""
+import argparse
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from passlib.context import CryptContext
+from passlib.hash import bcrypt
+
+from backend.app.core.config import settings
+from backend.app.core.password_pool import password_pool
+
+# Below this bcrypt is too cheap to brute-force, whatever the hardware
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    # Hashes with any other cost count as outdated
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+def hash_password(password: str) -> str:
+    return password_pool.run(pwd_context.hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash). The new hash is set only if the password is valid
+    and the stored hash uses outdated parameters."""
+    return password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def calibrate(target_ms: float, samples: int = 3) -> Tuple[int, List[Tuple[int, float]]]:
+    """Time bcrypt from MIN_ROUNDS up until a cost exceeds `target_ms`.
+
+    Returns (the highest rounds within the target, [(rounds, median ms)]).
+    The result is never below MIN_ROUNDS.
+    """
+    timings = []
+    best = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        handler = bcrypt.using(rounds=rounds)
+        durations = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            handler.hash("calibration-password")
+            durations.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(durations)
+        timings.append((rounds, median))
+        if median > target_ms:
+            break
+        best = rounds
+    return best, timings
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pick PASSWORD_BCRYPT_ROUNDS for a target hashing latency")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="longest acceptable time for one hash on this machine")
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per cost")
+    args = parser.parse_args(argv)
+
+    best, timings = calibrate(args.target_ms, args.samples)
+    for rounds, median in timings:
+        print(f"rounds={rounds:2d}  {median:8.1f} ms")
+    if timings[0][1] > args.target_ms:
+        print(f"Even {MIN_ROUNDS} rounds exceed {args.target_ms:g} ms; not going lower.")
+    print(f"PASSWORD_BCRYPT_ROUNDS={best}  (currently {settings.PASSWORD_BCRYPT_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
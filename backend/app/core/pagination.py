@@ -0,0 +1,54 @@
+"""Opaque cursors for keyset (seek) pagination.
+
+A cursor is the sort key of the last row of a page, e.g. (popularity_score, id),
+serialized as URL-safe base64 JSON. Clients must treat it as opaque and pass it
+back unchanged to get the next page.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+# List endpoints return the cursor for the following page in this header so
+# that their JSON bodies stay plain lists.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or belongs to another ordering."""
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(kind: str, *values: Any) -> str:
+    """Encode the sort key of the last row of a page."""
+    payload = json.dumps({"k": kind, "v": [_to_json(v) for v in values]},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, types: Sequence[Callable[[Any], Any]]) -> tuple:
+    """Decode a cursor made by encode_cursor.
+
+    `kind` must match the value used when encoding, so that a cursor for one
+    sort order cannot be replayed against another. `types` converts each key
+    component back (e.g. int, uuid.UUID, datetime.fromisoformat).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != kind or len(payload["v"]) != len(types):
+            raise InvalidCursorError("Cursor does not match this listing")
+        return tuple(convert(value) for convert, value in zip(types, payload["v"]))
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
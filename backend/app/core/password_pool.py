@@ -0,0 +1,105 @@
+"""Bounded worker pool for password hashing and verification.
+
+bcrypt is deliberately slow (tens to hundreds of ms of CPU per call), and
+register, login and change-password run it from the request thread pool
+that also serves every other sync route. Under a login spike those threads
+would all end up hashing and reads would stall behind them.
+
+Instead, hashing runs on PASSWORD_HASH_WORKERS dedicated threads (bcrypt
+releases the GIL while hashing, so threads run it in parallel). At most
+PASSWORD_HASH_MAX_QUEUE further calls may wait for a worker; beyond that
+run() raises PasswordPoolSaturatedError, which main.py turns into a 503
+with Retry-After. A request thread is therefore only ever blocked on
+hashing while its call is admitted, and at most workers + queue request
+threads are. Queue and latency figures are exported through
+GET /metrics/password-hashing.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, TypeVar
+
+from backend.app.core.config import settings
+
+T = TypeVar("T")
+
+# Latency percentiles are computed over this many most recent calls
+_LATENCY_SAMPLES = 1000
+
+
+class PasswordPoolSaturatedError(Exception):
+    """Raised when the hashing pool's queue is full."""
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class PasswordHashingPool:
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        # (queue wait, run time) in ms per call
+        self._latencies: Deque[tuple] = deque(maxlen=_LATENCY_SAMPLES)
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn(*args) on a pool worker and wait for its result."""
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolSaturatedError("Password hashing is at capacity")
+            self._in_flight += 1
+            self.peak_queued = max(self.peak_queued, self._in_flight - self.workers)
+        submitted = time.perf_counter()
+
+        def timed() -> tuple:
+            started = time.perf_counter()
+            return started, fn(*args)
+
+        try:
+            started, result = self._executor.submit(timed).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        finished = time.perf_counter()
+        with self._lock:
+            self.completed += 1
+            self._latencies.append(((started - submitted) * 1000, (finished - started) * 1000))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = [w for w, _ in self._latencies]
+            runs = [r for _, r in self._latencies]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.workers, 0),
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_ms_p50": _percentile(waits, 0.5),
+                "queue_wait_ms_p95": _percentile(waits, 0.95),
+                "run_ms_p50": _percentile(runs, 0.5),
+                "run_ms_p95": _percentile(runs, 0.95),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+password_pool = PasswordHashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
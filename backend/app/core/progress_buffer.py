@@ -0,0 +1,136 @@
+"""Write-behind buffer for reading-progress page turns.
+
+Page turns are recorded in memory and coalesced per (user, child, book) with
+last-write-wins, then written in one batch every
+PROGRESS_FLUSH_INTERVAL_SECONDS and on shutdown (see main.py), as a single
+
+    INSERT INTO user_book_progress ... SELECT FROM (VALUES ...)
+    ON CONFLICT (user, book, child) DO UPDATE ... WHERE last_read_at <= excluded
+
+The WHERE keeps rows from moving backwards: rows whose last_read_at is newer
+than the buffered turn (e.g. written by PUT /progress meanwhile) are left
+alone.
+
+PUT /progress/page only buffers turns for existing books. A turn whose book,
+child or user was deleted before the flush is dropped then (counted as
+`dropped`), so that one stale key cannot fail every later batch.
+
+The buffer is per process, and a crash loses at most one flush window of
+page turns. With PROGRESS_WRITE_BEHIND off, each turn is written through
+immediately with the same statements.
+"""
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.app.crud import crud_progress
+
+logger = logging.getLogger(__name__)
+
+ProgressKey = Tuple[uuid.UUID, Optional[uuid.UUID], uuid.UUID]  # (user_id, child_id, book_id)
+
+
+@dataclass(frozen=True)
+class PageTurn:
+    current_page: int
+    at: datetime
+
+
+class ProgressBuffer:
+    def __init__(self) -> None:
+        self._pending: Dict[ProgressKey, PageTurn] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, key: ProgressKey, turn: PageTurn) -> None:
+        with self._lock:
+            current = self._pending.get(key)
+            if current is None or current.at <= turn.at:
+                self._pending[key] = turn
+            self.recorded += 1
+
+    def pending(self, key: ProgressKey) -> Optional[PageTurn]:
+        """The buffered turn not yet written for `key`, if any."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def drain(self) -> Dict[ProgressKey, PageTurn]:
+        with self._lock:
+            entries, self._pending = self._pending, {}
+            return entries
+
+    def restore(self, entries: Dict[ProgressKey, PageTurn]) -> None:
+        """Put back entries from a failed flush, unless newer turns arrived."""
+        for key, turn in entries.items():
+            with self._lock:
+                current = self._pending.get(key)
+                if current is None or current.at < turn.at:
+                    self._pending[key] = turn
+
+    def drop_orphaned(self, db: Session, entries: Dict[ProgressKey, PageTurn]) -> Dict[ProgressKey, PageTurn]:
+        """The entries whose user, child and book still exist; the rest are dropped."""
+        valid = crud_progress.existing_progress_keys(db, entries)
+        if len(valid) < len(entries):
+            logger.warning("progress buffer: dropped %d page turns for deleted books or children",
+                           len(entries) - len(valid))
+            with self._lock:
+                self.dropped += len(entries) - len(valid)
+        return {key: turn for key, turn in entries.items() if key in valid}
+
+    def flush(self, db: Session) -> int:
+        """Write all pending turns with `db` (not committed). Returns the count."""
+        entries = self.drain()
+        try:
+            entries = self.drop_orphaned(db, entries)
+            write_page_turns(db, entries)
+        except Exception:
+            self.restore(entries)
+            raise
+        self.mark_written(len(entries))
+        return len(entries)
+
+    def mark_written(self, count: int) -> None:
+        with self._lock:
+            self.written += count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), "recorded": self.recorded,
+                    "written": self.written, "dropped": self.dropped}
+
+
+def write_page_turns(db: Session, entries: Dict[ProgressKey, PageTurn]) -> None:
+    """Apply coalesced page turns with one INSERT ... ON CONFLICT DO UPDATE."""
+    crud_progress.upsert_progress_pages(db, [
+        (user_id, child_id, book_id, turn.current_page, turn.at)
+        for (user_id, child_id, book_id), turn in entries.items()
+    ])
+
+
+progress_buffer = ProgressBuffer()
+
+
+def flush_progress_buffer() -> int:
+    """Flush in its own transaction; used by the scheduler and on shutdown."""
+    from backend.app.db import session_scope
+
+    entries = progress_buffer.drain()
+    try:
+        with session_scope() as db:
+            entries = progress_buffer.drop_orphaned(db, entries)
+            write_page_turns(db, entries)
+    except Exception:
+        # Retried on the next flush
+        progress_buffer.restore(entries)
+        raise
+    progress_buffer.mark_written(len(entries))
+    if entries:
+        logger.debug("progress buffer: wrote %d page turns", len(entries))
+    return len(entries)
@@ -0,0 +1,98 @@
+"""In-process buffer for reading events.
+
+POST /users/me/reading-events only appends the validated rows here; they are
+written every READING_EVENTS_FLUSH_INTERVAL_SECONDS (and on shutdown, see
+main.py) with multi-row INSERTs into the partitioned reading_events table,
+or by the request itself once READING_EVENTS_FLUSH_THRESHOLD rows are
+pending. Unlike page turns nothing is coalesced: every event is kept.
+
+The buffer is per process, and a crash loses at most one flush window of
+events. Rows from failed flushes are put back, but at most MAX_PENDING_FACTOR
+times the threshold are held; beyond that the oldest are dropped and counted.
+"""
+import logging
+import threading
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.crud import crud_reading_event
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_FACTOR = 10
+
+
+class ReadingEventBuffer:
+    def __init__(self) -> None:
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, rows: List[dict]) -> int:
+        """Append rows; returns the number now pending."""
+        with self._lock:
+            self._pending.extend(rows)
+            self.recorded += len(rows)
+            return len(self._pending)
+
+    def drain(self) -> List[dict]:
+        with self._lock:
+            rows, self._pending = self._pending, []
+            return rows
+
+    def restore(self, rows: List[dict]) -> None:
+        """Put back rows from a failed flush ahead of newer ones."""
+        limit = settings.READING_EVENTS_FLUSH_THRESHOLD * MAX_PENDING_FACTOR
+        with self._lock:
+            self._pending = rows + self._pending
+            overflow = len(self._pending) - limit
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+        if overflow > 0:
+            logger.warning("reading events: dropped %d events after failed flushes", overflow)
+
+    def flush(self, db: Session) -> int:
+        """Write all pending rows with `db` (not committed). Returns the count."""
+        rows = self.drain()
+        try:
+            crud_reading_event.create_reading_events(db, rows)
+        except Exception:
+            self.restore(rows)
+            raise
+        self.mark_written(len(rows))
+        return len(rows)
+
+    def mark_written(self, count: int) -> None:
+        with self._lock:
+            self.written += count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), "recorded": self.recorded,
+                    "written": self.written, "dropped": self.dropped}
+
+
+reading_event_buffer = ReadingEventBuffer()
+
+
+def flush_reading_events() -> int:
+    """Flush in its own transaction; used by the scheduler and on shutdown."""
+    from backend.app.db import session_scope
+
+    rows = reading_event_buffer.drain()
+    try:
+        with session_scope() as db:
+            crud_reading_event.create_reading_events(db, rows)
+    except Exception:
+        # Retried on the next flush
+        reading_event_buffer.restore(rows)
+        raise
+    reading_event_buffer.mark_written(len(rows))
+    if rows:
+        logger.debug("reading events: wrote %d events", len(rows))
+    return len(rows)
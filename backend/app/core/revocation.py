@@ -0,0 +1,95 @@
+"""In-memory set of revoked sessions, checked on every access token.
+
+Access tokens carry their session (refresh-token family) id as `sid`.
+Checking it against the revoked_sessions table would put a query back on
+every request, so each process keeps the recently revoked ids in memory
+instead and reloads only rows newer than what it has seen, every
+REVOCATION_RELOAD_INTERVAL_SECONDS (see main.py). A revocation made by this
+process (logout, refresh-token reuse) is added directly; other processes
+pick it up within one reload interval.
+
+Only revocations younger than ACCESS_TOKEN_EXPIRE_MINUTES are kept: any
+access token of an older revoked session has expired anyway. This bounds
+the set by the number of logouts per access-token lifetime.
+"""
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.crud import crud_refresh_token
+
+logger = logging.getLogger(__name__)
+
+# revoked_at is the revoking transaction's start time, so a row can commit
+# a little after newer ones were loaded; reloads look back this far.
+RELOAD_OVERLAP = timedelta(seconds=60)
+
+
+class RevokedSessions:
+    def __init__(self) -> None:
+        self._revoked: Dict[uuid.UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._loaded_until: Optional[datetime] = None
+        self.reloads = 0
+
+    def is_revoked(self, sid: uuid.UUID) -> bool:
+        return sid in self._revoked
+
+    def add(self, sid: uuid.UUID, revoked_at: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._revoked[sid] = revoked_at or datetime.now(timezone.utc)
+
+    def reload(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Load revocations since the last reload and forget expired ones.
+        Returns the number of rows read."""
+        now = now or datetime.now(timezone.utc)
+        horizon = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        since = horizon if self._loaded_until is None else max(horizon, self._loaded_until - RELOAD_OVERLAP)
+        rows = crud_refresh_token.get_revoked_sessions_since(db, since)
+        with self._lock:
+            self._revoked.update(rows)
+            for sid in [sid for sid, at in self._revoked.items() if at < horizon]:
+                del self._revoked[sid]
+            if rows:
+                self._loaded_until = max(self._loaded_until or rows[-1][1], rows[-1][1])
+            elif self._loaded_until is None:
+                self._loaded_until = horizon
+            self.reloads += 1
+        return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._loaded_until = None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"revoked": len(self._revoked), "reloads": self.reloads,
+                    "loaded_until": self._loaded_until.isoformat() if self._loaded_until else None}
+
+
+revoked_sessions = RevokedSessions()
+
+
+def reload_revoked_sessions() -> int:
+    """Reload in its own transaction; used by the scheduler and at startup."""
+    from backend.app.db import session_scope
+
+    with session_scope() as db:
+        return revoked_sessions.reload(db)
+
+
+def cleanup_refresh_tokens() -> int:
+    """Delete expired refresh tokens and revocations; scheduled in main.py."""
+    from backend.app.db import session_scope
+
+    with session_scope() as db:
+        deleted = crud_refresh_token.delete_expired(db)
+    if deleted:
+        logger.info("revocation: deleted %d expired refresh tokens and revocations", deleted)
+    return deleted
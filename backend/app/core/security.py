@@ -1,34 +1,25 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose import JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from backend.app.db import get_db
-from backend.app import models, crud
+from backend.app import models, crud, schemas
+from backend.app.core.cache import principal_cache
+from backend.app.core.revocation import revoked_sessions
+from backend.app.core.tokens import decode_token, encode_token
 
 from backend.app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hashes a plain password."""
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Creates a new JWT access token."""
     to_encode = data.copy()
@@ -38,38 +29,109 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + \
             timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return encode_token(to_encode)
 
 # OAuth2 password bearer scheme for dependency injection
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# Same scheme for endpoints that also serve anonymous callers
+oauth2_scheme_optional = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Retrieve the current user from the JWT token."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        if email is None or user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
+
+def get_current_principal(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+    """The caller's identity from the JWT claims alone, without a database query.
+
+    For endpoints that only need the user id. The user row is not checked,
+    so a deleted user's token keeps working here until it expires; use it
+    for reads scoped by user_id, not for writes.
+    """
+    try:
+        payload = decode_token(token)
+        principal = schemas.TokenData(
+            email=payload.get("sub"), user_id=payload.get("user_id"), sid=payload.get("sid"))
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+    if principal.email is None or principal.user_id is None:
+        raise _credentials_exception()
+    # Logged out or compromised session; checked in memory, see core/revocation.py
+    if principal.sid is not None and revoked_sessions.is_revoked(principal.sid):
+        raise _credentials_exception()
+    return principal
+
+
+def _detached_copy(user: models.User) -> models.User:
+    """A session-less copy of the user's columns, safe to share between requests."""
+    copy = models.User(**{attr.key: getattr(user, attr.key)
+                          for attr in inspect(models.User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get_user_by_id_cached(db: Session, user_id: uuid.UUID) -> Optional[models.User]:
+    """crud_user.get_user through principal_cache.
+
+    A hit is attached to `db` with merge(load=False), which issues no query;
+    relationships still load lazily from `db` when read.
+    """
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
     user = crud.crud_user.get_user(db, user_id=user_id)
+    if user is not None:
+        principal_cache.set(user_id, _detached_copy(user))
+    return user
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """Retrieve the current user from the JWT token."""
+    principal = get_current_principal(token)
+    user = get_user_by_id_cached(db, principal.user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
+
+def get_current_admin_user(
+    principal: schemas.TokenData = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+) -> models.User:
+    """The current user, who must have the Admin tier.
+
+    Reads the user row rather than principal_cache, so a revoked tier takes
+    effect immediately.
+    """
+    current_user = crud.crud_user.get_user(db, user_id=principal.user_id)
+    if current_user is None:
+        raise _credentials_exception()
+    if current_user.tier != models.UserTierEnum.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+
+def get_current_user_optional(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db)
+) -> Optional[models.User]:
+    """The current user, or None without an Authorization header.
+
+    An invalid token is still rejected with 401.
+    """
+    if token is None:
+        return None
+    return get_current_user(token=token, db=db)
+
 # Placeholder for token decoding if needed directly in core,
 # though often handled by FastAPI's security utilities.
 # def decode_access_token(token: str) -> Optional[dict]:
@@ -0,0 +1,107 @@
+"""JWT signing keys and verification.
+
+With ALGORITHM = HS256 (the default) tokens are signed with SECRET_KEY, as
+before. With RS256 or ES256 they are signed with a key from a local key
+set, loaded once at startup from JWT_KEYS_DIR:
+
+    JWT_KEYS_DIR/<kid>.pem
+
+one PEM per key id. Private keys can sign; JWT_ACTIVE_KID picks the one that
+does. Every key in the directory, private or public, verifies tokens whose
+`kid` header names it. To rotate, add the new key, switch JWT_ACTIVE_KID and
+restart, then delete the old key once its last tokens have expired. Other
+services verify tokens with the public keys from GET /auth/jwks.json, without
+the shared secret.
+
+Verified tokens are cached by their SHA-256 digest (verified_token_cache),
+each entry no longer than the token's `exp`, so hot clients skip the
+signature check.
+"""
+import hashlib
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from backend.app.core.cache import verified_token_cache
+from backend.app.core.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+class KeySet:
+    """Signing key and verification keys, by key id."""
+
+    def __init__(self, algorithm: str, keys: Dict[Optional[str], Any], active_kid: Optional[str]) -> None:
+        if active_kid not in keys:
+            raise ValueError(f"No signing key with kid {active_kid!r}")
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._signing_key = keys[active_kid]
+        # Verification needs only the public half
+        self._verifying_keys = {
+            kid: key.public_key() if isinstance(key, Key) else key for kid, key in keys.items()
+        }
+
+    @classmethod
+    def from_secret(cls, secret: str, algorithm: str = "HS256") -> "KeySet":
+        return cls(algorithm, {None: secret}, None)
+
+    @classmethod
+    def from_directory(cls, directory: Path, algorithm: str, active_kid: str) -> "KeySet":
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Key files need one of {ASYMMETRIC_ALGORITHMS}, not {algorithm}")
+        keys = {path.stem: jwk.construct(path.read_text(), algorithm)
+                for path in sorted(Path(directory).glob("*.pem"))}
+        if active_kid in keys and keys[active_kid].is_public():
+            raise ValueError(f"Key {active_kid!r} is a public key and cannot sign")
+        return cls(algorithm, keys, active_kid)
+
+    @classmethod
+    def from_settings(cls) -> "KeySet":
+        if settings.ALGORITHM in ASYMMETRIC_ALGORITHMS:
+            return cls.from_directory(settings.JWT_KEYS_DIR, settings.ALGORITHM, settings.JWT_ACTIVE_KID)
+        return cls.from_secret(settings.SECRET_KEY, settings.ALGORITHM)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        headers = {"kid": self.active_kid} if self.active_kid else None
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """The claims of a valid token; raises JWTError otherwise."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid not in self._verifying_keys:
+            raise JWTError("Unknown key id")
+        return jwt.decode(token, self._verifying_keys[kid], algorithms=[self.algorithm])
+
+    def jwks(self) -> Dict[str, list]:
+        """The public keys as a JWK Set (empty for HS256, whose key is secret)."""
+        return {"keys": [
+            {**key.to_dict(), "kid": kid, "use": "sig"}
+            for kid, key in self._verifying_keys.items() if isinstance(key, Key)
+        ]}
+
+
+key_set = KeySet.from_settings()
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def encode_token(claims: Dict[str, Any]) -> str:
+    return key_set.sign(claims)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify a token through verified_token_cache; raises JWTError if invalid."""
+    digest = _digest(token)
+    claims = verified_token_cache.get(digest)
+    if claims is None:
+        claims = key_set.verify(token)
+        remaining = claims.get("exp", 0) - time.time()
+        if remaining > 0:
+            verified_token_cache.set(digest, claims, ttl=min(remaining, verified_token_cache.ttl))
+    return dict(claims)
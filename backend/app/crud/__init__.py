@@ -3,7 +3,10 @@ from . import crud_child as child
 from . import crud_favorite as favorite
 from . import crud_history as history
 from . import crud_progress as progress
+from . import crud_reading_event as reading_event
+from . import crud_refresh_token as refresh_token
 from . import crud_review as review
+from . import crud_sync as sync
 from . import crud_theme as theme
 from . import crud_user as user
 
@@ -14,7 +17,10 @@ from . import crud_user as user
 #     "favorite",
 #     "history",
 #     "progress",
+#     "reading_event",
+#     "refresh_token",
 #     "review",
+#     "sync",
 #     "theme",
 #     "user",
 # ]
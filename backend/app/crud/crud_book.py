@@ -1,10 +1,55 @@
 import uuid
+from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc
+from sqlalchemy.orm import Session, selectinload, load_only, raiseload
+from sqlalchemy import desc, asc, func, or_, and_, tuple_, update
 
 from .. import models, schemas
+from ..core.pagination import encode_cursor, decode_cursor
+from .crud_progress import add_progress_tombstones
+
+
+# Named loader profiles. Each caller picks the smallest profile that covers
+# what it serializes. Collections use selectinload (one extra query each)
+# rather than joinedload, so loading pages, TOC items and themes together
+# returns pages + toc + themes rows instead of pages x toc x themes.
+BOOK_LOADER_PROFILES = {
+    # BookRead: book columns plus themes
+    "list": (
+        selectinload(models.Book.book_themes).joinedload(models.BookTheme.theme),
+    ),
+    # BookDetailRead: everything needed to render the detail page
+    "detail": (
+        selectinload(models.Book.book_themes).joinedload(models.BookTheme.theme),
+        selectinload(models.Book.book_pages),
+        selectinload(models.Book.book_toc_items),
+    ),
+    # Existence checks and deletes: primary key only, no relationship loads
+    "exists": (
+        load_only(models.Book.id),
+        raiseload("*"),
+    ),
+}
+
+
+def book_loader_options(profile: str) -> tuple:
+    try:
+        return BOOK_LOADER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown book loader profile: {profile!r}") from None
+
+
+def _adjust_theme_book_counts(db: Session, theme_ids, delta: int) -> None:
+    """Keep Theme.book_count in step with book_themes inserts/deletes."""
+    theme_ids = sorted(set(theme_ids))  # Stable lock order across transactions
+    if not theme_ids:
+        return
+    db.execute(
+        update(models.Theme)
+        .where(models.Theme.id.in_(theme_ids))
+        .values(book_count=models.Theme.book_count + delta)
+    )
 
 
 # Book CRUD operations
@@ -36,48 +81,146 @@ def create_book(db: Session, book: schemas.BookCreate) -> models.Book:
             db.add(db_book_theme)
         # db.commit() # <-- Removed, all changes will be committed by the caller
         db.flush()  # Ensure BookTheme entries are flushed before refreshing db_book if relationships need it
+        _adjust_theme_book_counts(db, book.theme_ids, +1)
 
     # Refresh to load all relationships and generated values
     db.refresh(db_book)
     return db_book
 
 
-def get_book(db: Session, book_id: uuid.UUID) -> Optional[models.Book]:
+def get_book(db: Session, book_id: uuid.UUID, profile: str = "detail") -> Optional[models.Book]:
+    # Reviews are paginated separately and never loaded here
     return db.query(models.Book).options(
-        joinedload(models.Book.book_themes).joinedload(models.BookTheme.theme),
-        joinedload(models.Book.book_pages),
-        joinedload(models.Book.book_toc_items),
-        # joinedload(models.Book.reviews) # Reviews might be paginated separately
+        *book_loader_options(profile)
     ).filter(models.Book.id == book_id).first()
 
 
+def _escape_like(value: str) -> str:
+    # Treat user input literally inside ILIKE patterns
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _book_filter_criteria(
+    theme_id: Optional[uuid.UUID] = None,
+    q: Optional[str] = None,
+    age_min: Optional[int] = None,
+    age_max: Optional[int] = None,
+    book_type: schemas.BookTypeFilterEnum = schemas.BookTypeFilterEnum.ALL,
+) -> list:
+    """Build the WHERE clauses shared by get_books and count_books."""
+    criteria = []
+    if theme_id:
+        criteria.append(models.Book.book_themes.any(
+            models.BookTheme.theme_id == theme_id))
+
+    if q:
+        pattern = f"%{_escape_like(q.strip())}%"
+        criteria.append(or_(
+            models.Book.title.ilike(pattern, escape="\\"),
+            models.Book.author_name.ilike(pattern, escape="\\"),
+            models.Book.description.ilike(pattern, escape="\\"),
+            # Theme names act as the book's tags on the search page
+            models.Book.book_themes.any(models.BookTheme.theme.has(
+                models.Theme.name.ilike(pattern, escape="\\"))),
+        ))
+
+    # Age range overlap. Books without an age range always match,
+    # same as the client-side filter did.
+    if age_min is not None:
+        criteria.append(or_(models.Book.age_max.is_(None),
+                            models.Book.age_max >= age_min))
+    if age_max is not None:
+        criteria.append(or_(models.Book.age_min.is_(None),
+                            models.Book.age_min <= age_max))
+
+    if book_type == schemas.BookTypeFilterEnum.PREMIUM:
+        criteria.append(models.Book.is_premium.is_(True))
+    elif book_type == schemas.BookTypeFilterEnum.FREE:
+        criteria.append(models.Book.is_free.is_(True))
+    elif book_type == schemas.BookTypeFilterEnum.SUBSCRIPTION:
+        criteria.append(and_(models.Book.is_premium.is_(False),
+                             models.Book.is_free.is_(False)))
+    return criteria
+
+
+def _book_sort_key(sort_by: schemas.BookSortEnum) -> tuple:
+    # id is always the last key so that paging is deterministic on ties
+    if sort_by == schemas.BookSortEnum.NEWEST:
+        return (models.Book.created_at, models.Book.id)
+    # RECOMMENDED currently ranks by popularity as well
+    return (models.Book.popularity_score, models.Book.id)
+
+
+def _book_cursor_kind(sort_by: schemas.BookSortEnum) -> str:
+    return f"books:{sort_by.value}"
+
+
+def encode_book_cursor(book: models.Book, sort_by: schemas.BookSortEnum = schemas.BookSortEnum.RECOMMENDED) -> str:
+    """Cursor pointing just after `book` in the given ordering."""
+    return encode_cursor(_book_cursor_kind(sort_by),
+                         *(getattr(book, col.key) for col in _book_sort_key(sort_by)))
+
+
 def get_books(
     db: Session,
     skip: int = 0,
     limit: int = 100,
     theme_id: Optional[uuid.UUID] = None,
-    # TODO: Add more filters and sorting options as per plan
-    # sort_by: Optional[str] = None,
-    # is_free: Optional[bool] = None,
-    # age_min: Optional[int] = None,
-    # age_max: Optional[int] = None,
+    q: Optional[str] = None,
+    age_min: Optional[int] = None,
+    age_max: Optional[int] = None,
+    book_type: schemas.BookTypeFilterEnum = schemas.BookTypeFilterEnum.ALL,
+    sort_by: schemas.BookSortEnum = schemas.BookSortEnum.RECOMMENDED,
+    cursor: Optional[str] = None,
 ) -> List[models.Book]:
+    """List books. With `cursor` (see encode_book_cursor) keyset pagination is
+    used and `skip` is ignored; otherwise falls back to offset pagination."""
     query = db.query(models.Book).options(
-        joinedload(models.Book.book_themes).joinedload(models.BookTheme.theme)
-    )
-    if theme_id:
-        query = query.join(models.BookTheme).filter(
-            models.BookTheme.theme_id == theme_id)
+        *book_loader_options("list")
+    ).filter(*_book_filter_criteria(
+        theme_id=theme_id, q=q, age_min=age_min, age_max=age_max, book_type=book_type))
+
+    sort_key = _book_sort_key(sort_by)
+    if cursor:
+        key_types = (datetime.fromisoformat if sort_by == schemas.BookSortEnum.NEWEST else int, uuid.UUID)
+        after = decode_cursor(cursor, _book_cursor_kind(sort_by), key_types)
+        # Both keys are descending, so a row-value comparison matches the index order
+        query = query.filter(tuple_(*sort_key) < tuple_(*after))
+        skip = 0
 
-    # Add other filters here based on parameters
+    return query.order_by(*(desc(col) for col in sort_key)).offset(skip).limit(limit).all()
 
-    # Add sorting here based on sort_by parameter
 
-    return query.offset(skip).limit(limit).all()
+def count_books(
+    db: Session,
+    theme_id: Optional[uuid.UUID] = None,
+    q: Optional[str] = None,
+    age_min: Optional[int] = None,
+    age_max: Optional[int] = None,
+    book_type: schemas.BookTypeFilterEnum = schemas.BookTypeFilterEnum.ALL,
+) -> int:
+    """Count the books matching the same filters as get_books."""
+    return db.query(func.count(models.Book.id)).filter(*_book_filter_criteria(
+        theme_id=theme_id, q=q, age_min=age_min, age_max=age_max, book_type=book_type)).scalar()
+
+
+def get_related_books(db: Session, book_id: uuid.UUID, limit: int = 3) -> List[models.Book]:
+    """Top related books from the precomputed related_books table."""
+    return db.query(models.Book).join(
+        models.RelatedBook, models.RelatedBook.related_book_id == models.Book.id
+    ).options(
+        *book_loader_options("list")
+    ).filter(
+        models.RelatedBook.book_id == book_id
+    ).order_by(
+        desc(models.RelatedBook.score), asc(models.RelatedBook.related_book_id)
+    ).limit(limit).all()
 
 
 def update_book(db: Session, db_book: models.Book, book_in: schemas.BookUpdate) -> models.Book:
     update_data = book_in.model_dump(exclude_unset=True)
+    removed_theme_ids: List[uuid.UUID] = []
+    added_theme_ids: List[uuid.UUID] = []
 
     if "theme_ids" in update_data:
         theme_ids = update_data.pop("theme_ids")
@@ -86,12 +229,14 @@ def update_book(db: Session, db_book: models.Book, book_in: schemas.BookUpdate)
             models.BookTheme.book_id == db_book.id).all()
         for link in current_theme_links:
             if link.theme_id not in theme_ids:
+                removed_theme_ids.append(link.theme_id)
                 db.delete(link)
 
         # Add new themes
         existing_theme_ids = {link.theme_id for link in current_theme_links}
         for theme_id in theme_ids:
             if theme_id not in existing_theme_ids:
+                added_theme_ids.append(theme_id)
                 db_book_theme = models.BookTheme(
                     book_id=db_book.id, theme_id=theme_id)
                 db.add(db_book_theme)
@@ -102,11 +247,17 @@ def update_book(db: Session, db_book: models.Book, book_in: schemas.BookUpdate)
     db.add(db_book)  # or db.merge(db_book)
     # db.commit() # Removed
     db.flush()  # Ensure changes are sent to DB
+    _adjust_theme_book_counts(db, removed_theme_ids, -1)
+    _adjust_theme_book_counts(db, added_theme_ids, +1)
     db.refresh(db_book)
     return db_book
 
 
 def delete_book(db: Session, db_book: models.Book) -> models.Book:
+    linked_theme_ids = [theme_id for (theme_id,) in db.query(models.BookTheme.theme_id).filter(
+        models.BookTheme.book_id == db_book.id)]
+    _adjust_theme_book_counts(db, linked_theme_ids, -1)
+    add_progress_tombstones(db, models.UserBookProgress.book_id == db_book.id)
     db.delete(db_book)
     # db.commit() # Removed
     db.flush()  # Ensure delete is sent to DB
@@ -139,6 +290,12 @@ def get_book_page(db: Session, page_id: uuid.UUID, book_id: uuid.UUID) -> Option
     return db.query(models.BookPage).filter(models.BookPage.id == page_id, models.BookPage.book_id == book_id).first()
 
 
+def get_book_page_by_number(db: Session, book_id: uuid.UUID, page_number: int) -> Optional[models.BookPage]:
+    # (book_id, page_number) is unique
+    return db.query(models.BookPage).filter(
+        models.BookPage.book_id == book_id, models.BookPage.page_number == page_number).first()
+
+
 def get_book_pages_by_book(db: Session, book_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[models.BookPage]:
     return db.query(models.BookPage).filter(models.BookPage.book_id == book_id).order_by(models.BookPage.page_number).offset(skip).limit(limit).all()
 
@@ -184,6 +341,17 @@ def get_book_toc_item(db: Session, toc_item_id: uuid.UUID, book_id: uuid.UUID) -
     return db.query(models.BookTocItem).filter(models.BookTocItem.id == toc_item_id, models.BookTocItem.book_id == book_id).first()
 
 
+def get_book_toc_item_by_key(
+    db: Session, book_id: uuid.UUID, page_number: int, title: str,
+) -> Optional[models.BookTocItem]:
+    # (book_id, page_number, title) is unique
+    return db.query(models.BookTocItem).filter(
+        models.BookTocItem.book_id == book_id,
+        models.BookTocItem.page_number == page_number,
+        models.BookTocItem.title == title,
+    ).first()
+
+
 def get_book_toc_items_by_book(db: Session, book_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[models.BookTocItem]:
     return db.query(models.BookTocItem).filter(models.BookTocItem.book_id == book_id).order_by(models.BookTocItem.page_number).offset(skip).limit(limit).all()
 
@@ -4,6 +4,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from .crud_progress import add_progress_tombstones
 
 
 def create_child(db: Session, child: schemas.ChildCreate, user_id: uuid.UUID) -> models.Child:
@@ -40,6 +41,7 @@ def update_child(db: Session, db_child: models.Child, child_in: schemas.ChildUpd
 
 
 def delete_child(db: Session, db_child: models.Child) -> models.Child:
+    add_progress_tombstones(db, models.UserBookProgress.child_id == db_child.id)
     db.delete(db_child)
     # db.commit() # Removed
     db.flush()
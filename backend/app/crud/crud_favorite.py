@@ -1,9 +1,16 @@
 import uuid
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
 
 from .. import models, schemas
+from .crud_book import book_loader_options
+from ..core.events import book_activity, publish_after_commit
+from ..core.pagination import encode_cursor, decode_cursor
+
+_FAVORITE_CURSOR = "favorites:favorited_at"
 
 
 def get_favorite(db: Session, user_id: uuid.UUID, book_id: uuid.UUID) -> Optional[models.UserFavorite]:
@@ -24,6 +31,9 @@ def add_favorite(db: Session, user_id: uuid.UUID, book_id: uuid.UUID) -> Optiona
     # db.commit() # Removed
     db.flush()
     db.refresh(db_favorite)
+    book = db.get(models.Book, book_id)
+    publish_after_commit(db, book_activity(
+        models.ActivityTypeEnum.BOOK_FAVORITED, user_id=user_id, book_id=book_id, title=book.title))
     return db_favorite
 
 
@@ -37,15 +47,42 @@ def remove_favorite(db: Session, user_id: uuid.UUID, book_id: uuid.UUID) -> Opti
     return None  # Or raise an exception if it's expected to exist
 
 
-def get_user_favorites(db: Session, user_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[models.Book]:
-    # The plan expects a list of BookRead objects.
-    # So we query UserFavorite, join with Book, and return the Book objects.
-    # The route handler will then convert these Book models to BookRead schemas.
-    query = db.query(models.Book).join(models.UserFavorite).filter(
+def encode_favorite_cursor(favorited_at: datetime, book_id: uuid.UUID) -> str:
+    return encode_cursor(_FAVORITE_CURSOR, favorited_at, book_id)
+
+
+def get_user_favorite_rows(
+    db: Session,
+    user_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,  # Keyset pagination; skip is ignored when set
+) -> List[Tuple[models.Book, datetime]]:
+    """(book, favorited_at) pairs, newest favorite first. favorited_at is the
+    sort key, so the route builds the next cursor from the last pair."""
+    query = db.query(models.Book, models.UserFavorite.favorited_at).join(models.UserFavorite).filter(
         models.UserFavorite.user_id == user_id
     ).options(
-        # Eager load themes for each book, as BookRead schema includes themes
-        joinedload(models.Book.book_themes).joinedload(models.BookTheme.theme)
-    ).order_by(models.UserFavorite.favorited_at.desc()).offset(skip).limit(limit)
+        # Same loaders as the catalog list, as BookRead schema includes themes
+        *book_loader_options("list")
+    )
+    if cursor:
+        after = decode_cursor(cursor, _FAVORITE_CURSOR, (datetime.fromisoformat, uuid.UUID))
+        query = query.filter(
+            tuple_(models.UserFavorite.favorited_at, models.UserFavorite.book_id) < tuple_(*after))
+        skip = 0
+    query = query.order_by(models.UserFavorite.favorited_at.desc(),
+                           models.UserFavorite.book_id.desc()).offset(skip).limit(limit)
+    return [tuple(row) for row in query.all()]
+
 
-    return query.all()
+def get_user_favorites(
+    db: Session,
+    user_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> List[models.Book]:
+    # The route handler converts these Book models to BookRead schemas.
+    rows = get_user_favorite_rows(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    return [book for book, _ in rows]
@@ -1,10 +1,16 @@
 import uuid
-from typing import List, Optional
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Set, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import Date, cast, desc, func, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .. import models, schemas
+from ..core.pagination import encode_cursor, decode_cursor
+
+_ACTIVITY_CURSOR = "activities:created_at"
 
 
 def create_learning_activity(
@@ -24,19 +30,135 @@ def create_learning_activity(
     # db.commit() # Removed
     db.flush()
     db.refresh(db_activity)
+    _add_daily_counts(db, [(db_activity.user_id, db_activity.child_id,
+                            db_activity.activity_type, db_activity.created_at)])
     return db_activity
 
 
+def create_learning_activities(db: Session, rows: List[dict]) -> int:
+    """Insert many activities (column dicts) with multi-row INSERTs. Returns the count."""
+    if not rows:
+        return 0
+    now = datetime.now(timezone.utc)
+    # The rollup needs each row's timestamp, so do not leave it to the server default
+    rows = [row if row.get("created_at") else {**row, "created_at": now} for row in rows]
+    db.execute(insert(models.LearningActivity), rows)
+    _add_daily_counts(db, [(row["user_id"], row.get("child_id"), row["activity_type"], row["created_at"])
+                           for row in rows])
+    return len(rows)
+
+
+def existing_activity_owners(
+    db: Session, owners: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID]]],
+) -> Set[Tuple[uuid.UUID, Optional[uuid.UUID]]]:
+    """The (user_id, child_id) pairs whose user and child still exist.
+
+    Buffered activities check this first: one whose child was deleted after
+    it was published would fail its whole batch on the foreign key.
+    """
+    owners = set(owners)
+    if not owners:
+        return set()
+    users = set(db.scalars(select(models.User.id).where(
+        models.User.id.in_({u for u, _ in owners}))))
+    child_ids = {c for _, c in owners if c is not None}
+    children = {tuple(row) for row in db.execute(select(models.Child.id, models.Child.user_id).where(
+        models.Child.id.in_(child_ids)))} if child_ids else set()
+    return {(u, c) for u, c in owners if u in users and (c is None or (c, u) in children)}
+
+
+def _add_daily_counts(
+    db: Session,
+    activities: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID], models.ActivityTypeEnum, datetime]],
+) -> None:
+    """Add (user_id, child_id, activity_type, created_at) activities to the daily rollup.
+
+    One multi-row INSERT ... ON CONFLICT DO UPDATE SET count = count + n, with
+    the rows sorted so that concurrent writers lock them in the same order.
+    """
+    counts = Counter(
+        (user_id, child_id, activity_type, created_at.astimezone(timezone.utc).date())
+        for user_id, child_id, activity_type, created_at in activities
+    )
+    if not counts:
+        return
+    table = models.LearningActivityDailyCount.__table__
+    stmt = pg_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", text(models.PROGRESS_CHILD_KEY), "activity_type", "day"],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    db.execute(stmt, [
+        {"id": uuid.uuid4(), "user_id": user_id, "child_id": child_id,
+         "activity_type": activity_type, "day": day, "count": n}
+        for (user_id, child_id, activity_type, day), n in sorted(
+            counts.items(), key=lambda item: tuple(map(str, item[0])))
+    ])
+
+
+def period_start(day: date, granularity: schemas.HistoryGranularityEnum) -> date:
+    """First day of the day/week (ISO, from Monday)/month containing `day`."""
+    if granularity == schemas.HistoryGranularityEnum.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == schemas.HistoryGranularityEnum.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def get_learning_activity_summary(
+    db: Session,
+    user_id: uuid.UUID,
+    granularity: schemas.HistoryGranularityEnum,
+    since: date,
+    until: Optional[date] = None,
+    child_id: Optional[uuid.UUID] = None,
+    activity_type: Optional[models.ActivityTypeEnum] = None,
+) -> List[schemas.LearningActivitySummaryRow]:
+    """Activity counts per period, child and type from the daily rollup.
+
+    Days are UTC. `since` is moved back to the start of its period so that
+    the first bucket is complete; `until` is inclusive.
+    """
+    Daily = models.LearningActivityDailyCount
+    if granularity == schemas.HistoryGranularityEnum.DAY:
+        period = Daily.day
+    else:
+        period = cast(func.date_trunc(granularity.value, Daily.day), Date)
+    query = select(
+        period.label("period_start"), Daily.child_id, Daily.activity_type,
+        func.sum(Daily.count).label("count"),
+    ).where(Daily.user_id == user_id, Daily.day >= period_start(since, granularity))
+    if until is not None:
+        query = query.where(Daily.day <= until)
+    if child_id:
+        query = query.where(Daily.child_id == child_id)
+    if activity_type:
+        query = query.where(Daily.activity_type == activity_type)
+    query = query.group_by(period, Daily.child_id, Daily.activity_type).order_by(
+        period, Daily.child_id.nulls_first(), Daily.activity_type)
+    return [
+        schemas.LearningActivitySummaryRow(
+            period_start=row.period_start, child_id=row.child_id,
+            activity_type=row.activity_type, count=row.count)
+        for row in db.execute(query)
+    ]
+
+
 def get_learning_activity(db: Session, activity_id: uuid.UUID) -> Optional[models.LearningActivity]:
     return db.query(models.LearningActivity).filter(models.LearningActivity.id == activity_id).first()
 
 
+def encode_activity_cursor(activity: models.LearningActivity) -> str:
+    return encode_cursor(_ACTIVITY_CURSOR, activity.created_at, activity.id)
+
+
 def get_learning_activities_by_user(
     db: Session,
     user_id: uuid.UUID,
     child_id: Optional[uuid.UUID] = None,  # Filter by child if provided
     skip: int = 0,
-    limit: int = 10  # As per plan example
+    limit: int = 10,  # As per plan example
+    cursor: Optional[str] = None,  # Keyset pagination; skip is ignored when set
 ) -> List[models.LearningActivity]:
     query = db.query(models.LearningActivity).filter(
         models.LearningActivity.user_id == user_id)
@@ -44,4 +166,10 @@ def get_learning_activities_by_user(
     if child_id:
         query = query.filter(models.LearningActivity.child_id == child_id)
 
-    return query.order_by(desc(models.LearningActivity.created_at)).offset(skip).limit(limit).all()
+    if cursor:
+        after = decode_cursor(cursor, _ACTIVITY_CURSOR, (datetime.fromisoformat, uuid.UUID))
+        query = query.filter(
+            tuple_(models.LearningActivity.created_at, models.LearningActivity.id) < tuple_(*after))
+        skip = 0
+
+    return query.order_by(desc(models.LearningActivity.created_at), desc(models.LearningActivity.id)).offset(skip).limit(limit).all()
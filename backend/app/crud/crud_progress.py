@@ -1,10 +1,30 @@
+import html
+import re
 import uuid
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime, timezone  # Added timezone
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Integer, TIMESTAMP, TEXT, cast, column, delete, exists, func, select, text, tuple_, union_all, update, values
+from sqlalchemy.dialects.postgresql import REGCONFIG, UUID, insert
+from sqlalchemy.orm import Session, selectinload
 
 from .. import models, schemas
+from ..core.events import book_activity, publish_after_commit
+from ..core.pagination import encode_cursor, decode_cursor
+
+# Conflict target matching the unique index on user_book_progress
+PROGRESS_CONFLICT_TARGET = ["user_id", "book_id", text(models.PROGRESS_CHILD_KEY)]
+
+_SHELF_CURSOR = "shelf:last_read_at"
+_NOTE_SEARCH_CURSOR = "notes:search:created_at"
+# ts_headline marks matches with these, replaced by <mark> after escaping
+_MATCH_START, _MATCH_STOP = "\x02", "\x03"
+# ShortWord=0: by default fragments do not extend over words of up to three
+# letters, which includes every single Japanese or Chinese character
+_HEADLINE_OPTIONS = (f'StartSel="{_MATCH_START}", StopSel="{_MATCH_STOP}", '
+                     'MaxWords=25, MinWords=8, ShortWord=0, MaxFragments=2, FragmentDelimiter=" … "')
+# Quotes and runs of characters indexed one by one (models.NOTE_SEARCH_TEXT)
+_QUERY_TOKEN = re.compile(f'"|[{models.NOTE_SEARCH_UNSEGMENTED}]+')
 
 
 # UserBookProgress CRUD
@@ -18,36 +38,179 @@ def get_progress(db: Session, user_id: uuid.UUID, book_id: uuid.UUID, child_id:
     else:
         query = query.filter(models.UserBookProgress.child_id.is_(None))
 
+    # Two independent collections: selectinload avoids a bookmarks x notes join
     return query.options(
-        joinedload(models.UserBookProgress.bookmarks),
-        joinedload(models.UserBookProgress.notes)
+        selectinload(models.UserBookProgress.bookmarks),
+        selectinload(models.UserBookProgress.notes)
     ).first()
 
 
 def get_or_create_progress(db: Session, user_id: uuid.UUID, book_id: uuid.UUID, child_id: Optional[uuid.UUID] = None) -> models.UserBookProgress:
-    db_progress = get_progress(
-        db, user_id=user_id, book_id=book_id, child_id=child_id)
-
-    if not db_progress:
-        db_progress = models.UserBookProgress(
-            user_id=user_id,
-            book_id=book_id,
-            child_id=child_id,
-            current_page=1,  # Default starting page
-            last_read_at=datetime.now(timezone.utc)
-        )
-        db.add(db_progress)
-        # db.commit() # Removed
-        db.flush()
-        db.refresh(db_progress)
-        # Need to reload relationships if they are accessed immediately after creation
-        # This refresh might be redundant if the ORM handles relationship population correctly after flush/refresh.
-        # db.refresh(db_progress, attribute_names=['bookmarks', 'notes']) # Consider if this is truly needed.
-        # Refreshing the main object should suffice.
+    """Return the progress row, creating it on first use, in one statement:
+
+        WITH inserted AS (INSERT ... ON CONFLICT DO NOTHING RETURNING *)
+        SELECT * FROM inserted UNION ALL SELECT existing row
+
+    The unique index makes concurrent callers converge on one row. Bookmarks
+    and notes are loaded lazily, only if the caller reads them.
+    """
+    table = models.UserBookProgress.__table__
+    inserted = insert(table).values(
+        id=uuid.uuid4(), user_id=user_id, book_id=book_id, child_id=child_id,
+        current_page=1,  # Default starting page
+        last_read_at=datetime.now(timezone.utc),
+    ).on_conflict_do_nothing(
+        index_elements=PROGRESS_CONFLICT_TARGET
+    ).returning(*table.c).cte("inserted")
+    existing = select(table).where(
+        table.c.user_id == user_id,
+        table.c.book_id == book_id,
+        table.c.child_id == child_id if child_id else table.c.child_id.is_(None),
+    )
+    stmt = select(models.UserBookProgress).from_statement(
+        union_all(select(inserted), existing))
+    db_progress = db.execute(
+        stmt, execution_options={"populate_existing": True}).scalars().first()
+    if db_progress is None:
+        # Another transaction inserted the row after this statement's
+        # snapshot was taken; a new statement sees it.
+        db_progress = get_progress(db, user_id=user_id, book_id=book_id, child_id=child_id)
     return db_progress
 
 
+def get_or_create_progress_ids(db: Session, user_id: uuid.UUID, book_ids: Iterable[uuid.UUID], child_id: Optional[uuid.UUID] = None) -> Dict[uuid.UUID, uuid.UUID]:
+    """Bulk get_or_create_progress: {book_id: progress_id}, in two statements.
+
+    New rows get the transaction time as last_read_at, so that page updates
+    later in the same transaction (see upsert_progress_pages) win.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    if not book_ids:
+        return {}
+    table = models.UserBookProgress.__table__
+    db.execute(insert(table).on_conflict_do_nothing(index_elements=PROGRESS_CONFLICT_TARGET), [
+        {"id": uuid.uuid4(), "user_id": user_id, "book_id": book_id, "child_id": child_id,
+         "current_page": 1}
+        for book_id in book_ids
+    ])
+    rows = db.execute(select(table.c.book_id, table.c.id).where(
+        table.c.user_id == user_id,
+        table.c.book_id.in_(book_ids),
+        table.c.child_id == child_id if child_id else table.c.child_id.is_(None),
+    ))
+    return dict(rows.all())
+
+
+def _typed_values(name: str, columns: List[Tuple[str, object]], rows: list):
+    """A VALUES list with its columns cast back to their types.
+
+    Bound values in VALUES arrive untyped (UUIDs as text), so every use
+    needs the cast.
+    """
+    v = values(*(column(n, t) for n, t in columns), name=name).data(rows)
+    return v, {c.name: cast(c, c.type) for c in v.c}
+
+
+def existing_progress_keys(
+    db: Session, keys: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID], uuid.UUID]],
+) -> Set[Tuple[uuid.UUID, Optional[uuid.UUID], uuid.UUID]]:
+    """The (user_id, child_id, book_id) keys whose user, child and book exist.
+
+    Buffered writes check this first: a key whose book or child was deleted
+    after it was buffered would fail the whole batch on its foreign key.
+    """
+    keys = set(keys)
+    if not keys:
+        return set()
+    users = set(db.scalars(select(models.User.id).where(
+        models.User.id.in_({u for u, _, _ in keys}))))
+    books = set(db.scalars(select(models.Book.id).where(
+        models.Book.id.in_({b for _, _, b in keys}))))
+    child_ids = {c for _, c, _ in keys if c is not None}
+    children = {tuple(row) for row in db.execute(select(models.Child.id, models.Child.user_id).where(
+        models.Child.id.in_(child_ids)))} if child_ids else set()
+    return {(u, c, b) for u, c, b in keys
+            if u in users and b in books and (c is None or (c, u) in children)}
+
+
+def upsert_progress_pages(db: Session, pages: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID], uuid.UUID, int, datetime]]) -> None:
+    """Set current_page for many (user_id, child_id, book_id, page, read_at) at once.
+
+    One INSERT ... SELECT FROM (VALUES ...) ON CONFLICT DO UPDATE. Keys must
+    be distinct. Rows already read more recently than `read_at` are kept.
+    """
+    rows = [(uuid.uuid4(), *page) for page in pages]
+    if not rows:
+        return
+    v, c = _typed_values("pages", [
+        ("id", UUID(as_uuid=True)), ("user_id", UUID(as_uuid=True)),
+        ("child_id", UUID(as_uuid=True)), ("book_id", UUID(as_uuid=True)),
+        ("current_page", Integer), ("read_at", TIMESTAMP(timezone=True)),
+    ], rows)
+    table = models.UserBookProgress.__table__
+    stmt = insert(table).from_select(
+        ["id", "user_id", "child_id", "book_id", "current_page", "last_read_at"],
+        select(c["id"], c["user_id"], c["child_id"], c["book_id"], c["current_page"], c["read_at"]),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=PROGRESS_CONFLICT_TARGET,
+        set_={"current_page": stmt.excluded.current_page,
+              "last_read_at": stmt.excluded.last_read_at,
+              "sync_version": models.SYNC_VERSION},
+        where=table.c.last_read_at <= stmt.excluded.last_read_at,
+    )
+
+    # Only turns onto a book's last page can complete it; for those, read
+    # the previous page first and let RETURNING tell which rows were applied
+    books = _book_totals(db, {book_id for _, _, _, book_id, _, _ in rows})
+    finishing = [(user_id, child_id, book_id, page) for _, user_id, child_id, book_id, page, _ in rows
+                 if book_id in books and page >= books[book_id][0]]
+    if not finishing:
+        db.execute(stmt)
+        return
+    Progress = models.UserBookProgress
+    before = {
+        (user_id, child_id, book_id): page
+        for user_id, child_id, book_id, page in db.execute(
+            select(Progress.user_id, Progress.child_id, Progress.book_id, Progress.current_page).where(
+                tuple_(Progress.user_id, Progress.book_id).in_([(u, b) for u, _, b, _ in finishing])))
+    }
+    applied = set(map(tuple, db.execute(stmt.returning(table.c.user_id, table.c.child_id, table.c.book_id))))
+    _publish_completions(db, books, [
+        (user_id, child_id, book_id, before.get((user_id, child_id, book_id)), page)
+        for user_id, child_id, book_id, page in finishing if (user_id, child_id, book_id) in applied
+    ])
+
+
+def _book_totals(db: Session, book_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Tuple[int, str]]:
+    """(total_pages, title) of the given books that have a page count."""
+    return {
+        book_id: (total_pages, title)
+        for book_id, total_pages, title in db.execute(
+            select(models.Book.id, models.Book.total_pages, models.Book.title).where(
+                models.Book.id.in_(set(book_ids)), models.Book.total_pages > 0))
+    }
+
+
+def _publish_completions(
+    db: Session,
+    books: Dict[uuid.UUID, Tuple[int, str]],
+    changes: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID], uuid.UUID, Optional[int], int]],
+) -> None:
+    """Publish BOOK_READ_COMPLETED for (user, child, book, page before, page after)
+    changes that reach the book's last page. A missing `before` is a new row."""
+    for user_id, child_id, book_id, before, after in changes:
+        if book_id not in books:
+            continue
+        total_pages, title = books[book_id]
+        if after >= total_pages and (before is None or before < total_pages):
+            publish_after_commit(db, book_activity(
+                models.ActivityTypeEnum.BOOK_READ_COMPLETED,
+                user_id=user_id, child_id=child_id, book_id=book_id, title=title))
+
+
 def update_progress_page(db: Session, db_progress: models.UserBookProgress, current_page: int) -> models.UserBookProgress:
+    previous_page = db_progress.current_page
     db_progress.current_page = current_page
     db_progress.last_read_at = datetime.now(
         timezone.utc)  # Update last_read_at timestamp
@@ -55,9 +218,66 @@ def update_progress_page(db: Session, db_progress: models.UserBookProgress, curr
     # db.commit() # Removed
     db.flush()
     db.refresh(db_progress)
+    _publish_completions(db, _book_totals(db, [db_progress.book_id]), [
+        (db_progress.user_id, db_progress.child_id, db_progress.book_id, previous_page, current_page)])
     return db_progress
 
 
+def encode_shelf_cursor(item: schemas.ReadingShelfItem) -> str:
+    return encode_cursor(_SHELF_CURSOR, item.last_read_at, item.progress_id)
+
+
+def _percent_complete(current_page: int, total_pages: Optional[int]) -> Optional[float]:
+    if not total_pages:
+        return None
+    return round(min(current_page, total_pages) * 100.0 / total_pages, 1)
+
+
+def get_reading_shelf(
+    db: Session,
+    user_id: uuid.UUID,
+    child_id: Optional[uuid.UUID] = None,
+    include_finished: bool = False,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> List[schemas.ReadingShelfItem]:
+    """Progress rows of a user (and their children), most recently read first.
+
+    One query: the (user_id, last_read_at DESC, id DESC) index yields rows in
+    order and each is joined to its book by primary key, so a page costs
+    `limit` index entries plus the finished books skipped, whatever the size
+    of the history. Finished books (current_page >= total_pages) are left
+    out unless `include_finished`.
+    """
+    Progress, Book = models.UserBookProgress, models.Book
+    query = select(
+        Progress.id, Progress.child_id, Progress.current_page, Progress.last_read_at,
+        Book.id.label("book_id"), Book.title, Book.author_name, Book.cover_url, Book.total_pages,
+    ).join(Book, Book.id == Progress.book_id).where(Progress.user_id == user_id)
+    if child_id:
+        query = query.where(Progress.child_id == child_id)
+    if not include_finished:
+        query = query.where((Book.total_pages.is_(None)) | (Progress.current_page < Book.total_pages))
+    if cursor:
+        after = decode_cursor(cursor, _SHELF_CURSOR, (datetime.fromisoformat, uuid.UUID))
+        query = query.where(tuple_(Progress.last_read_at, Progress.id) < tuple_(*after))
+    query = query.order_by(Progress.last_read_at.desc(), Progress.id.desc()).limit(limit)
+
+    return [
+        schemas.ReadingShelfItem(
+            progress_id=row.id,
+            child_id=row.child_id,
+            book=schemas.ReadingShelfBook(
+                id=row.book_id, title=row.title, author_name=row.author_name, cover_url=row.cover_url),
+            current_page=row.current_page,
+            total_pages=row.total_pages,
+            percent_complete=_percent_complete(row.current_page, row.total_pages),
+            last_read_at=row.last_read_at,
+        )
+        for row in db.execute(query)
+    ]
+
+
 # UserBookBookmark CRUD
 def create_bookmark(db: Session, progress_id: uuid.UUID, page_number: int) -> models.UserBookBookmark:
     # Check if bookmark already exists for this page
@@ -74,6 +294,60 @@ def create_bookmark(db: Session, progress_id: uuid.UUID, page_number: int) -> mo
     return db_bookmark
 
 
+def set_bookmarks(db: Session, wanted: Dict[Tuple[uuid.UUID, int], bool]) -> None:
+    """Bulk create_bookmark/delete_bookmark: {(progress_id, page_number): present}."""
+    table = models.UserBookBookmark.__table__
+    add = [(uuid.uuid4(), progress_id, page) for (progress_id, page), present in wanted.items() if present]
+    if add:
+        v, c = _typed_values("bookmarks", [
+            ("id", UUID(as_uuid=True)), ("progress_id", UUID(as_uuid=True)), ("page_number", Integer),
+        ], add)
+        # No unique key on bookmarks, so skip pages that are already bookmarked
+        db.execute(insert(table).from_select(
+            ["id", "progress_id", "page_number"],
+            select(c["id"], c["progress_id"], c["page_number"]).where(~exists().where(
+                table.c.progress_id == c["progress_id"], table.c.page_number == c["page_number"])),
+        ))
+    remove = [(progress_id, page) for (progress_id, page), present in wanted.items() if not present]
+    if remove:
+        v, c = _typed_values("bookmarks", [
+            ("progress_id", UUID(as_uuid=True)), ("page_number", Integer)], remove)
+        _delete_with_tombstones(db, models.SyncEntityEnum.BOOKMARK, table,
+                                table.c.progress_id == c["progress_id"], table.c.page_number == c["page_number"])
+
+
+def _add_tombstones(db: Session, entity_type: models.SyncEntityEnum,
+                    rows: Iterable[Tuple[uuid.UUID, uuid.UUID, Optional[uuid.UUID], uuid.UUID]]) -> None:
+    """Record deleted rows for the change feed: (entity_id, user_id, child_id, book_id)."""
+    rows = list(rows)
+    if rows:
+        db.execute(insert(models.SyncTombstone.__table__), [
+            {"id": uuid.uuid4(), "user_id": user_id, "child_id": child_id, "book_id": book_id,
+             "entity_type": entity_type, "entity_id": entity_id}
+            for entity_id, user_id, child_id, book_id in rows
+        ])
+
+
+def _delete_with_tombstones(db: Session, entity_type: models.SyncEntityEnum, table, *criteria) -> None:
+    """DELETE bookmark or note rows matching `criteria`, leaving tombstones."""
+    progress = models.UserBookProgress.__table__
+    deleted = db.execute(delete(table).where(table.c.progress_id == progress.c.id, *criteria).returning(
+        table.c.id, progress.c.user_id, progress.c.child_id, progress.c.book_id))
+    _add_tombstones(db, entity_type, deleted)
+
+
+def add_progress_tombstones(db: Session, *criteria) -> None:
+    """Record the progress rows matching `criteria` as deleted.
+
+    For callers about to delete them indirectly (a book or child deletion
+    cascades to its progress). Their bookmarks and notes need no tombstones
+    of their own: clients drop them with the progress row.
+    """
+    Progress = models.UserBookProgress
+    _add_tombstones(db, models.SyncEntityEnum.PROGRESS, db.execute(
+        select(Progress.id, Progress.user_id, Progress.child_id, Progress.book_id).where(*criteria)))
+
+
 def get_bookmark_by_page(db: Session, progress_id: uuid.UUID, page_number: int) -> Optional[models.UserBookBookmark]:
     return db.query(models.UserBookBookmark).filter(
         models.UserBookBookmark.progress_id == progress_id,
@@ -86,6 +360,9 @@ def get_bookmark_by_id(db: Session, bookmark_id: uuid.UUID) -> Optional[models.U
 
 
 def delete_bookmark(db: Session, db_bookmark: models.UserBookBookmark) -> models.UserBookBookmark:
+    progress = db_bookmark.progress
+    _add_tombstones(db, models.SyncEntityEnum.BOOKMARK, [
+        (db_bookmark.id, progress.user_id, progress.child_id, progress.book_id)])
     db.delete(db_bookmark)
     # db.commit() # Removed
     db.flush()
@@ -107,6 +384,44 @@ def create_note(db: Session, progress_id: uuid.UUID, page_number: int, text: str
     return db_note
 
 
+def get_note_owners(db: Session, note_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, uuid.UUID]:
+    """{note_id: user_id} for the notes that exist."""
+    note_ids = list(set(note_ids))
+    if not note_ids:
+        return {}
+    rows = db.query(models.UserBookNote.id, models.UserBookProgress.user_id).join(
+        models.UserBookProgress, models.UserBookNote.progress).filter(
+        models.UserBookNote.id.in_(note_ids))
+    return dict(rows.all())
+
+
+def apply_note_changes(
+    db: Session,
+    created: Dict[uuid.UUID, Tuple[uuid.UUID, int, str]],
+    updated: Dict[uuid.UUID, str],
+    deleted: Set[uuid.UUID],
+) -> None:
+    """Bulk create_note/update_note/delete_note.
+
+    created: {note_id: (progress_id, page_number, text)} with client-chosen
+    ids, inserted idempotently; updated: {note_id: text}; deleted: note ids.
+    Ownership must have been checked by the caller.
+    """
+    table = models.UserBookNote.__table__
+    if created:
+        db.execute(insert(table).on_conflict_do_nothing(index_elements=[table.c.id]), [
+            {"id": note_id, "progress_id": progress_id, "page_number": page, "text": note_text}
+            for note_id, (progress_id, page, note_text) in created.items()
+        ])
+    if updated:
+        v, c = _typed_values("notes", [("id", UUID(as_uuid=True)), ("text", TEXT)],
+                             list(updated.items()))
+        db.execute(update(table).where(table.c.id == c["id"]).values(
+            text=c["text"], updated_at=datetime.now(timezone.utc), sync_version=models.SYNC_VERSION))
+    if deleted:
+        _delete_with_tombstones(db, models.SyncEntityEnum.NOTE, table, table.c.id.in_(deleted))
+
+
 def get_note(db: Session, note_id: uuid.UUID) -> Optional[models.UserBookNote]:
     return db.query(models.UserBookNote).filter(models.UserBookNote.id == note_id).first()
 
@@ -122,6 +437,9 @@ def update_note(db: Session, db_note: models.UserBookNote, text: str) -> models.
 
 
 def delete_note(db: Session, db_note: models.UserBookNote) -> models.UserBookNote:
+    progress = db_note.progress
+    _add_tombstones(db, models.SyncEntityEnum.NOTE, [
+        (db_note.id, progress.user_id, progress.child_id, progress.book_id)])
     db.delete(db_note)
     # db.commit() # Removed
     db.flush()
@@ -130,3 +448,83 @@ def delete_note(db: Session, db_note: models.UserBookNote) -> models.UserBookNot
 
 def get_notes_by_progress(db: Session, progress_id: uuid.UUID) -> List[models.UserBookNote]:
     return db.query(models.UserBookNote).filter(models.UserBookNote.progress_id == progress_id).order_by(models.UserBookNote.page_number, models.UserBookNote.created_at).all()
+
+
+def encode_note_search_cursor(hit: schemas.NoteSearchHit) -> str:
+    return encode_cursor(_NOTE_SEARCH_CURSOR, hit.created_at, hit.id)
+
+
+def _search_query(query: str) -> str:
+    """Spell each run of Japanese or Chinese characters in `query` the way
+    notes are indexed: as a phrase of single characters, so that "ねこ"
+    matches the adjacent characters ね, こ anywhere in a note."""
+    sep = models.NOTE_SEARCH_SEPARATOR
+    parts, quoted, pos = [], False, 0
+    for match in _QUERY_TOKEN.finditer(query):
+        parts.append(query[pos:match.start()])
+        if match.group() == '"':
+            quoted = not quoted
+            parts.append('"')
+        else:
+            phrase = sep + sep.join(match.group()) + sep
+            parts.append(phrase if quoted else f'"{phrase}"')
+        pos = match.end()
+    parts.append(query[pos:])
+    return "".join(parts)
+
+
+def _snippet(headline: str) -> str:
+    """HTML-escape a ts_headline result, then turn its match markers into <mark>."""
+    # Matched characters of a phrase are marked one by one; join them again
+    headline = headline.replace(models.NOTE_SEARCH_SEPARATOR, "").replace(_MATCH_STOP + _MATCH_START, "")
+    return html.escape(headline).replace(_MATCH_START, "<mark>").replace(_MATCH_STOP, "</mark>")
+
+
+def search_notes(
+    db: Session,
+    user_id: uuid.UUID,
+    query: str,
+    child_id: Optional[uuid.UUID] = None,
+    book_id: Optional[uuid.UUID] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> List[schemas.NoteSearchHit]:
+    """Full-text search over the notes of a user and their children, newest first.
+
+    `query` uses web search syntax ("quoted phrases", -exclusions, OR); words
+    in Japanese or Chinese match anywhere, also inside longer words. Matching
+    goes through the GIN index on user_book_notes.search_vector; snippets are
+    only computed for the notes of the returned page.
+    """
+    Note, Progress = models.UserBookNote, models.UserBookProgress
+    tsquery = func.websearch_to_tsquery(cast(models.NOTE_SEARCH_CONFIG, REGCONFIG), _search_query(query))
+
+    page = select(
+        Note.id, Note.page_number, Note.text, Note.created_at, Note.updated_at,
+        Progress.book_id, Progress.child_id,
+    ).join(Progress, Progress.id == Note.progress_id).where(
+        Progress.user_id == user_id,
+        Note.search_vector.bool_op("@@")(tsquery),
+    )
+    if child_id:
+        page = page.where(Progress.child_id == child_id)
+    if book_id:
+        page = page.where(Progress.book_id == book_id)
+    if cursor:
+        after = decode_cursor(cursor, _NOTE_SEARCH_CURSOR, (datetime.fromisoformat, uuid.UUID))
+        page = page.where(tuple_(Note.created_at, Note.id) < tuple_(*after))
+    page = page.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit).subquery()
+
+    rows = db.execute(select(
+        page.c.id, page.c.book_id, models.Book.title.label("book_title"), page.c.child_id,
+        page.c.page_number, page.c.created_at, page.c.updated_at,
+        func.ts_headline(cast(models.NOTE_SEARCH_CONFIG, REGCONFIG),
+                         func.regexp_replace(page.c.text, f"([{models.NOTE_SEARCH_UNSEGMENTED}])",
+                                             f"{models.NOTE_SEARCH_SEPARATOR}\\1{models.NOTE_SEARCH_SEPARATOR}", "g"),
+                         tsquery, _HEADLINE_OPTIONS).label("headline"),
+    ).join(models.Book, models.Book.id == page.c.book_id).order_by(
+        page.c.created_at.desc(), page.c.id.desc())).all()
+    return [
+        schemas.NoteSearchHit(**row._asdict(), snippet=_snippet(row.headline))
+        for row in rows
+    ]
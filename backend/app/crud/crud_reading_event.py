@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+
+
+def event_rows(user_id: uuid.UUID, events: Iterable[schemas.ReadingEventCreate], now: datetime) -> List[dict]:
+    """Column dicts for create_reading_events. Future timestamps are clamped to `now`."""
+    return [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "child_id": e.child_id,
+            "book_id": e.book_id,
+            "page_number": e.page_number,
+            "dwell_ms": e.dwell_ms,
+            # A device clock ahead of the server must not create future partitions' rows
+            "occurred_at": min(e.occurred_at, now),
+        }
+        for e in events
+    ]
+
+
+def create_reading_events(db: Session, rows: List[dict]) -> int:
+    """Append events with multi-row INSERTs. Returns the number written."""
+    if rows:
+        db.execute(insert(models.ReadingEvent), rows)
+    return len(rows)
+
+
+def invalid_event_reference(db: Session, user_id: uuid.UUID, events: List[schemas.ReadingEventCreate]) -> Optional[str]:
+    """Why the batch cannot be accepted, or None if every book and child exists.
+
+    Checked up front because buffered rows are written later, where a foreign
+    key violation would fail a whole flush.
+    """
+    book_ids = {e.book_id for e in events}
+    found = db.query(models.Book.id).filter(models.Book.id.in_(book_ids)).count()
+    if found != len(book_ids):
+        return "Book not found"
+    child_ids = {e.child_id for e in events if e.child_id is not None}
+    if child_ids:
+        found = db.query(models.Child.id).filter(
+            models.Child.id.in_(child_ids), models.Child.user_id == user_id).count()
+        if found != len(child_ids):
+            return "Child not found"
+    return None
+
+
+def get_reading_events_by_user(
+    db: Session,
+    user_id: uuid.UUID,
+    since: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[models.ReadingEvent]:
+    query = db.query(models.ReadingEvent).filter(models.ReadingEvent.user_id == user_id)
+    if since is not None:
+        # Lets the planner prune partitions older than `since`
+        query = query.filter(models.ReadingEvent.occurred_at >= since)
+    return query.order_by(models.ReadingEvent.occurred_at.desc()).limit(limit).all()
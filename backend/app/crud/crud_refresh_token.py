@@ -0,0 +1,109 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+
+
+def hash_refresh_token(raw_token: str) -> str:
+    # The token is 256 random bits, so a fast unsalted hash is enough
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def create_refresh_token(
+    db: Session, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None,
+) -> Tuple[str, models.RefreshToken]:
+    """A new refresh token: (raw token for the client, stored row).
+
+    Without `family_id` this starts a new session.
+    """
+    raw_token = secrets.token_urlsafe(32)
+    db_token = models.RefreshToken(
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4(),
+        token_hash=hash_refresh_token(raw_token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(db_token)
+    db.flush()
+    return raw_token, db_token
+
+
+def use_refresh_token(
+    db: Session, raw_token: str,
+) -> Tuple[Optional[models.RefreshToken], Optional[uuid.UUID]]:
+    """Consume a refresh token: (its row if it was usable, session revoked).
+
+    The row is locked, so concurrent refreshes with one token are
+    serialized. A token that was already used is being replayed, by the
+    client or by whoever stole it: its whole family is revoked and returned
+    as the second item. Does not commit, but a revocation must be committed
+    even though the refresh fails.
+    """
+    db_token = db.execute(
+        select(models.RefreshToken)
+        .where(models.RefreshToken.token_hash == hash_refresh_token(raw_token))
+        .with_for_update()
+    ).scalar_one_or_none()
+    now = datetime.now(timezone.utc)
+    if db_token is None or db_token.revoked_at is not None or db_token.expires_at <= now:
+        return None, None
+    if db_token.used_at is not None:
+        revoke_session(db, db_token.family_id, db_token.user_id)
+        return None, db_token.family_id
+    db_token.used_at = now
+    db.flush()
+    return db_token, None
+
+
+def revoke_session(db: Session, family_id: uuid.UUID, user_id: uuid.UUID) -> None:
+    """Revoke every refresh token of a session and record it for access-token checks."""
+    db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id == family_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    db.execute(insert(models.RevokedSession).values(sid=family_id, user_id=user_id)
+               .on_conflict_do_nothing(index_elements=["sid"]))
+
+
+def revoke_user_sessions(db: Session, user_id: uuid.UUID) -> List[uuid.UUID]:
+    """Revoke every open session of a user (e.g. on a password change).
+    Returns their ids, for revoked_sessions once committed."""
+    family_ids = list(db.scalars(
+        select(models.RefreshToken.family_id).distinct().where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.revoked_at.is_(None),
+            models.RefreshToken.expires_at > datetime.now(timezone.utc),
+        )
+    ))
+    for family_id in family_ids:
+        revoke_session(db, family_id, user_id)
+    return family_ids
+
+
+def get_revoked_sessions_since(db: Session, since: datetime) -> List[Tuple[uuid.UUID, datetime]]:
+    """(sid, revoked_at) of sessions revoked after `since`, oldest first."""
+    return [tuple(row) for row in db.execute(
+        select(models.RevokedSession.sid, models.RevokedSession.revoked_at)
+        .where(models.RevokedSession.revoked_at > since)
+        .order_by(models.RevokedSession.revoked_at)
+    )]
+
+
+def delete_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """Drop expired refresh tokens, and revocations older than any access
+    token that could carry them. Returns the number of rows deleted."""
+    now = now or datetime.now(timezone.utc)
+    tokens = db.execute(delete(models.RefreshToken).where(models.RefreshToken.expires_at <= now))
+    # Revoked families get no new access tokens, and the old ones have expired
+    sessions = db.execute(delete(models.RevokedSession).where(
+        models.RevokedSession.revoked_at < now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)))
+    return tokens.rowcount + sessions.rowcount
@@ -1,10 +1,41 @@
 import uuid
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from sqlalchemy import desc, tuple_
+from sqlalchemy.dialects.postgresql import insert
 
 from .. import models, schemas
+from ..core.events import book_activity, publish_after_commit
+from ..core.pagination import encode_cursor, decode_cursor
+
+_REVIEW_CURSOR = "reviews:created_at"
+
+# ReviewerInfo only needs the reviewer's id and name; skip the rest of the
+# user row (including the password hash). Many-to-one, so no row multiplication.
+_REVIEWER_LOADER = joinedload(models.Review.user).load_only(
+    models.User.id, models.User.name)
+
+
+def _adjust_rating_stats(db: Session, book_id: uuid.UUID, rating: int, delta: int) -> None:
+    """Add (delta=1) or remove (delta=-1) one rating from book_rating_stats.
+
+    A single INSERT ... ON CONFLICT DO UPDATE, so concurrent reviews of the
+    same book serialize on the stats row instead of losing updates.
+    """
+    stats = models.BookRatingStats.__table__
+    bucket = f"rating_{rating}"
+    stmt = insert(stats).values(
+        book_id=book_id, review_count=delta, rating_sum=delta * rating, **{bucket: delta})
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[stats.c.book_id],
+        set_={
+            "review_count": stats.c.review_count + delta,
+            "rating_sum": stats.c.rating_sum + delta * rating,
+            bucket: stats.c[bucket] + delta,
+        },
+    ))
 
 
 def create_review(db: Session, review: schemas.ReviewCreate, book_id: uuid.UUID, user_id: uuid.UUID) -> models.Review:
@@ -17,25 +48,39 @@ def create_review(db: Session, review: schemas.ReviewCreate, book_id: uuid.UUID,
     db.add(db_review)
     # db.commit() # Removed
     db.flush()
+    _adjust_rating_stats(db, book_id, db_review.rating, +1)
     db.refresh(db_review)
+    book = db.get(models.Book, book_id)
+    publish_after_commit(db, book_activity(
+        models.ActivityTypeEnum.REVIEW_POSTED, user_id=user_id, book_id=book_id, title=book.title))
     return db_review
 
 
 def get_review(db: Session, review_id: uuid.UUID) -> Optional[models.Review]:
     return db.query(models.Review).options(
-        joinedload(models.Review.user)  # To populate user info for ReviewRead
+        _REVIEWER_LOADER  # To populate user info for ReviewRead
     ).filter(models.Review.id == review_id).first()
 
 
+def encode_review_cursor(review: models.Review) -> str:
+    return encode_cursor(_REVIEW_CURSOR, review.created_at, review.id)
+
+
 def get_reviews_by_book(
     db: Session,
     book_id: uuid.UUID,
     skip: int = 0,
-    limit: int = 5  # As per plan example
+    limit: int = 5,  # As per plan example
+    cursor: Optional[str] = None,  # Keyset pagination; skip is ignored when set
 ) -> List[models.Review]:
-    return db.query(models.Review).options(
-        joinedload(models.Review.user)  # To populate user info for ReviewRead
-    ).filter(models.Review.book_id == book_id).order_by(desc(models.Review.created_at)).offset(skip).limit(limit).all()
+    query = db.query(models.Review).options(
+        _REVIEWER_LOADER  # To populate user info for ReviewRead
+    ).filter(models.Review.book_id == book_id)
+    if cursor:
+        after = decode_cursor(cursor, _REVIEW_CURSOR, (datetime.fromisoformat, uuid.UUID))
+        query = query.filter(tuple_(models.Review.created_at, models.Review.id) < tuple_(*after))
+        skip = 0
+    return query.order_by(desc(models.Review.created_at), desc(models.Review.id)).offset(skip).limit(limit).all()
 
 
 def get_reviews_by_user(
@@ -45,18 +90,22 @@ def get_reviews_by_user(
     limit: int = 100
 ) -> List[models.Review]:
     return db.query(models.Review).options(
-        joinedload(models.Review.user)  # To populate user info for ReviewRead
+        _REVIEWER_LOADER  # To populate user info for ReviewRead
     ).filter(models.Review.user_id == user_id).order_by(desc(models.Review.created_at)).offset(skip).limit(limit).all()
 
 
 def update_review(db: Session, db_review: models.Review, review_in: schemas.ReviewUpdate) -> models.Review:
     update_data = review_in.model_dump(exclude_unset=True)
+    old_rating = db_review.rating
     for field, value in update_data.items():
         setattr(db_review, field, value)
 
     db.add(db_review)  # or db.merge(db_review)
     # db.commit() # Removed
     db.flush()
+    if db_review.rating != old_rating:
+        _adjust_rating_stats(db, db_review.book_id, old_rating, -1)
+        _adjust_rating_stats(db, db_review.book_id, db_review.rating, +1)
     db.refresh(db_review)
     return db_review
 
@@ -65,19 +114,33 @@ def delete_review(db: Session, db_review: models.Review) -> models.Review:
     db.delete(db_review)
     # db.commit() # Removed
     db.flush()
+    _adjust_rating_stats(db, db_review.book_id, db_review.rating, -1)
     return db_review
 
 
-def get_review_summary_by_book(db: Session, book_id: uuid.UUID) -> schemas.ReviewSummary:
-    summary_query = db.query(
-        func.avg(models.Review.rating).label("average_rating"),
-        func.count(models.Review.id).label("total_reviews")
-    ).filter(models.Review.book_id == book_id).first()
-
-    avg_rating = summary_query.average_rating if summary_query.average_rating is not None else 0.0
-    total_reviews = summary_query.total_reviews if summary_query.total_reviews is not None else 0
-
+def _review_summary(stats: Optional[models.BookRatingStats]) -> schemas.ReviewSummary:
+    if stats is None or stats.review_count == 0:
+        return schemas.ReviewSummary(average_rating=0.0, total_reviews=0)
     return schemas.ReviewSummary(
-        average_rating=float(avg_rating),
-        total_reviews=int(total_reviews)
+        average_rating=stats.rating_sum / stats.review_count,
+        total_reviews=stats.review_count,
+        rating_histogram={rating: getattr(stats, f"rating_{rating}") for rating in range(1, 6)},
     )
+
+
+def get_review_summary_by_book(db: Session, book_id: uuid.UUID) -> schemas.ReviewSummary:
+    # Reads the maintained aggregate row instead of scanning the reviews.
+    # populate_existing: the row is written with Core upserts, so an instance
+    # already in the identity map may be stale.
+    return _review_summary(db.get(models.BookRatingStats, book_id, populate_existing=True))
+
+
+def get_review_summaries_by_books(db: Session, book_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, schemas.ReviewSummary]:
+    """ReviewSummary for each of `book_ids` with one primary-key lookup."""
+    book_ids = list(dict.fromkeys(book_ids))
+    if not book_ids:
+        return {}
+    rows = db.query(models.BookRatingStats).filter(
+        models.BookRatingStats.book_id.in_(book_ids)).populate_existing().all()
+    stats_by_book = {stats.book_id: stats for stats in rows}
+    return {book_id: _review_summary(stats_by_book.get(book_id)) for book_id in book_ids}
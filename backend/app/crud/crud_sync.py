@@ -0,0 +1,177 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..core.config import settings
+from ..core.pagination import decode_cursor, encode_cursor
+from . import crud_progress
+
+Op = schemas.SyncOperationEnum
+Status = schemas.SyncStatusEnum
+
+_SINCE_TOKEN = "sync:since"
+
+# A tombstone is stamped with its transaction's start time, which can be a
+# little before the token that must return it was issued.
+TOMBSTONE_OVERLAP = timedelta(hours=1)
+
+
+def apply_sync_batch(db: Session, user_id: uuid.UUID, mutations: List[schemas.SyncMutation]) -> List[schemas.SyncMutationResult]:
+    """Apply an ordered list of offline progress/bookmark/note mutations.
+
+    The list is first reduced in memory to its net effect (last page per
+    book, final state per bookmark and note), which is then written with a
+    fixed number of bulk statements from crud_progress, whatever the batch
+    size. Mutations that cannot apply get a per-item status instead of
+    failing the batch. Like the other crud functions this does not commit.
+    """
+    # Database time, shared with the progress rows created below
+    now = db.scalar(select(func.now()))
+    results: List[Optional[schemas.SyncMutationResult]] = [None] * len(mutations)
+
+    def reject(index: int, status: schemas.SyncStatusEnum, detail: str) -> None:
+        results[index] = schemas.SyncMutationResult(index=index, status=status, detail=detail)
+
+    known_books = {book_id for (book_id,) in db.query(models.Book.id).filter(
+        models.Book.id.in_({m.book_id for m in mutations}))}
+    for i, m in enumerate(mutations):
+        if m.book_id not in known_books:
+            reject(i, Status.NOT_FOUND, "Book not found")
+    live = [(i, m) for i, m in enumerate(mutations) if results[i] is None]
+
+    note_owners = crud_progress.get_note_owners(db, (m.note_id for _, m in live if m.note_id))
+
+    # Keyed by book until the accepted mutations are known; progress rows
+    # are only created for books that end up with bookmarks or new notes
+    pages: Dict[uuid.UUID, Tuple[int, datetime]] = {}
+    bookmarks: Dict[Tuple[uuid.UUID, int], bool] = {}
+    created_notes: Dict[uuid.UUID, Tuple[uuid.UUID, int, str]] = {}
+    updated_notes: Dict[uuid.UUID, str] = {}
+    gone_notes: Set[uuid.UUID] = set()  # Deleted earlier in this batch
+    deleted_notes: Set[uuid.UUID] = set()  # ... of which already stored
+
+    for i, m in live:
+        if m.op == Op.SET_PAGE:
+            # A device clock ahead of the server must not pin the page
+            at = min(m.occurred_at or now, now)
+            if m.book_id not in pages or pages[m.book_id][1] <= at:
+                pages[m.book_id] = (m.page_number, at)
+        elif m.op in (Op.ADD_BOOKMARK, Op.REMOVE_BOOKMARK):
+            bookmarks[(m.book_id, m.page_number)] = m.op == Op.ADD_BOOKMARK
+        else:
+            owner = note_owners.get(m.note_id)
+            if owner is not None and owner != user_id:
+                reject(i, Status.NOT_FOUND, "Note not found")
+                continue
+            exists = m.note_id in created_notes or (owner == user_id and m.note_id not in gone_notes)
+            if m.op == Op.ADD_NOTE:
+                if m.note_id in gone_notes:
+                    reject(i, Status.CONFLICT, "Note was deleted earlier in this batch")
+                elif not exists:
+                    created_notes[m.note_id] = (m.book_id, m.page_number, m.text)
+                # else: a replay of an already applied add
+            elif not exists:
+                reject(i, Status.NOT_FOUND, "Note not found")
+                continue
+            elif m.op == Op.UPDATE_NOTE:
+                if m.note_id in created_notes:
+                    note_book_id, page_number, _ = created_notes[m.note_id]
+                    created_notes[m.note_id] = (note_book_id, page_number, m.text)
+                else:
+                    updated_notes[m.note_id] = m.text
+            else:  # DELETE_NOTE
+                gone_notes.add(m.note_id)
+                if created_notes.pop(m.note_id, None) is None:
+                    updated_notes.pop(m.note_id, None)
+                    deleted_notes.add(m.note_id)
+        if results[i] is None:
+            results[i] = schemas.SyncMutationResult(index=i, status=Status.OK)
+
+    # Pages first: rows created by the upsert carry the page's own time, while
+    # get_or_create_progress_ids would stamp them with the transaction time
+    crud_progress.upsert_progress_pages(db, [
+        (user_id, None, book_id, page, at) for book_id, (page, at) in pages.items()
+    ])
+    progress_ids = crud_progress.get_or_create_progress_ids(
+        db, user_id=user_id,
+        book_ids=[book_id for book_id, _ in bookmarks] + [book_id for book_id, _, _ in created_notes.values()])
+    crud_progress.set_bookmarks(db, {
+        (progress_ids[book_id], page_number): present
+        for (book_id, page_number), present in bookmarks.items()
+    })
+    crud_progress.apply_note_changes(db, {
+        note_id: (progress_ids[book_id], page_number, text)
+        for note_id, (book_id, page_number, text) in created_notes.items()
+    }, updated_notes, deleted_notes)
+    return results
+
+
+def get_changes_since(db: Session, user_id: uuid.UUID, since: Optional[str] = None) -> schemas.SyncChangesResponse:
+    """Progress, bookmark and note rows of a user changed or deleted since `since`.
+
+    Rows carry the id of the transaction that last wrote them
+    (models.SYNC_VERSION). Transaction ids are not handed out in commit
+    order, so the next token is not the highest id seen but the oldest
+    transaction still running when the feed is read, taken before any row is:
+    anything older is visible to the queries below, anything newer is
+    returned again next time. Without `since`, all live rows are returned.
+
+    Tombstones are only kept for SYNC_TOMBSTONE_RETENTION_DAYS (see
+    delete_expired_tombstones), so a token issued longer ago than that is
+    answered like no token, with full_resync set.
+    """
+    watermark = db.scalar(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+    now = db.scalar(select(func.now()))
+    version = None
+    full_resync = False
+    if since:
+        version, issued_at = decode_cursor(since, _SINCE_TOKEN, (int, datetime.fromisoformat))
+        if issued_at < tombstone_cutoff(now) + TOMBSTONE_OVERLAP:
+            version, full_resync = None, True
+
+    Progress, Bookmark, Note = models.UserBookProgress, models.UserBookBookmark, models.UserBookNote
+
+    def changed(query, model):
+        query = query.filter(Progress.user_id == user_id)
+        return query if version is None else query.filter(model.sync_version >= version)
+
+    progress = changed(db.query(Progress), Progress).order_by(Progress.sync_version, Progress.id).all()
+    bookmarks = changed(db.query(Bookmark, Progress.book_id, Progress.child_id).join(Bookmark.progress),
+                        Bookmark).order_by(Bookmark.sync_version, Bookmark.id).all()
+    notes = changed(db.query(Note, Progress.book_id, Progress.child_id).join(Note.progress),
+                    Note).order_by(Note.sync_version, Note.id).all()
+    deleted = []
+    if version is not None:
+        Tombstone = models.SyncTombstone
+        deleted = db.query(Tombstone).filter(
+            Tombstone.user_id == user_id, Tombstone.sync_version >= version,
+        ).order_by(Tombstone.sync_version, Tombstone.id).all()
+
+    return schemas.SyncChangesResponse(
+        progress=[schemas.SyncProgressRead.model_validate(p) for p in progress],
+        bookmarks=[schemas.SyncBookmarkRead(**schemas.UserBookBookmarkRead.model_validate(b).model_dump(),
+                                            book_id=book_id, child_id=child_id)
+                   for b, book_id, child_id in bookmarks],
+        notes=[schemas.SyncNoteRead(**schemas.UserBookNoteRead.model_validate(n).model_dump(),
+                                    book_id=book_id, child_id=child_id)
+               for n, book_id, child_id in notes],
+        deleted=[schemas.SyncTombstoneRead.model_validate(t) for t in deleted],
+        full_resync=full_resync,
+        next_since=encode_cursor(_SINCE_TOKEN, watermark, now),
+    )
+
+
+def tombstone_cutoff(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def delete_expired_tombstones(db: Session, now: Optional[datetime] = None) -> int:
+    """Drop tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Returns the
+    number of rows deleted."""
+    result = db.execute(delete(models.SyncTombstone).where(
+        models.SyncTombstone.deleted_at < tombstone_cutoff(now)))
+    return result.rowcount
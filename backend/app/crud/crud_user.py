@@ -2,20 +2,11 @@ import uuid
 from typing import Optional, List
 
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext  # For password hashing
 
 from .. import models, schemas
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+from ..core.cache import invalidate_after_commit, principal_cache
+# get_password_hash and verify_password are also used by the routes as crud_user.*
+from ..core.hashing import hash_password as get_password_hash, verify_and_update, verify_password  # noqa: F401
 
 
 # User CRUD operations
@@ -27,6 +18,25 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+def authenticate(db: Session, email: str, password: str) -> Optional[models.User]:
+    """The user with these credentials, or None.
+
+    A valid password whose stored hash has outdated parameters (e.g. after
+    PASSWORD_BCRYPT_ROUNDS changed) is rehashed; the caller commits.
+    """
+    db_user = get_user_by_email(db, email)
+    if db_user is None:
+        return None
+    valid, new_hash = verify_and_update(password, db_user.hashed_password)
+    if not valid:
+        return None
+    if new_hash is not None:
+        db_user.hashed_password = new_hash
+        invalidate_after_commit(db, principal_cache, db_user.id)
+        db.flush()
+    return db_user
+
+
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
     """Retrieve a list of users with pagination."""
     return db.query(models.User).offset(skip).limit(limit).all()
@@ -75,6 +85,7 @@ def update_user(db: Session, db_user: models.User, user_in: schemas.UserUpdate)
     update_data = user_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
+    invalidate_after_commit(db, principal_cache, db_user.id)
 
     db.add(db_user)  # or db.merge(db_user)
     # db.commit() # Removed
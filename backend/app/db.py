@@ -1,5 +1,5 @@
 from __future__ import annotations  # 3.7–3.9 互換のため（任意）
-from typing import Generator
+from typing import Callable, Generator
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
@@ -36,6 +36,8 @@ engine = create_engine(
     CURRENT_DATABASE_URL,
     echo=False,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     future=True,
 )
 
@@ -67,6 +69,16 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_session_factory() -> Callable[[], Session]:
+    """
+    自前でセッションを開くルート用の依存性（例: クエリの並列実行）。
+    Session はスレッドセーフではないため、各スレッドで
+        with factory() as db:
+    として専用のセッションを使う。
+    """
+    return SessionLocal
+
+
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
     """
@@ -0,0 +1 @@
+# Batch jobs run outside the request cycle (cron, CLI or the in-process scheduler).
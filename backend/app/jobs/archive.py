@@ -0,0 +1,201 @@
+"""Archive old learning_activities partitions to compressed files.
+
+Monthly partitions (see jobs/partitions.py) of months that ended more than
+ACTIVITY_RETENTION_MONTHS ago are written to one file per user,
+
+    ACTIVITY_ARCHIVE_DIR/learning_activities_yYYYYmMM/<user_id>.jsonl.gz
+
+one LearningActivityRead JSON object per line, newest first, and then
+detached and dropped. The partition is locked against writes while it is
+copied, and the directory is fsynced and renamed into place before the
+partition is dropped, so a failure at any step leaves either the partition
+or the complete directory. The daily rollup is not touched, so summaries
+still cover archived months.
+
+Archived months stay readable through read_archived_activities() (GET
+/users/me/learning-history/archive/{month}), which reads only the
+requesting user's file.
+
+Rows inserted after their month was archived (a created_at that far in the
+past only comes from a badly wrong clock) land in the default partition,
+since archived months get no new partition. They stay there, and in the
+live history, and are not archived; archive_old_partitions() logs how many
+there are.
+
+Runs periodically in the API process (see main.py) or from the command line:
+    python -m backend.app.jobs.archive
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from itertools import groupby
+from typing import List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..core.config import settings
+from ..db import session_scope
+from .partitions import add_months, existing_partitions, partition_name
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_TABLE = "learning_activities"
+_PARTITION_RE = re.compile(rf"^{ARCHIVED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Arbitrary constant for pg_try_advisory_xact_lock, so that only one worker
+# process archives a partition.
+_ADVISORY_LOCK_KEY = 7_031_003
+
+
+def archive_path(month: date, archive_dir: Optional[Path] = None) -> Path:
+    """The directory holding a month's per-user archive files."""
+    return Path(archive_dir or settings.ACTIVITY_ARCHIVE_DIR) / partition_name(ARCHIVED_TABLE, month)
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def archivable_months(db: Session, now: Optional[datetime] = None,
+                      retention_months: Optional[int] = None) -> List[date]:
+    """Months with a partition that ended before the retention window, oldest first."""
+    if retention_months is None:
+        retention_months = settings.ACTIVITY_RETENTION_MONTHS
+    now = now or datetime.now(timezone.utc)
+    cutoff = add_months(date(now.year, now.month, 1), -retention_months)
+    months = []
+    for name in existing_partitions(db, ARCHIVED_TABLE):
+        match = _PARTITION_RE.match(name)
+        if match:
+            month = date(int(match[1]), int(match[2]), 1)
+            if add_months(month, 1) <= cutoff:
+                months.append(month)
+    return sorted(months)
+
+
+def archive_partition(db: Session, month: date, archive_dir: Optional[Path] = None) -> int:
+    """Write one month's partition to its archive file and drop it. Returns the row count.
+
+    Does not commit; the partition is only gone once the caller commits.
+    """
+    name = partition_name(ARCHIVED_TABLE, month)
+    path = archive_path(month, archive_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    # Left over by an archive run that failed before the rename
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir()
+
+    # Late writes into the month would otherwise be lost
+    db.execute(text(f'LOCK TABLE "{name}" IN SHARE MODE'))
+    table = models.LearningActivity.__table__
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+    # Pruned to the one partition
+    rows = db.execute(
+        select(table).where(table.c.created_at >= start, table.c.created_at < end)
+        .order_by(table.c.user_id, table.c.created_at.desc(), table.c.id.desc())
+        .execution_options(yield_per=1000))
+    count = 0
+    for user_id, user_rows in groupby(rows, key=lambda row: row.user_id):
+        with open(partial / f"{user_id}.jsonl.gz", "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                for row in user_rows:
+                    activity = schemas.LearningActivityRead.model_validate(dict(row._mapping))
+                    f.write(activity.model_dump_json().encode() + b"\n")
+                    count += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+    _fsync(partial)
+    # Written by a run whose transaction then failed; the partition is still authoritative
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(partial, path)
+    _fsync(path.parent)
+
+    db.execute(text(f'ALTER TABLE "{ARCHIVED_TABLE}" DETACH PARTITION "{name}"'))
+    db.execute(text(f'DROP TABLE "{name}"'))
+    return count
+
+
+def archive_old_partitions(archive_dir: Optional[Path] = None) -> List[date]:
+    """Archive every partition past retention, one committed transaction each."""
+    archived = []
+    with session_scope() as db:
+        months = archivable_months(db)
+    for month in months:
+        with session_scope() as db:
+            locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"),
+                                {"key": _ADVISORY_LOCK_KEY}).scalar()
+            if not locked:
+                break
+            if month not in archivable_months(db):
+                continue  # Archived meanwhile by another process
+            count = archive_partition(db, month, archive_dir)
+        logger.info("archive: moved %d learning activities of %s to %s",
+                    count, f"{month:%Y-%m}", archive_path(month, archive_dir))
+        archived.append(month)
+    with session_scope() as db:
+        late = count_unarchived_late_rows(db)
+    if late:
+        logger.warning("archive: %d learning activities of archived months are in %s_default",
+                       late, ARCHIVED_TABLE)
+    return archived
+
+
+def count_unarchived_late_rows(db: Session, now: Optional[datetime] = None,
+                               retention_months: Optional[int] = None) -> int:
+    """Rows in the default partition older than the retention window; see the module docstring."""
+    if retention_months is None:
+        retention_months = settings.ACTIVITY_RETENTION_MONTHS
+    now = now or datetime.now(timezone.utc)
+    cutoff = add_months(date(now.year, now.month, 1), -retention_months)
+    return db.execute(text(f'SELECT count(*) FROM "{ARCHIVED_TABLE}_default" WHERE created_at < :cutoff'),
+                      {"cutoff": datetime.combine(cutoff, datetime.min.time(), tzinfo=timezone.utc)}).scalar()
+
+
+def archived_months(archive_dir: Optional[Path] = None) -> List[date]:
+    directory = Path(archive_dir or settings.ACTIVITY_ARCHIVE_DIR)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        date(int(m[1]), int(m[2]), 1)
+        for m in map(_PARTITION_RE.match, os.listdir(directory)) if m
+    )
+
+
+def read_archived_activities(
+    month: date,
+    user_id: uuid.UUID,
+    child_id: Optional[uuid.UUID] = None,
+    archive_dir: Optional[Path] = None,
+) -> Optional[List[schemas.LearningActivityRead]]:
+    """A user's activities from an archived month, newest first; None if not archived."""
+    path = archive_path(month, archive_dir)
+    if not path.is_dir():
+        return None
+    user_file = path / f"{user_id}.jsonl.gz"
+    if not user_file.exists():
+        return []
+    activities = []
+    with gzip.open(user_file, "rt", encoding="utf-8") as f:
+        for line in f:
+            activity = schemas.LearningActivityRead.model_validate_json(line)
+            if child_id is None or activity.child_id == child_id:
+                activities.append(activity)
+    return activities
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    archive_old_partitions()
@@ -0,0 +1,297 @@
+"""Bulk catalog import.
+
+Streams book records, validates them in chunks and writes each chunk with a
+few multi-row INSERT ... ON CONFLICT statements keyed on natural keys, so
+re-running an import updates rows instead of duplicating them:
+
+    books        external_id
+    book_pages   (book_id, page_number)
+    toc items    (book_id, page_number, title)
+    theme links  (book_id, theme name)
+
+Imports only ever insert or update rows. Pages, TOC items and theme links
+that are missing from the file are left in place. popularity_score is set
+on insert only, so that the computed score (see jobs/popularity.py) survives
+re-imports.
+
+Formats:
+    jsonl  one book per line, with nested "themes" (names), "pages" and "toc"
+    csv    one flat file per kind: books (themes as a ";"-separated column),
+           pages or toc (keyed by book_external_id), themes
+           (book_external_id, theme)
+
+Usage:
+    python -m backend.app.jobs.catalog_import catalog.jsonl
+    python -m backend.app.jobs.catalog_import pages.csv --format csv --kind pages
+"""
+import argparse
+import csv
+import json
+import logging
+import uuid
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+CSV_KINDS = ("books", "pages", "toc", "themes")
+
+_BOOK_FIELDS = tuple(schemas.BookBase.model_fields)
+_PAGE_FIELDS = set(schemas.BookPageBase.model_fields)
+_TOC_FIELDS = set(schemas.BookTocItemBase.model_fields)
+# Columns an import may overwrite on an existing book
+_BOOK_UPDATE_FIELDS = tuple(f for f in _BOOK_FIELDS if f != "popularity_score")
+
+_ADAPTERS = {
+    "jsonl": TypeAdapter(schemas.CatalogBookImport),
+    "books": TypeAdapter(schemas.CatalogBookImport),
+    "pages": TypeAdapter(schemas.CatalogPageRow),
+    "toc": TypeAdapter(schemas.CatalogTocRow),
+    "themes": TypeAdapter(schemas.CatalogThemeLinkRow),
+}
+
+
+class CatalogImporter:
+    """Writes validated records chunk by chunk and keeps the running totals.
+
+    Like the crud functions this never commits; the caller decides whether
+    to commit per chunk (CLI) or once at the end (admin endpoint).
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.result = schemas.CatalogImportResult()
+        self._book_ids: Dict[str, uuid.UUID] = {}
+        self._theme_ids: Dict[str, uuid.UUID] = {}
+
+    def error(self, line: int, message: str) -> None:
+        self.result.errors.append(schemas.CatalogImportError(line=line, message=message))
+
+    # -- lookups ---------------------------------------------------------------
+
+    def _resolve_books(self, external_ids: Iterable[str]) -> None:
+        missing = {e for e in external_ids if e not in self._book_ids}
+        if missing:
+            rows = self.db.query(models.Book.external_id, models.Book.id).filter(
+                models.Book.external_id.in_(missing))
+            self._book_ids.update(dict(rows))
+
+    def _resolve_themes(self, names: Iterable[str]) -> None:
+        missing = {n for n in names if n not in self._theme_ids}
+        if missing:
+            rows = self.db.query(models.Theme.name, models.Theme.id).filter(
+                models.Theme.name.in_(missing))
+            self._theme_ids.update(dict(rows))
+
+    # -- writers ---------------------------------------------------------------
+
+    def upsert_books(self, records: List[schemas.CatalogBookImport]) -> None:
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one
+        # statement, so the last record for an external_id wins
+        latest = {r.external_id: r for r in records}
+        if not latest:
+            return
+        table = models.Book.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.external_id],
+            set_={**{f: stmt.excluded[f] for f in _BOOK_UPDATE_FIELDS}, "updated_at": func.now()},
+        ).returning(table.c.external_id, table.c.id)
+        rows = [
+            {"id": uuid.uuid4(), "external_id": r.external_id, **r.model_dump(include=set(_BOOK_FIELDS))}
+            for r in latest.values()
+        ]
+        self._book_ids.update(dict(self.db.execute(stmt, rows).all()))
+        self.result.books += len(rows)
+
+    def upsert_pages(self, rows: List[Tuple[int, str, schemas.BookPageBase]]) -> None:
+        values = self._keyed_rows(rows, key=lambda r: (r.page_number,))
+        if not values:
+            return
+        table = models.BookPage.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.book_id, table.c.page_number],
+            set_={c: stmt.excluded[c] for c in ("image_url", "audio_url", "question_id")},
+        )
+        self.db.execute(stmt, [
+            {"id": uuid.uuid4(), "book_id": book_id, **page.model_dump(include=_PAGE_FIELDS)}
+            for book_id, page in values
+        ])
+        self.result.pages += len(values)
+
+    def upsert_toc(self, rows: List[Tuple[int, str, schemas.BookTocItemBase]]) -> None:
+        values = self._keyed_rows(rows, key=lambda r: (r.page_number, r.title))
+        if not values:
+            return
+        table = models.BookTocItem.__table__
+        stmt = insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.book_id, table.c.page_number, table.c.title],
+        ).returning(table.c.id)
+        inserted = self.db.execute(stmt, [
+            {"id": uuid.uuid4(), "book_id": book_id, **item.model_dump(include=_TOC_FIELDS)}
+            for book_id, item in values
+        ]).scalars().all()
+        # Items that already existed are skipped, not counted
+        self.result.toc_items += len(inserted)
+
+    def link_themes(self, rows: List[Tuple[int, str, str]]) -> None:
+        self._resolve_themes(name for _, _, name in rows)
+        self._resolve_books(external_id for _, external_id, _ in rows)
+        links = {}
+        for line, external_id, name in rows:
+            theme_id = self._theme_ids.get(name)
+            if theme_id is None:
+                self.error(line, f"Unknown theme {name!r}")
+                continue
+            book_id = self._book_ids.get(external_id)
+            if book_id is None:
+                self.error(line, f"Unknown book external_id {external_id!r}")
+                continue
+            links[(book_id, theme_id)] = None
+        if not links:
+            return
+        table = models.BookTheme.__table__
+        stmt = insert(table).on_conflict_do_nothing().returning(table.c.theme_id)
+        inserted = self.db.execute(
+            stmt, [{"book_id": b, "theme_id": t} for b, t in links]).scalars().all()
+        # Only links that did not exist yet change the maintained counts
+        for theme_id, added in Counter(inserted).items():
+            self.db.execute(update(models.Theme).where(models.Theme.id == theme_id).values(
+                book_count=models.Theme.book_count + added))
+        self.result.theme_links += len(inserted)
+
+    def _keyed_rows(self, rows, key) -> list:
+        """Resolve book_external_id to book_id and drop in-chunk duplicates."""
+        self._resolve_books(external_id for _, external_id, _ in rows)
+        values = {}
+        for line, external_id, item in rows:
+            book_id = self._book_ids.get(external_id)
+            if book_id is None:
+                self.error(line, f"Unknown book external_id {external_id!r}")
+                continue
+            values[(book_id, *key(item))] = (book_id, item)
+        return list(values.values())
+
+    # -- chunks ----------------------------------------------------------------
+
+    def write_books(self, chunk: List[Tuple[int, schemas.CatalogBookImport]]) -> None:
+        self.upsert_books([book for _, book in chunk])
+        self.upsert_pages([(line, b.external_id, p) for line, b in chunk for p in b.pages])
+        self.upsert_toc([(line, b.external_id, t) for line, b in chunk for t in b.toc])
+        self.link_themes([(line, b.external_id, name) for line, b in chunk for name in b.themes])
+
+    def write_csv_rows(self, kind: str, chunk: list) -> None:
+        if kind == "books":
+            self.write_books(chunk)
+        elif kind == "pages":
+            self.upsert_pages([(line, r.book_external_id, r) for line, r in chunk])
+        elif kind == "toc":
+            self.upsert_toc([(line, r.book_external_id, r) for line, r in chunk])
+        else:
+            self.link_themes([(line, r.book_external_id, r.theme) for line, r in chunk])
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _parse_jsonl(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+
+
+def _parse_csv(lines: Iterable[str], kind: str) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # Empty cells mean "not set" rather than empty strings
+        record = {k: v for k, v in row.items() if v not in ("", None)}
+        if kind == "books" and "themes" in record:
+            record["themes"] = [t.strip() for t in record["themes"].split(";") if t.strip()]
+        yield reader.line_num, record
+
+
+def _validate(importer: CatalogImporter, adapter: TypeAdapter, chunk) -> list:
+    valid = []
+    for line, raw in chunk:
+        if isinstance(raw, Exception):
+            importer.error(line, f"Invalid JSON: {raw}")
+            continue
+        try:
+            valid.append((line, adapter.validate_python(raw)))
+        except ValidationError as e:
+            importer.error(line, "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+    return valid
+
+
+def import_catalog(
+    db: Session,
+    lines: Iterable[str],
+    format: str = "jsonl",
+    kind: str = "books",
+    chunk_size: int = CHUNK_SIZE,
+    commit_every_chunk: bool = False,
+) -> schemas.CatalogImportResult:
+    """Import a stream of text lines. Invalid records are reported, not fatal."""
+    if format == "jsonl":
+        records, adapter = _parse_jsonl(lines), _ADAPTERS["jsonl"]
+    elif format == "csv":
+        if kind not in CSV_KINDS:
+            raise ValueError(f"Unknown CSV kind: {kind!r}")
+        records, adapter = _parse_csv(lines, kind), _ADAPTERS[kind]
+    else:
+        raise ValueError(f"Unknown import format: {format!r}")
+
+    importer = CatalogImporter(db)
+    for chunk in _chunks(records, chunk_size):
+        valid = _validate(importer, adapter, chunk)
+        if format == "jsonl":
+            importer.write_books(valid)
+        else:
+            importer.write_csv_rows(kind, valid)
+        if commit_every_chunk:
+            db.commit()
+    return importer.result
+
+
+def main(argv: Optional[list] = None) -> None:
+    from backend.app.core.cache import catalog_cache
+    from backend.app.db import session_scope
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--kind", choices=CSV_KINDS, default="books",
+                        help="what a CSV file contains")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    with open(args.path, newline="", encoding="utf-8") as f, session_scope() as db:
+        result = import_catalog(db, f, format=args.format, kind=args.kind,
+                                chunk_size=args.chunk_size, commit_every_chunk=True)
+    catalog_cache.bump_version()
+    for error in result.errors:
+        logger.warning("line %d: %s", error.line, error.message)
+    logger.info("catalog import: %d books, %d pages, %d toc items, %d theme links, %d errors",
+                result.books, result.pages, result.toc_items, result.theme_links, len(result.errors))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
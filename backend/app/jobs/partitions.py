@@ -0,0 +1,121 @@
+"""Monthly range partitions for append-only tables.
+
+Tables in PARTITIONED_TABLES are declared PARTITION BY RANGE on a timestamp
+column, with a DEFAULT partition created alongside the table (see
+models.ReadingEvent and models.LearningActivity). This job creates one
+partition per calendar month (UTC), named <table>_yYYYYmMM, for the current
+month and the next PARTITION_MONTHS_AHEAD months, so rows normally never
+land in the default partition. If some did (e.g. the job did not run for a
+while), they are moved into the new monthly partition when it is created.
+
+Runs periodically in the API process (see main.py) or from the command line:
+    python -m backend.app.jobs.partitions
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import session_scope
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key column
+PARTITIONED_TABLES = {
+    "reading_events": "occurred_at",
+    "learning_activities": "created_at",
+}
+
+# Arbitrary constant for pg_advisory_xact_lock, so that worker processes do
+# not race to create the same partition.
+_ADVISORY_LOCK_KEY = 7_031_002
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+
+def existing_partitions(db: Session, table: str) -> set:
+    return set(db.scalars(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+    """), {"table": table}))
+
+
+def create_month_partition(db: Session, table: str, month: date) -> str:
+    """Create the partition for `month`, moving matching rows out of the default one."""
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    default = f"{table}_default"
+    bounds = {"lo": f"{month:%Y-%m-%d} 00:00:00+00", "hi": f"{add_months(month, 1):%Y-%m-%d} 00:00:00+00"}
+    create = (f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+              f"FOR VALUES FROM ('{bounds['lo']}') TO ('{bounds['hi']}')")
+
+    stray = db.scalar(text(
+        f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE "{column}" >= :lo AND "{column}" < :hi)'
+    ), bounds)
+    if not stray:
+        db.execute(text(create))
+        return name
+    # The new partition's range must not overlap rows still in the default
+    # partition, so take it out while those rows are moved
+    db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"'))
+    db.execute(text(create))
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM "{default}" WHERE "{column}" >= :lo AND "{column}" < :hi RETURNING *
+        )
+        INSERT INTO "{table}" SELECT * FROM moved
+    """), bounds).rowcount
+    db.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT'))
+    logger.warning("partitions: moved %d rows from %s into %s", moved, default, name)
+    return name
+
+
+def ensure_monthly_partitions(
+    db: Session,
+    table: str,
+    months_ahead: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Create missing partitions up to `months_ahead` months ahead. Returns their names.
+
+    Like the crud functions this does not commit.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    now = now or datetime.now(timezone.utc)
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    existing = existing_partitions(db, table)
+    first = date(now.year, now.month, 1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first, offset)
+        if partition_name(table, month) not in existing:
+            created.append(create_month_partition(db, table, month))
+    return created
+
+
+def maintain_partitions() -> List[str]:
+    """Ensure partitions for every partitioned table, in one committed transaction."""
+    with session_scope() as db:
+        created = [name for table in PARTITIONED_TABLES
+                   for name in ensure_monthly_partitions(db, table)]
+    if created:
+        logger.info("partitions: created %s", ", ".join(created))
+    return created
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    maintain_partitions()
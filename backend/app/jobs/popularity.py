@@ -0,0 +1,106 @@
+"""Recompute Book.popularity_score from recent reading, favorites and reviews.
+
+Every event within POPULARITY_WINDOW_DAYS contributes its weight decayed
+exponentially by age:
+
+    weight * 0.5 ** (age / POPULARITY_HALF_LIFE_DAYS)
+
+Events are user_book_progress.last_read_at, user_favorites.favorited_at and
+reviews.created_at. The per-book sum is scaled by SCORE_SCALE, rounded to the
+integer column, and written back with a single UPDATE ... FROM that skips
+unchanged rows. Books with no recent events decay to 0.
+
+The job runs periodically in the API process (see app/jobs/scheduler.py) or
+from the command line:
+    python -m backend.app.jobs.popularity
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.cache import catalog_cache
+from ..db import session_scope
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_WEIGHT = 1.0
+FAVORITE_WEIGHT = 3.0
+REVIEW_WEIGHT = 2.0
+SCORE_SCALE = 100
+
+# Arbitrary constant for pg_try_advisory_xact_lock, so that only one worker
+# process recomputes at a time.
+_ADVISORY_LOCK_KEY = 7_031_001
+
+_RECOMPUTE_SQL = text("""
+WITH events AS (
+    SELECT book_id, last_read_at AS at, CAST(:progress_weight AS double precision) AS weight
+    FROM user_book_progress WHERE last_read_at >= :window_start
+    UNION ALL
+    SELECT book_id, favorited_at, CAST(:favorite_weight AS double precision)
+    FROM user_favorites WHERE favorited_at >= :window_start
+    UNION ALL
+    SELECT book_id, created_at, CAST(:review_weight AS double precision)
+    FROM reviews WHERE created_at >= :window_start
+),
+decayed AS (
+    SELECT book_id, sum(weight * power(0.5,
+        greatest(0, extract(epoch FROM (:now - at)))::double precision
+        / :half_life_seconds)) AS score
+    FROM events
+    GROUP BY book_id
+),
+scores AS (
+    SELECT b.id AS book_id,
+           CAST(round(coalesce(d.score, 0) * :scale) AS integer) AS score
+    FROM books b
+    LEFT JOIN decayed d ON d.book_id = b.id
+)
+UPDATE books
+SET popularity_score = scores.score
+FROM scores
+WHERE books.id = scores.book_id
+  AND books.popularity_score IS DISTINCT FROM scores.score
+""")
+
+
+def recompute_popularity_scores(db: Session, now: Optional[datetime] = None) -> int:
+    """Rewrite popularity_score for every book. Returns the number of rows changed.
+
+    Returns 0 without doing anything if another transaction is already
+    recomputing. Like the crud functions this does not commit.
+    """
+    locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"),
+                        {"key": _ADVISORY_LOCK_KEY}).scalar()
+    if not locked:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    result = db.execute(_RECOMPUTE_SQL, {
+        "progress_weight": PROGRESS_WEIGHT,
+        "favorite_weight": FAVORITE_WEIGHT,
+        "review_weight": REVIEW_WEIGHT,
+        "scale": SCORE_SCALE,
+        "now": now,
+        "window_start": now - timedelta(days=settings.POPULARITY_WINDOW_DAYS),
+        "half_life_seconds": settings.POPULARITY_HALF_LIFE_DAYS * 86400.0,
+    })
+    return result.rowcount
+
+
+def refresh_popularity() -> int:
+    """Recompute and commit, then invalidate cached catalog listings."""
+    with session_scope() as db:
+        changed = recompute_popularity_scores(db)
+    if changed:
+        catalog_cache.bump_version()
+    logger.info("popularity: updated %d books", changed)
+    return changed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    refresh_popularity()
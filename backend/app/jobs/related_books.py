@@ -0,0 +1,166 @@
+"""Rebuild the precomputed related_books table.
+
+Candidates for a book are the books that share a theme with it or that were
+favorited by the same users. Each candidate is scored by
+
+    THEME_WEIGHT * shared themes
+    + CO_FAVORITE_WEIGHT * ln(1 + users who favorited both)
+    + AGE_WEIGHT * (age ranges overlap)
+
+and the best RELATED_BOOKS_PER_BOOK are stored, so GET /books/{id}/related is
+a single index range scan. Scoring runs as one INSERT ... SELECT in Postgres.
+
+Usage:
+    python -m backend.app.jobs.related_books                  # full rebuild
+    python -m backend.app.jobs.related_books --since 2026-10-01T00:00:00
+    python -m backend.app.jobs.related_books --book-id <uuid> [--book-id ...]
+"""
+import argparse
+import logging
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+RELATED_BOOKS_PER_BOOK = 10
+THEME_WEIGHT = 1.0
+CO_FAVORITE_WEIGHT = 2.0
+AGE_WEIGHT = 0.5
+
+_BOOK_IDS = bindparam("book_ids", type_=ARRAY(UUID(as_uuid=True)))
+
+# {scope} is either empty (all books) or a filter on the source book ids.
+_REBUILD_SQL = """
+WITH theme_overlap AS (
+    SELECT a.book_id, b.book_id AS related_book_id, count(*) AS shared
+    FROM book_themes a
+    JOIN book_themes b ON b.theme_id = a.theme_id AND b.book_id <> a.book_id
+    WHERE TRUE {scope}
+    GROUP BY a.book_id, b.book_id
+),
+co_favorites AS (
+    SELECT a.book_id, b.book_id AS related_book_id, count(*) AS shared
+    FROM user_favorites a
+    JOIN user_favorites b ON b.user_id = a.user_id AND b.book_id <> a.book_id
+    WHERE TRUE {scope}
+    GROUP BY a.book_id, b.book_id
+),
+scored AS (
+    SELECT
+        c.book_id,
+        c.related_book_id,
+        :theme_weight * coalesce(t.shared, 0)
+        + :co_favorite_weight * ln(1 + coalesce(f.shared, 0))
+        + :age_weight * CASE
+            WHEN coalesce(s.age_min, 0) <= coalesce(r.age_max, 2147483647)
+             AND coalesce(r.age_min, 0) <= coalesce(s.age_max, 2147483647)
+            THEN 1 ELSE 0 END AS score
+    FROM (
+        SELECT book_id, related_book_id FROM theme_overlap
+        UNION
+        SELECT book_id, related_book_id FROM co_favorites
+    ) AS c
+    JOIN books s ON s.id = c.book_id
+    JOIN books r ON r.id = c.related_book_id
+    LEFT JOIN theme_overlap t
+        ON t.book_id = c.book_id AND t.related_book_id = c.related_book_id
+    LEFT JOIN co_favorites f
+        ON f.book_id = c.book_id AND f.related_book_id = c.related_book_id
+),
+ranked AS (
+    SELECT book_id, related_book_id, score,
+           row_number() OVER (
+               PARTITION BY book_id ORDER BY score DESC, related_book_id
+           ) AS rank
+    FROM scored
+)
+INSERT INTO related_books (book_id, related_book_id, score, computed_at)
+SELECT book_id, related_book_id, score, now()
+FROM ranked
+WHERE rank <= :per_book
+"""
+
+
+def rebuild_related_books(
+    db: Session,
+    book_ids: Optional[Iterable[uuid.UUID]] = None,
+    per_book: int = RELATED_BOOKS_PER_BOOK,
+) -> int:
+    """Recompute related_books rows for `book_ids`, or for every book if None.
+
+    Returns the number of rows written. Like the crud functions this does not
+    commit.
+    """
+    params = {
+        "theme_weight": THEME_WEIGHT,
+        "co_favorite_weight": CO_FAVORITE_WEIGHT,
+        "age_weight": AGE_WEIGHT,
+        "per_book": per_book,
+    }
+    if book_ids is None:
+        db.execute(text("DELETE FROM related_books"))
+        insert = text(_REBUILD_SQL.format(scope=""))
+    else:
+        params["book_ids"] = sorted(set(book_ids))
+        if not params["book_ids"]:
+            return 0
+        db.execute(
+            text("DELETE FROM related_books WHERE book_id = ANY(:book_ids)").bindparams(_BOOK_IDS),
+            {"book_ids": params["book_ids"]},
+        )
+        insert = text(_REBUILD_SQL.format(
+            scope="AND a.book_id = ANY(:book_ids)")).bindparams(_BOOK_IDS)
+    return db.execute(insert, params).rowcount
+
+
+def changed_book_ids(db: Session, since: datetime) -> Set[uuid.UUID]:
+    """Books whose related rows may be stale after changes since `since`.
+
+    That is books edited or newly favorited since then, plus the books that
+    currently list one of those as related. Removed favorites leave no trace,
+    so a periodic full rebuild is still needed to pick those up.
+    """
+    touched = {
+        row[0] for row in db.execute(text("""
+            SELECT id FROM books WHERE updated_at >= :since OR created_at >= :since
+            UNION
+            SELECT book_id FROM user_favorites WHERE favorited_at >= :since
+        """), {"since": since})
+    }
+    if not touched:
+        return touched
+    neighbours = db.execute(
+        text("SELECT book_id FROM related_books WHERE related_book_id = ANY(:book_ids)")
+        .bindparams(_BOOK_IDS),
+        {"book_ids": sorted(touched)},
+    )
+    return touched | {row[0] for row in neighbours}
+
+
+def main(argv: Optional[list] = None) -> None:
+    from backend.app.db import session_scope
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--since", type=datetime.fromisoformat,
+                       help="only rebuild books affected by changes since this time")
+    group.add_argument("--book-id", type=uuid.UUID, action="append", dest="book_ids",
+                       help="rebuild this book (repeatable)")
+    args = parser.parse_args(argv)
+
+    with session_scope() as db:
+        book_ids = args.book_ids
+        if args.since is not None:
+            book_ids = changed_book_ids(db, args.since)
+        written = rebuild_related_books(db, book_ids)
+    logger.info("related_books: wrote %d rows", written)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
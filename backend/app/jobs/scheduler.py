@@ -0,0 +1,52 @@
+"""Minimal in-process scheduler for periodic jobs.
+
+Each PeriodicTask runs its function on a daemon thread every `interval`
+seconds until stop() is called. Failures are logged and the task keeps its
+schedule. Jobs that must not overlap across worker processes guard themselves
+(e.g. with an advisory lock, see jobs/popularity.py).
+"""
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, func: Callable[[], object]) -> None:
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"periodic-{name}", daemon=True)
+
+    def _run(self) -> None:
+        # Wait first: the API should finish starting before the first run
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+
+_tasks: List[PeriodicTask] = []
+
+
+def schedule(name: str, interval: float, func: Callable[[], object]) -> PeriodicTask:
+    task = PeriodicTask(name, interval, func)
+    _tasks.append(task)
+    task.start()
+    return task
+
+
+def stop_all() -> None:
+    while _tasks:
+        _tasks.pop().stop()
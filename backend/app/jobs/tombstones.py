@@ -0,0 +1,30 @@
+"""Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.
+
+Deleted progress, bookmark and note rows leave a models.SyncTombstone for
+the change feed (crud_sync.get_changes_since). Without pruning they would
+pile up forever; clients that have not synced within the retention period
+get a full resync instead of the deletions they missed.
+
+Runs periodically in the API process (see main.py) or from the command line:
+    python -m backend.app.jobs.tombstones
+"""
+import logging
+
+from ..crud import crud_sync
+from ..db import session_scope
+
+logger = logging.getLogger(__name__)
+
+
+def prune_sync_tombstones() -> int:
+    """Delete expired tombstones in their own transaction."""
+    with session_scope() as db:
+        deleted = crud_sync.delete_expired_tombstones(db)
+    if deleted:
+        logger.info("tombstones: deleted %d expired sync tombstones", deleted)
+    return deleted
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    prune_sync_tombstones()
@@ -1,12 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from .db import get_db, engine, Base  # db.py から import
 from . import models  # Import models to register them with Base
-from .routes import auth, books, themes, reviews, users, favorites, children, progress, history  # Import routers
+from .routes import auth, books, themes, reviews, users, favorites, children, progress, history, metrics, admin, sync  # Import routers
 from .core.config import settings  # Import settings for API_V1_STR
+from .core.pagination import InvalidCursorError, NEXT_CURSOR_HEADER
+from .core.password_pool import PasswordPoolSaturatedError
+from .jobs import scheduler
+from .jobs.popularity import refresh_popularity
+from .core.progress_buffer import flush_progress_buffer
+from .core.reading_events import flush_reading_events
+from .core.events import flush_activity_events
+from .jobs.partitions import maintain_partitions
+from .jobs.archive import archive_old_partitions
+from .jobs.tombstones import prune_sync_tombstones
+from .core.revocation import cleanup_refresh_tokens, reload_revoked_sessions
 
 app = FastAPI(
     title="Story App API",
@@ -21,8 +33,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # すべてのHTTPメソッドを許可
     allow_headers=["*"],  # すべてのヘッダーを許可
+    expose_headers=[NEXT_CURSOR_HEADER],  # カーソルページングのためブラウザに公開
 )
 
+
+@app.exception_handler(InvalidCursorError)
+def invalid_cursor_handler(request: Request, exc: InvalidCursorError) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+
+@app.exception_handler(PasswordPoolSaturatedError)
+def password_pool_saturated_handler(request: Request, exc: PasswordPoolSaturatedError) -> JSONResponse:
+    # ログイン集中時は待たせずに断り、他のリクエストのスレッドを空けておく
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 # Include routers
 app.include_router(
     auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
@@ -50,6 +75,12 @@ app.include_router(
     progress.router, prefix=f"{settings.API_V1_STR}", tags=["Progress"])
 app.include_router(
     history.router, prefix=f"{settings.API_V1_STR}", tags=["History"])
+app.include_router(
+    sync.router, prefix=f"{settings.API_V1_STR}", tags=["Sync"])
+app.include_router(
+    metrics.router, prefix=f"{settings.API_V1_STR}/metrics", tags=["Metrics"])
+app.include_router(
+    admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["Admin"])
 
 
 # ── 開発中だけ: 起動時にテーブル作成しておく ──
@@ -69,6 +100,46 @@ def on_startup() -> None:
     # モデルを自動で作る場合は下記を有効化
     # Base.metadata.create_all(bind=engine) # Managed by Alembic
 
+    # 定期ジョブ（テスト中は起動しない）
+    if not settings.TESTING and settings.POPULARITY_REFRESH_INTERVAL_SECONDS > 0:
+        scheduler.schedule("popularity", settings.POPULARITY_REFRESH_INTERVAL_SECONDS,
+                           refresh_popularity)
+    if not settings.TESTING:
+        # 今月と先の月のパーティションを用意してから受け付ける
+        maintain_partitions()
+        scheduler.schedule("partitions", settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+                           maintain_partitions)
+        scheduler.schedule("reading-events-flush", settings.READING_EVENTS_FLUSH_INTERVAL_SECONDS,
+                           flush_reading_events)
+        scheduler.schedule("activity-flush", settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+                           flush_activity_events)
+        # 失効済みセッションを読み込んでからアクセストークンを受け付ける
+        reload_revoked_sessions()
+        scheduler.schedule("revocation-reload", settings.REVOCATION_RELOAD_INTERVAL_SECONDS,
+                           reload_revoked_sessions)
+        scheduler.schedule("refresh-token-cleanup", settings.REFRESH_TOKEN_CLEANUP_INTERVAL_SECONDS,
+                           cleanup_refresh_tokens)
+        scheduler.schedule("sync-tombstone-cleanup", settings.SYNC_TOMBSTONE_CLEANUP_INTERVAL_SECONDS,
+                           prune_sync_tombstones)
+        if settings.ACTIVITY_ARCHIVE_INTERVAL_SECONDS > 0:
+            scheduler.schedule("activity-archive", settings.ACTIVITY_ARCHIVE_INTERVAL_SECONDS,
+                               archive_old_partitions)
+    if settings.PROGRESS_WRITE_BEHIND:
+        scheduler.schedule("progress-flush", settings.PROGRESS_FLUSH_INTERVAL_SECONDS,
+                           flush_progress_buffer)
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    scheduler.stop_all()
+    # 残っているページ送りを書き出す
+    if settings.PROGRESS_WRITE_BEHIND:
+        flush_progress_buffer()
+    if not settings.TESTING:
+        # 未書き込みの閲覧イベントと学習履歴も書き出す
+        flush_reading_events()
+        flush_activity_events()
+
 
 # ───────────────────────────
 # Existing endpoints below can be removed or commented out if no longer needed.
@@ -2,8 +2,8 @@ import uuid
 import enum
 from datetime import datetime, date
 
-from sqlalchemy import func, TIMESTAMP, TEXT, String, Integer, Date as SQLDate, ForeignKey, Boolean, Enum as SQLAlchemyEnum
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy import func, text, event, DDL, Computed, TIMESTAMP, TEXT, String, Integer, BigInteger, Date as SQLDate, ForeignKey, Boolean, Enum as SQLAlchemyEnum, Index, Float, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base  # Import Base from db.py
@@ -31,6 +31,14 @@ class ActivityTypeEnum(str, enum.Enum):
     BADGE_EARNED = "badge_earned"
     NOTE_TAKEN = "note_taken"
     DISCUSSION_POSTED = "discussion_posted"
+    REVIEW_POSTED = "review_posted"
+    BOOK_FAVORITED = "book_favorited"
+
+
+class SyncEntityEnum(str, enum.Enum):
+    PROGRESS = "progress"
+    BOOKMARK = "bookmark"
+    NOTE = "note"
 
 
 class User(Base):
@@ -108,6 +116,10 @@ class Theme(Base):
         ThemeCategoryEnum, name="theme_category_enum"), nullable=False)
     cover_image_url: Mapped[str | None] = mapped_column(TEXT)
     question_prompt: Mapped[str | None] = mapped_column(TEXT)
+    # Number of linked books. Maintained by crud_book in the same transaction
+    # as the book_themes rows, so listing themes never counts links.
+    book_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
@@ -122,9 +134,16 @@ class Theme(Base):
 
 class Book(Base):
     __tablename__ = 'books'
+    __table_args__ = (
+        # Keyset pagination indexes: (sort column, id)
+        Index("ix_books_popularity_score_id", "popularity_score", "id"),
+        Index("ix_books_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Natural key of books loaded by the catalog import; NULL for books created through the API
+    external_id: Mapped[str | None] = mapped_column(String(255), unique=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     author_name: Mapped[str | None] = mapped_column(String(255))
     cover_url: Mapped[str | None] = mapped_column(TEXT)
@@ -181,6 +200,9 @@ class BookTheme(Base):
 
 class BookPage(Base):
     __tablename__ = 'book_pages'
+    __table_args__ = (
+        UniqueConstraint("book_id", "page_number", name="uq_book_pages_book_id_page_number"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -200,6 +222,10 @@ class BookPage(Base):
 
 class BookTocItem(Base):
     __tablename__ = 'book_toc_items'
+    __table_args__ = (
+        UniqueConstraint("book_id", "page_number", "title",
+                         name="uq_book_toc_items_book_id_page_number_title"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -217,6 +243,11 @@ class BookTocItem(Base):
 
 class Review(Base):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        Index("ix_reviews_book_id_created_at_id", "book_id", "created_at", "id"),
+        # Recency window scans of the popularity job
+        Index("ix_reviews_created_at", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -239,8 +270,40 @@ class Review(Base):
         return f"<Review(id={self.id!r}, book_id={self.book_id!r}, user_id={self.user_id!r}, rating={self.rating!r})>"
 
 
+class BookRatingStats(Base):
+    """Per-book review aggregates, kept current by crud_review."""
+    __tablename__ = 'book_rating_stats'
+
+    book_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(
+        'books.id', ondelete="CASCADE"), primary_key=True)
+    review_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    rating_sum: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    # Histogram: number of reviews with each rating
+    rating_1: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    rating_2: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    rating_3: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    rating_4: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    rating_5: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<BookRatingStats(book_id={self.book_id!r}, review_count={self.review_count!r})>"
+
+
 class UserFavorite(Base):
     __tablename__ = 'user_favorites'
+    __table_args__ = (
+        Index("ix_user_favorites_user_id_favorited_at_book_id",
+              "user_id", "favorited_at", "book_id"),
+        # Recency window scans of the popularity job
+        Index("ix_user_favorites_favorited_at", "favorited_at"),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(
         'users.id', ondelete="CASCADE"), primary_key=True)
@@ -258,8 +321,52 @@ class UserFavorite(Base):
         return f"<UserFavorite(user_id={self.user_id!r}, book_id={self.book_id!r})>"
 
 
+class RelatedBook(Base):
+    """Precomputed "similar books" rows, rebuilt by app/jobs/related_books.py."""
+    __tablename__ = 'related_books'
+    __table_args__ = (
+        # The detail page reads the top-N rows of one book in score order
+        Index("ix_related_books_book_id_score", "book_id", "score"),
+    )
+
+    book_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(
+        'books.id', ondelete="CASCADE"), primary_key=True)
+    related_book_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(
+        'books.id', ondelete="CASCADE"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now())
+
+    related_book: Mapped["Book"] = relationship(
+        "Book", foreign_keys=[related_book_id])
+
+    def __repr__(self) -> str:
+        return f"<RelatedBook(book_id={self.book_id!r}, related_book_id={self.related_book_id!r}, score={self.score!r})>"
+
+
+# One progress row per (user, child, book). child_id is NULL for the user's
+# own reading, so it is folded to the nil UUID to make NULLs compare equal.
+# ON CONFLICT clauses must name the same expression (see crud_progress).
+PROGRESS_CHILD_KEY = "coalesce(child_id, '00000000-0000-0000-0000-000000000000'::uuid)"
+
+# Id of the transaction that last wrote a row, for the change feed of
+# GET /users/me/sync (see crud_sync.get_changes_since). Crud functions that
+# write with bulk statements set it explicitly.
+SYNC_VERSION = text("pg_current_xact_id()::text::bigint")
+
+
 class UserBookProgress(Base):
     __tablename__ = 'user_book_progress'
+    __table_args__ = (
+        # Recency window scans of the popularity job
+        Index("ix_user_book_progress_last_read_at", "last_read_at"),
+        # Reading shelf: a user's rows, most recently read first
+        Index("ix_user_book_progress_user_id_last_read_at_id",
+              "user_id", text("last_read_at DESC"), text("id DESC")),
+        Index("uq_user_book_progress_user_id_book_id_child_id",
+              "user_id", "book_id", text(PROGRESS_CHILD_KEY), unique=True),
+        Index("ix_user_book_progress_user_id_sync_version", "user_id", "sync_version"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -273,6 +380,8 @@ class UserBookProgress(Base):
     last_read_at: Mapped[datetime] = mapped_column(TIMESTAMP(
         # onupdate for last_read_at
         timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=SYNC_VERSION, onupdate=SYNC_VERSION)
 
     user: Mapped["User"] = relationship(
         "User", back_populates="user_book_progress")
@@ -292,6 +401,9 @@ class UserBookProgress(Base):
 
 class UserBookBookmark(Base):
     __tablename__ = 'user_book_bookmarks'
+    __table_args__ = (
+        Index("ix_user_book_bookmarks_progress_id_sync_version", "progress_id", "sync_version"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -300,6 +412,8 @@ class UserBookBookmark(Base):
     page_number: Mapped[int] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now())
+    sync_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=SYNC_VERSION, onupdate=SYNC_VERSION)
 
     progress: Mapped["UserBookProgress"] = relationship(
         "UserBookProgress", back_populates="bookmarks")
@@ -308,8 +422,23 @@ class UserBookBookmark(Base):
         return f"<UserBookBookmark(id={self.id!r}, progress_id={self.progress_id!r}, page_number={self.page_number!r})>"
 
 
+NOTE_SEARCH_CONFIG = "simple"
+# Kana, CJK ideographs and halfwidth katakana: scripts written without spaces
+# between words, which the text search parser would keep as one long token.
+# Each such character is indexed as a word of its own instead (a regex
+# character class, valid in both Python and Postgres).
+NOTE_SEARCH_UNSEGMENTED = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f"
+NOTE_SEARCH_SEPARATOR = "\x01"  # Put around those characters; never shown
+NOTE_SEARCH_TEXT = f"regexp_replace(text, '([{NOTE_SEARCH_UNSEGMENTED}])', chr(1) || '\\1' || chr(1), 'g')"
+
+
 class UserBookNote(Base):
     __tablename__ = 'user_book_notes'
+    __table_args__ = (
+        Index("ix_user_book_notes_progress_id_created_at", "progress_id", "created_at"),
+        Index("ix_user_book_notes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_user_book_notes_progress_id_sync_version", "progress_id", "sync_version"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -321,6 +450,15 @@ class UserBookNote(Base):
         TIMESTAMP(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=SYNC_VERSION, onupdate=SYNC_VERSION)
+    # Maintained by Postgres. 'simple' does no stemming or stop words, so
+    # notes in any language match their own words. Japanese and Chinese are
+    # indexed per character and searched as phrases of adjacent characters
+    # (see crud_progress.search_notes).
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(f"to_tsvector('{NOTE_SEARCH_CONFIG}', {NOTE_SEARCH_TEXT})", persisted=True),
+        deferred=True)
 
     progress: Mapped["UserBookProgress"] = relationship(
         "UserBookProgress", back_populates="notes")
@@ -329,8 +467,84 @@ class UserBookNote(Base):
         return f"<UserBookNote(id={self.id!r}, progress_id={self.progress_id!r}, page_number={self.page_number!r})>"
 
 
+class SyncTombstone(Base):
+    """A deleted progress, bookmark or note row, for the change feed.
+
+    Written by the crud functions that delete those rows. child_id and
+    book_id have no foreign keys: the tombstone must outlive them.
+    """
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_id_sync_version", "user_id", "sync_version"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    child_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    book_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    entity_type: Mapped[SyncEntityEnum] = mapped_column(
+        SQLAlchemyEnum(SyncEntityEnum, name="sync_entity_enum"), nullable=False)
+    entity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now())
+    sync_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=SYNC_VERSION)
+
+    def __repr__(self) -> str:
+        return f"<SyncTombstone(entity_type={self.entity_type!r}, entity_id={self.entity_id!r})>"
+
+
+class ReadingEvent(Base):
+    """Append-only page-view log, range-partitioned by month on occurred_at.
+
+    Monthly partitions are created ahead of time by jobs/partitions.py; the
+    default partition only catches rows outside them. The partition key has
+    to be part of the primary key.
+    """
+    __tablename__ = 'reading_events'
+    __table_args__ = (
+        Index("ix_reading_events_user_id_occurred_at", "user_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    occurred_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    child_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey('children.id', ondelete="CASCADE"))
+    book_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('books.id', ondelete="CASCADE"), nullable=False)
+    page_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    dwell_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    received_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<ReadingEvent(id={self.id!r}, user_id={self.user_id!r}, book_id={self.book_id!r})>"
+
+
+# A partitioned table without partitions rejects every insert
+event.listen(ReadingEvent.__table__, "after_create", DDL(
+    "CREATE TABLE reading_events_default PARTITION OF reading_events DEFAULT"))
+
+
 class LearningActivity(Base):
+    """Range-partitioned by month on created_at, like reading_events.
+
+    Partitions older than ACTIVITY_RETENTION_MONTHS are moved to compressed
+    files by jobs/archive.py; the daily rollup keeps their counts.
+    """
     __tablename__ = 'learning_activities'
+    __table_args__ = (
+        Index("ix_learning_activities_user_id_created_at_id",
+              "user_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -344,8 +558,9 @@ class LearningActivity(Base):
     related_entity_id: Mapped[uuid.UUID |
                               None] = mapped_column(UUID(as_uuid=True))
     related_link: Mapped[str | None] = mapped_column(TEXT)
+    # Partition key, hence part of the primary key
     created_at: Mapped[datetime] = mapped_column(
-        TIMESTAMP(timezone=True), server_default=func.now())
+        TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
 
     user: Mapped["User"] = relationship(
         "User", back_populates="learning_activities")
@@ -356,6 +571,38 @@ class LearningActivity(Base):
         return f"<LearningActivity(id={self.id!r}, user_id={self.user_id!r}, type={self.activity_type!r})>"
 
 
+event.listen(LearningActivity.__table__, "after_create", DDL(
+    "CREATE TABLE learning_activities_default PARTITION OF learning_activities DEFAULT"))
+
+
+class LearningActivityDailyCount(Base):
+    """Number of learning activities per (user, child, type) and UTC day.
+
+    Maintained by crud_history whenever activities are inserted, so that
+    dashboards read these rollups instead of the raw history.
+    """
+    __tablename__ = 'learning_activity_daily_counts'
+    __table_args__ = (
+        # Same NULL-folding child key as user_book_progress
+        Index("uq_learning_activity_daily_counts_key",
+              "user_id", text(PROGRESS_CHILD_KEY), "activity_type", "day", unique=True),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    child_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey('children.id', ondelete="CASCADE"))
+    activity_type: Mapped[ActivityTypeEnum] = mapped_column(
+        SQLAlchemyEnum(ActivityTypeEnum, name="activity_type_enum"), nullable=False)
+    day: Mapped[date] = mapped_column(SQLDate, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<LearningActivityDailyCount(user_id={self.user_id!r}, day={self.day!r}, count={self.count!r})>"
+
+
 class UserSettings(Base):
     __tablename__ = 'user_settings'
 
@@ -375,3 +622,55 @@ class UserSettings(Base):
 
     def __repr__(self) -> str:
         return f"<UserSettings(user_id={self.user_id!r})>"
+
+
+class RefreshToken(Base):
+    """A refresh token, stored as its SHA-256 hash.
+
+    Tokens are single use: each refresh marks the token used and issues the
+    next one in the same family, one family per login session. Presenting a
+    used token again revokes the whole family (see crud_refresh_token).
+    """
+    __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    # Also the `sid` claim of the family's access tokens
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    used_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    revoked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken(id={self.id!r}, user_id={self.user_id!r}, family_id={self.family_id!r})>"
+
+
+class RevokedSession(Base):
+    """A logged-out or compromised session (refresh-token family).
+
+    Access tokens carry the session id as `sid`; API processes keep the
+    recently revoked ids in memory (core/revocation.py) and reload them from
+    this table incrementally by revoked_at.
+    """
+    __tablename__ = 'revoked_sessions'
+    __table_args__ = (
+        Index("ix_revoked_sessions_revoked_at", "revoked_at"),
+    )
+
+    sid: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<RevokedSession(sid={self.sid!r}, revoked_at={self.revoked_at!r})>"
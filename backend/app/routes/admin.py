@@ -0,0 +1,37 @@
+import codecs
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.orm import Session
+
+from backend.app import schemas, models
+from backend.app.core.cache import catalog_cache
+from backend.app.core.security import get_current_admin_user
+from backend.app.db import get_db
+from backend.app.jobs.catalog_import import CSV_KINDS, import_catalog
+
+router = APIRouter()
+
+
+@router.post("/catalog/import", response_model=schemas.CatalogImportResult)
+def import_catalog_file(
+    file: UploadFile = File(...),
+    format: Literal["jsonl", "csv"] = Query("jsonl"),
+    kind: str = Query("books", description="What a CSV file contains: " + ", ".join(CSV_KINDS)),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> schemas.CatalogImportResult:
+    """Bulk-import books, pages, TOC items and theme links.
+
+    The upload is streamed and written in chunks, all in one transaction.
+    Invalid records are skipped and listed in `errors`. For very large
+    catalogs prefer the CLI (python -m backend.app.jobs.catalog_import),
+    which commits per chunk.
+    """
+    if kind not in CSV_KINDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown kind: {kind}")
+    lines = codecs.iterdecode(file.file, "utf-8")
+    result = import_catalog(db, lines, format=format, kind=kind)
+    db.commit()
+    catalog_cache.bump_version()
+    return result
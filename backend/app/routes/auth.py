@@ -1,15 +1,18 @@
+import uuid
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from backend.app import schemas, models
-from backend.app.crud import crud_user
+from backend.app.crud import crud_refresh_token, crud_user
+from backend.app.core.revocation import revoked_sessions
 from backend.app.core.security import (
     create_access_token,
-    get_password_hash,
-    verify_password,
-    get_current_user,
+    get_current_principal,
 )
+from backend.app.core.tokens import key_set
 from backend.app.db import get_db
 # For token expiration, if needed directly
 from backend.app.core.config import settings
@@ -17,6 +20,21 @@ from backend.app.core.config import settings
 router = APIRouter(tags=["auth"])
 
 
+def _issue_tokens(db: Session, user: models.User, family_id: Optional[uuid.UUID] = None) -> dict:
+    """An access token and the next refresh token of the session `family_id`
+    (a new session if None)."""
+    refresh_token, db_token = crud_refresh_token.create_refresh_token(db, user_id=user.id, family_id=family_id)
+    access_token = create_access_token(
+        data={"sub": user.email, "user_id": str(user.id), "sid": str(db_token.family_id)}
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "user": schemas.UserRead.model_validate(user),
+    }
+
+
 @router.post("/register", response_model=schemas.Token)
 def register_user(
     user_in: schemas.UserCreate,
@@ -32,7 +50,6 @@ def register_user(
             detail="Email already registered",
         )
 
-    hashed_password = get_password_hash(user_in.password)
     # Create a new UserCreateWithHashedPassword object or similar if your CRUD expects it
     # For now, assuming crud_user.create_user can take UserCreate and handle hashing,
     # or we pass the hashed password directly if the Pydantic model is flexible or
@@ -80,15 +97,7 @@ def register_user(
 
     # This assumes create_user hashes the password from user_in.password
     new_user = crud_user.create_user(db=db, user=user_in)
-
-    access_token = create_access_token(
-        data={"sub": new_user.email, "user_id": str(new_user.id)}
-    )
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": schemas.UserRead.model_validate(new_user)
-    }
+    return _issue_tokens(db, new_user)
 
 
 @router.post("/login", response_model=schemas.Token)
@@ -99,21 +108,14 @@ def login_for_access_token(
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = crud_user.authenticate(db, email=form_data.username, password=form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(
-        data={"sub": user.email, "user_id": str(user.id)}
-    )
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": schemas.UserRead.model_validate(user)
-    }
+    return _issue_tokens(db, user)  # Also keeps a hash upgraded by authenticate()
 
 
 @router.post("/request-password-reset", response_model=schemas.Msg)
@@ -177,14 +179,49 @@ def reset_password(
 
 @router.post("/refresh", response_model=schemas.Token)
 def refresh_access_token(
-    current_user: models.User = Depends(get_current_user),
+    refresh_in: schemas.RefreshTokenRequest,
+    db: Session = Depends(get_db),
 ) -> schemas.Token:
-    """Issue a new access token for the current user."""
-    access_token = create_access_token(
-        data={"sub": current_user.email, "user_id": str(current_user.id)}
-    )
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": schemas.UserRead.model_validate(current_user),
-    }
+    """Exchange a refresh token for a new access token and refresh token.
+
+    Each refresh token works once. Reusing one revokes its whole session,
+    since either the client or an attacker holds a stolen copy.
+    """
+    used, revoked_sid = crud_refresh_token.use_refresh_token(db, refresh_in.refresh_token)
+    user = crud_user.get_user(db, user_id=used.user_id) if used else None
+    if user is None:
+        if revoked_sid is not None:
+            # Keep the revocation despite the error response
+            db.commit()
+            revoked_sessions.add(revoked_sid)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return _issue_tokens(db, user, family_id=used.family_id)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    db: Session = Depends(get_db),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> None:
+    """End the session of the current access token.
+
+    Its refresh tokens stop working at once, and its access tokens as soon as
+    each API process has reloaded the revocations.
+    """
+    if principal.sid is not None:
+        crud_refresh_token.revoke_session(db, principal.sid, principal.user_id)
+        db.commit()
+        revoked_sessions.add(principal.sid)
+
+
+@router.get("/jwks.json")
+def get_jwks() -> dict:
+    """Public keys that verify our access tokens, for other services.
+
+    Empty with HS256, whose key is the shared secret.
+    """
+    return key_set.jwks()
@@ -1,36 +1,165 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+import math
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from backend.app import schemas
-from backend.app.crud import crud_book
-from backend.app.core.security import get_current_user
+from backend.app.crud import crud_book, crud_progress, crud_review
+from backend.app.core.security import get_current_user, get_current_user_optional
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
+from backend.app.core.cache import catalog_cache, cached_json_response
 from backend.app import models
-from backend.app.db import get_db
+from backend.app.core.config import settings
+from backend.app.db import get_db, get_session_factory
 
 router = APIRouter()
 
+_BOOK_LIST = TypeAdapter(list[schemas.BookRead])
+_BOOK = TypeAdapter(schemas.BookRead)
+
+_DETAIL_REVIEWS_LIMIT = 5
+# Runs the heavy queries of GET /{book_id}/detail side by side, for all
+# requests. Each task holds its own pooled connection, so this is sized from
+# the engine's pool.
+_detail_executor = ThreadPoolExecutor(
+    max_workers=settings.BOOK_DETAIL_WORKERS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    thread_name_prefix="book-detail",
+)
+
+
 @router.get("/", response_model=list[schemas.BookRead])
 def list_books(
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
     theme_id: Optional[uuid.UUID] = Query(None),
+    cursor: Optional[str] = Query(None),
 ) -> list[schemas.BookRead]:
-    """Retrieve books with optional filtering."""
-    books = crud_book.get_books(db, skip=skip, limit=limit, theme_id=theme_id)
-    return books
+    """Retrieve books with optional filtering.
+
+    Pass the X-Next-Cursor response header back as `cursor` to page with a
+    keyset instead of an offset. Served from the catalog cache.
+    """
+    def load():
+        books = crud_book.get_books(db, skip=skip, limit=limit, theme_id=theme_id, cursor=cursor)
+        headers = {}
+        if len(books) == limit:
+            headers[NEXT_CURSOR_HEADER] = crud_book.encode_book_cursor(books[-1])
+        return books, headers
+
+    return cached_json_response(
+        catalog_cache, ("books", skip, limit, theme_id, cursor), _BOOK_LIST, load)
+
+
+@router.get("/search", response_model=schemas.PaginatedResponse[schemas.BookRead])
+def search_books(
+    db: Session = Depends(get_db),
+    q: Optional[str] = Query(None, max_length=255),
+    theme_id: Optional[uuid.UUID] = Query(None),
+    age_min: Optional[int] = Query(None, ge=0),
+    age_max: Optional[int] = Query(None, ge=0),
+    book_type: schemas.BookTypeFilterEnum = Query(schemas.BookTypeFilterEnum.ALL),
+    sort_by: schemas.BookSortEnum = Query(schemas.BookSortEnum.RECOMMENDED),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+) -> schemas.PaginatedResponse[schemas.BookRead]:
+    """Search the catalog with filtering, sorting and pagination done in SQL."""
+    filters = dict(q=q, theme_id=theme_id, age_min=age_min, age_max=age_max, book_type=book_type)
+    total = crud_book.count_books(db, **filters)
+    books = crud_book.get_books(
+        db, skip=(page - 1) * limit, limit=limit, sort_by=sort_by, **filters
+    )
+    return {
+        "items": books,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "pages": math.ceil(total / limit),
+    }
 
 
 @router.get("/{book_id}", response_model=schemas.BookRead)
 def get_book(book_id: uuid.UUID, db: Session = Depends(get_db)) -> schemas.BookRead:
-    """Retrieve a single book by ID."""
-    book = crud_book.get_book(db, book_id=book_id)
-    if not book:
+    """Retrieve a single book by ID. Served from the catalog cache."""
+    def load():
+        book = crud_book.get_book(db, book_id=book_id, profile="list")
+        if not book:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+        return book, {}
+
+    return cached_json_response(catalog_cache, ("book", book_id), _BOOK, load)
+
+
+@router.get("/{book_id}/detail", response_model=schemas.BookDetailPageRead)
+def get_book_detail(
+    book_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+    current_user: Optional[models.User] = Depends(get_current_user_optional),
+) -> schemas.BookDetailPageRead:
+    """Book with pages, TOC and review summary, the first review page and the
+    caller's progress, in one round trip.
+
+    The book and review loads run concurrently, each in its own session, and
+    are serialized before the session closes. The summary and progress are
+    point lookups, done meanwhile on the request's session.
+    """
+    def load_book():
+        with session_factory() as db:
+            book = crud_book.get_book(db, book_id=book_id, profile="detail")
+            if book is None:
+                return None
+            return schemas.BookDetailRead.model_validate(book).model_copy(update={
+                "themes": [schemas.ThemeRead.model_validate(link.theme) for link in book.book_themes],
+                "pages": [schemas.BookPageRead.model_validate(p) for p in book.book_pages],
+                "toc": [schemas.BookTocItemRead.model_validate(t) for t in book.book_toc_items],
+            })
+
+    def load_reviews():
+        with session_factory() as db:
+            reviews = crud_review.get_reviews_by_book(db, book_id=book_id, limit=_DETAIL_REVIEWS_LIMIT)
+            next_cursor = None
+            if len(reviews) == _DETAIL_REVIEWS_LIMIT:
+                next_cursor = crud_review.encode_review_cursor(reviews[-1])
+            return [schemas.ReviewRead.model_validate(r) for r in reviews], next_cursor
+
+    book_f, reviews_f = (_detail_executor.submit(load) for load in (load_book, load_reviews))
+    summary = crud_review.get_review_summary_by_book(db, book_id=book_id)
+    progress = None
+    if current_user is not None:
+        progress = crud_progress.get_progress(db, user_id=current_user.id, book_id=book_id)
+    book = book_f.result()
+    if book is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    return book
+    reviews, next_cursor = reviews_f.result()
+    return schemas.BookDetailPageRead(
+        book=book.model_copy(update={"reviews_summary": summary}),
+        reviews=reviews,
+        reviews_next_cursor=next_cursor,
+        progress=schemas.UserBookProgressRead.model_validate(progress) if progress else None,
+    )
+
+
+@router.get("/{book_id}/related", response_model=list[schemas.BookRead])
+def get_related_books(
+    book_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    limit: int = Query(3, ge=1, le=10),
+) -> list[schemas.BookRead]:
+    """Similar books, read from the precomputed related_books table.
+
+    The table is rebuilt by app/jobs/related_books.py; books it has not
+    scored yet simply return an empty list. Served from the catalog cache.
+    """
+    def load():
+        return crud_book.get_related_books(db, book_id=book_id, limit=limit), {}
+
+    return cached_json_response(
+        catalog_cache, ("related", book_id, limit), _BOOK_LIST, load)
 
 
 @router.get("/{book_id}/pages", response_model=list[schemas.BookPageRead])
@@ -53,6 +182,7 @@ def create_book(
 ) -> schemas.BookRead:
     new_book = crud_book.create_book(db, book_in)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(new_book)
     return new_book
 
@@ -64,11 +194,12 @@ def update_book(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.BookRead:
-    db_book = crud_book.get_book(db, book_id=book_id)
+    db_book = crud_book.get_book(db, book_id=book_id, profile="list")
     if not db_book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
     updated = crud_book.update_book(db, db_book=db_book, book_in=book_in)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(updated)
     return updated
 
@@ -79,11 +210,12 @@ def delete_book(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> Response:
-    db_book = crud_book.get_book(db, book_id=book_id)
+    db_book = crud_book.get_book(db, book_id=book_id, profile="exists")
     if not db_book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
     crud_book.delete_book(db, db_book=db_book)
     db.commit()
+    catalog_cache.bump_version()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -94,8 +226,11 @@ def create_book_page(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.BookPageRead:
+    if crud_book.get_book_page_by_number(db, book_id=page_in.book_id, page_number=page_in.page_number):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Page number already exists")
     page = crud_book.create_book_page(db, page=page_in, book_id=book_id)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(page)
     return page
 
@@ -111,8 +246,12 @@ def update_book_page(
     db_page = crud_book.get_book_page(db, page_id=page_id, book_id=book_id)
     if not db_page:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
+    if page_in.page_number is not None and page_in.page_number != db_page.page_number and \
+            crud_book.get_book_page_by_number(db, book_id=book_id, page_number=page_in.page_number):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Page number already exists")
     updated = crud_book.update_book_page(db, db_page=db_page, page_in=page_in)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(updated)
     return updated
 
@@ -129,6 +268,7 @@ def delete_book_page(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
     crud_book.delete_book_page(db, db_page=db_page)
     db.commit()
+    catalog_cache.bump_version()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -139,8 +279,12 @@ def create_toc_item(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.BookTocItemRead:
+    if crud_book.get_book_toc_item_by_key(
+            db, book_id=toc_in.book_id, page_number=toc_in.page_number, title=toc_in.title):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="TOC item already exists")
     toc = crud_book.create_book_toc_item(db, toc_item=toc_in, book_id=book_id)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(toc)
     return toc
 
@@ -156,8 +300,14 @@ def update_toc_item(
     db_item = crud_book.get_book_toc_item(db, toc_item_id=toc_id, book_id=book_id)
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="TOC item not found")
+    page_number = toc_in.page_number if toc_in.page_number is not None else db_item.page_number
+    title = toc_in.title if toc_in.title is not None else db_item.title
+    existing = crud_book.get_book_toc_item_by_key(db, book_id=book_id, page_number=page_number, title=title)
+    if existing is not None and existing.id != db_item.id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="TOC item already exists")
     updated = crud_book.update_book_toc_item(db, db_toc_item=db_item, toc_item_in=toc_in)
     db.commit()
+    catalog_cache.bump_version()
     db.refresh(updated)
     return updated
 
@@ -174,4 +324,5 @@ def delete_toc_item(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="TOC item not found")
     crud_book.delete_book_toc_item(db, db_toc_item=db_item)
     db.commit()
+    catalog_cache.bump_version()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
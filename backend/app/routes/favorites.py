@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi import Response
 import uuid
+from typing import Optional
 
 from backend.app import schemas, models
 from backend.app.crud import crud_favorite, crud_book
 from backend.app.core.security import get_current_user
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
 from backend.app.db import get_db
 
 router = APIRouter()
@@ -13,15 +15,20 @@ router = APIRouter()
 
 @router.get("/users/me/favorites", response_model=list[schemas.BookRead])
 def list_favorites(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> list[schemas.BookRead]:
-    books = crud_favorite.get_user_favorites(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    rows = crud_favorite.get_user_favorite_rows(
+        db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
     )
-    return books
+    if len(rows) == limit:
+        last_book, favorited_at = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = crud_favorite.encode_favorite_cursor(favorited_at, last_book.id)
+    return [book for book, _ in rows]
 
 
 @router.post("/users/me/favorites/{book_id}", response_model=schemas.Msg)
@@ -30,7 +37,7 @@ def add_favorite(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.Msg:
-    db_book = crud_book.get_book(db, book_id=book_id)
+    db_book = crud_book.get_book(db, book_id=book_id, profile="exists")
     if not db_book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
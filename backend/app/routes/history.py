@@ -1,24 +1,89 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from sqlalchemy.orm import Session
 import uuid
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 
 from backend.app import schemas, models
-from backend.app.core.security import get_current_user
+from backend.app.core.security import get_current_principal
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
 from backend.app.crud import crud_history
 from backend.app.db import get_db
+from backend.app.jobs import archive
 
 router = APIRouter()
 
 
 @router.get("/users/me/learning-history", response_model=list[schemas.LearningActivityRead])
 def get_learning_history(
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    principal: schemas.TokenData = Depends(get_current_principal),
     child_id: Optional[uuid.UUID] = Query(None),
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
 ) -> list[schemas.LearningActivityRead]:
-    return crud_history.get_learning_activities_by_user(
-        db, user_id=current_user.id, child_id=child_id, skip=skip, limit=limit
+    activities = crud_history.get_learning_activities_by_user(
+        db, user_id=principal.user_id, child_id=child_id, skip=skip, limit=limit, cursor=cursor
     )
+    if len(activities) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud_history.encode_activity_cursor(activities[-1])
+    return activities
+
+
+# Default window of the summary per granularity
+_SUMMARY_DEFAULT_DAYS = {
+    schemas.HistoryGranularityEnum.DAY: 30,
+    schemas.HistoryGranularityEnum.WEEK: 12 * 7,
+    schemas.HistoryGranularityEnum.MONTH: 365,
+}
+
+
+@router.get("/users/me/learning-history/summary", response_model=list[schemas.LearningActivitySummaryRow])
+def get_learning_history_summary(
+    granularity: schemas.HistoryGranularityEnum = schemas.HistoryGranularityEnum.DAY,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    child_id: Optional[uuid.UUID] = Query(None),
+    activity_type: Optional[models.ActivityTypeEnum] = Query(None),
+    db: Session = Depends(get_db),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> list[schemas.LearningActivitySummaryRow]:
+    """Activity counts per day, week or month, child and activity type (UTC days).
+
+    Without `since`, covers the last 30 days, 12 weeks or 12 months.
+    """
+    if since is None:
+        today = datetime.now(timezone.utc).date()
+        since = today - timedelta(days=_SUMMARY_DEFAULT_DAYS[granularity])
+    return crud_history.get_learning_activity_summary(
+        db, user_id=principal.user_id, granularity=granularity, since=since, until=until,
+        child_id=child_id, activity_type=activity_type)
+
+
+@router.get("/users/me/learning-history/archive", response_model=list[str])
+def list_archived_history_months(
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> list[str]:
+    """Months ("YYYY-MM") whose history has been moved out of the database."""
+    return [f"{month:%Y-%m}" for month in archive.archived_months()]
+
+
+@router.get("/users/me/learning-history/archive/{month}", response_model=list[schemas.LearningActivityRead])
+def get_archived_learning_history(
+    month: str = Path(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    child_id: Optional[uuid.UUID] = Query(None),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> list[schemas.LearningActivityRead]:
+    """The user's activities of an archived month, newest first.
+
+    Read from the user's archive file on each request, so slower than the
+    live history; the summary endpoint still covers these months.
+    """
+    year, month_number = map(int, month.split("-"))
+    activities = archive.read_archived_activities(
+        date(year, month_number, 1), user_id=principal.user_id, child_id=child_id)
+    if activities is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Month not archived")
+    return activities
@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+
+from backend.app.core.cache import all_cache_stats
+from backend.app.core.events import activity_bus
+from backend.app.core.password_pool import password_pool
+from backend.app.core.progress_buffer import progress_buffer
+from backend.app.core.reading_events import reading_event_buffer
+from backend.app.core.revocation import revoked_sessions
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def cache_metrics() -> dict:
+    """Hit/miss/eviction counters of the in-process caches, for sizing them."""
+    return all_cache_stats()
+
+
+@router.get("/progress-buffer")
+def progress_buffer_metrics() -> dict:
+    """Pending and written page turns of the write-behind buffer."""
+    return progress_buffer.stats()
+
+
+@router.get("/reading-events")
+def reading_event_metrics() -> dict:
+    """Pending, written and dropped events of the reading-event buffer."""
+    return reading_event_buffer.stats()
+
+
+@router.get("/activity-bus")
+def activity_bus_metrics() -> dict:
+    """Pending, written and dropped learning-activity events."""
+    return activity_bus.stats()
+
+
+@router.get("/password-hashing")
+def password_hashing_metrics() -> dict:
+    """Queue depth, rejections and latency of the password hashing pool."""
+    return password_pool.stats()
+
+
+@router.get("/revocations")
+def revocation_metrics() -> dict:
+    """Size and reload progress of the in-memory revoked-session set."""
+    return revoked_sessions.stats()
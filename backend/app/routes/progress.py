@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session
 import uuid
+from datetime import datetime, timezone
 from typing import Optional
 
 from backend.app import schemas, models
-from backend.app.core.security import get_current_user
-from backend.app.crud import crud_progress
+from backend.app.core.config import settings
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
+from backend.app.core.progress_buffer import PageTurn, progress_buffer, write_page_turns
+from backend.app.core.reading_events import reading_event_buffer
+from backend.app.core.security import get_current_principal, get_current_user
+from backend.app.crud import crud_book, crud_progress, crud_reading_event
 from backend.app.db import get_db
 
 router = APIRouter()
@@ -20,9 +25,83 @@ def read_progress(
     progress = crud_progress.get_or_create_progress(db, user_id=current_user.id, book_id=book_id)
     db.commit()
     db.refresh(progress)
+    # Page turns still waiting in the write-behind buffer are newer
+    turn = progress_buffer.pending((current_user.id, None, book_id))
+    if turn is not None and turn.at >= progress.last_read_at:
+        return schemas.UserBookProgressRead.model_validate(progress).model_copy(
+            update={"current_page": turn.current_page, "last_read_at": turn.at})
     return progress
 
 
+@router.get("/users/me/reading-shelf", response_model=list[schemas.ReadingShelfItem])
+def read_reading_shelf(
+    response: Response,
+    child_id: Optional[uuid.UUID] = Query(None),
+    include_finished: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> list[schemas.ReadingShelfItem]:
+    """"Continue reading": the books in progress, most recently read first."""
+    items = crud_progress.get_reading_shelf(
+        db, user_id=principal.user_id, child_id=child_id, include_finished=include_finished,
+        limit=limit, cursor=cursor)
+    if len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud_progress.encode_shelf_cursor(items[-1])
+    return items
+
+
+@router.put("/users/me/books/{book_id}/progress/page", response_model=schemas.ProgressPageAck,
+            status_code=status.HTTP_202_ACCEPTED)
+def turn_page(
+    book_id: uuid.UUID,
+    progress_in: schemas.BookProgressUpdatePage,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.ProgressPageAck:
+    """Lightweight page-turn update for the reader.
+
+    With PROGRESS_WRITE_BEHIND the turn is only recorded in memory and written
+    in the next batch; otherwise it is written immediately. Either way nothing
+    is loaded or returned besides the acknowledged page.
+    """
+    # Checked here because a buffered turn for a missing book could not be written
+    if not crud_book.get_book(db, book_id=book_id, profile="exists"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+    key = (current_user.id, None, book_id)
+    turn = PageTurn(current_page=progress_in.current_page, at=datetime.now(timezone.utc))
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.record(key, turn)
+    else:
+        write_page_turns(db, {key: turn})
+        db.commit()
+    return schemas.ProgressPageAck(
+        current_page=turn.current_page, last_read_at=turn.at, buffered=settings.PROGRESS_WRITE_BEHIND)
+
+
+@router.post("/users/me/reading-events", response_model=schemas.ReadingEventAck,
+             status_code=status.HTTP_202_ACCEPTED)
+def record_reading_events(
+    batch_in: schemas.ReadingEventBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.ReadingEventAck:
+    """Append page views (with dwell time) to the reading-event log.
+
+    Events are buffered and written in batches (see core/reading_events.py),
+    so they show up in reading_events shortly after the request returns.
+    """
+    detail = crud_reading_event.invalid_event_reference(db, user_id=current_user.id, events=batch_in.events)
+    if detail:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    rows = crud_reading_event.event_rows(current_user.id, batch_in.events, now=datetime.now(timezone.utc))
+    if reading_event_buffer.add(rows) >= settings.READING_EVENTS_FLUSH_THRESHOLD:
+        reading_event_buffer.flush(db)
+        db.commit()
+    return schemas.ReadingEventAck(accepted=len(rows))
+
+
 @router.put("/users/me/books/{book_id}/progress", response_model=schemas.UserBookProgressRead)
 def update_progress(
     book_id: uuid.UUID,
@@ -99,3 +178,22 @@ def delete_note(
     crud_progress.delete_note(db, db_note=note)
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/users/me/notes/search", response_model=list[schemas.NoteSearchHit])
+def search_notes(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    child_id: Optional[uuid.UUID] = Query(None),
+    book_id: Optional[uuid.UUID] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> list[schemas.NoteSearchHit]:
+    """Search the notes written by the user and their children, newest first."""
+    hits = crud_progress.search_notes(
+        db, user_id=principal.user_id, query=q, child_id=child_id, book_id=book_id, limit=limit, cursor=cursor)
+    if len(hits) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud_progress.encode_note_search_cursor(hits[-1])
+    return hits
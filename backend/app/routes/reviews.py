@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 
 from backend.app import schemas, models
 from backend.app.core.security import get_current_user
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
 from backend.app.crud import crud_review
 from backend.app.db import get_db
 
@@ -13,11 +15,16 @@ router = APIRouter()
 @router.get("/books/{book_id}/reviews", response_model=list[schemas.ReviewRead])
 def list_reviews(
     book_id: UUID,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 5,
+    cursor: Optional[str] = None,
 ) -> list[schemas.ReviewRead]:
-    return crud_review.get_reviews_by_book(db, book_id=book_id, skip=skip, limit=limit)
+    reviews = crud_review.get_reviews_by_book(db, book_id=book_id, skip=skip, limit=limit, cursor=cursor)
+    if len(reviews) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud_review.encode_review_cursor(reviews[-1])
+    return reviews
 
 
 @router.post("/books/{book_id}/reviews", response_model=schemas.ReviewRead)
@@ -33,6 +40,20 @@ def create_review(
     return review
 
 
+@router.get("/books/{book_id}/reviews/summary", response_model=schemas.ReviewSummary)
+def get_review_summary(book_id: UUID, db: Session = Depends(get_db)) -> schemas.ReviewSummary:
+    return crud_review.get_review_summary_by_book(db, book_id=book_id)
+
+
+@router.get("/reviews/summaries", response_model=dict[UUID, schemas.ReviewSummary])
+def get_review_summaries(
+    book_id: list[UUID] = Query(..., max_length=100),
+    db: Session = Depends(get_db),
+) -> dict[UUID, schemas.ReviewSummary]:
+    """Summaries for several books at once (?book_id=...&book_id=...), for book lists."""
+    return crud_review.get_review_summaries_by_books(db, book_ids=book_id)
+
+
 @router.get("/reviews/{review_id}", response_model=schemas.ReviewRead)
 def get_review(review_id: UUID, db: Session = Depends(get_db)) -> schemas.ReviewRead:
     db_rev = crud_review.get_review(db, review_id=review_id)
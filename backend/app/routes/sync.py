@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from backend.app import schemas, models
+from backend.app.core.security import get_current_principal, get_current_user
+from backend.app.crud import crud_sync
+from backend.app.db import get_db
+
+router = APIRouter()
+
+
+@router.post("/users/me/sync/batch", response_model=schemas.SyncBatchResponse)
+def sync_batch(
+    batch_in: schemas.SyncBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.SyncBatchResponse:
+    """Replay a device's offline progress, bookmark and note changes.
+
+    All mutations are applied in one transaction; each gets its own result,
+    in request order.
+    """
+    results = crud_sync.apply_sync_batch(db, user_id=current_user.id, mutations=batch_in.mutations)
+    db.commit()
+    return schemas.SyncBatchResponse(results=results)
+
+
+@router.get("/users/me/sync", response_model=schemas.SyncChangesResponse)
+def get_changes(
+    since: Optional[str] = Query(None, description="next_since of the previous response"),
+    db: Session = Depends(get_db),
+    principal: schemas.TokenData = Depends(get_current_principal),
+) -> schemas.SyncChangesResponse:
+    """Progress, bookmarks and notes of the user and their children changed
+    or deleted since the last call, for devices that poll for changes.
+
+    Without `since`, returns everything (and no deletions); start there.
+    A `since` older than SYNC_TOMBSTONE_RETENTION_DAYS gets the same, with
+    full_resync set.
+    """
+    return crud_sync.get_changes_since(db, user_id=principal.user_id, since=since)
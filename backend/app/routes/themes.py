@@ -1,24 +1,27 @@
 from fastapi import APIRouter, Depends, Query
 import uuid
+from typing import Optional
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from backend.app import schemas
 from backend.app.crud import crud_theme, crud_book
+from backend.app.core.pagination import NEXT_CURSOR_HEADER
+from backend.app.core.cache import catalog_cache, cached_json_response
 from backend.app.db import get_db
 
 router = APIRouter()
 
+_THEME_LIST = TypeAdapter(list[schemas.ThemeRead])
+_BOOK_LIST = TypeAdapter(list[schemas.BookRead])
+
 
 @router.get("/", response_model=list[schemas.ThemeRead])
 def list_themes(db: Session = Depends(get_db), skip: int = 0, limit: int = 100) -> list[schemas.ThemeRead]:
-    themes = crud_theme.get_themes(db, skip=skip, limit=limit)
-    result = []
-    for theme in themes:
-        book_count = len(theme.book_themes)
-        # Attach book_count temporarily for Pydantic conversion
-        setattr(theme, "book_count", book_count)
-        result.append(schemas.ThemeRead.model_validate(theme))
-    return result
+    def load():
+        return crud_theme.get_themes(db, skip=skip, limit=limit), {}
+
+    return cached_json_response(catalog_cache, ("themes", skip, limit), _THEME_LIST, load)
 
 
 @router.get("/{theme_id}/books", response_model=list[schemas.BookRead])
@@ -26,7 +29,15 @@ def books_by_theme(
     theme_id: uuid.UUID,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1)
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None),
 ) -> list[schemas.BookRead]:
-    books = crud_book.get_books(db, skip=skip, limit=limit, theme_id=theme_id)
-    return books
+    def load():
+        books = crud_book.get_books(db, skip=skip, limit=limit, theme_id=theme_id, cursor=cursor)
+        headers = {}
+        if len(books) == limit:
+            headers[NEXT_CURSOR_HEADER] = crud_book.encode_book_cursor(books[-1])
+        return books, headers
+
+    return cached_json_response(
+        catalog_cache, ("theme_books", theme_id, skip, limit, cursor), _BOOK_LIST, load)
@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from backend.app import schemas, models
-from backend.app.crud import crud_user
+from backend.app.crud import crud_refresh_token, crud_user
+from backend.app.core.cache import invalidate_after_commit, principal_cache
+from backend.app.core.revocation import revoked_sessions
 from backend.app.core.security import get_current_user
 from backend.app.db import get_db
 
@@ -66,6 +68,7 @@ def change_email(
     if crud_user.get_user_by_email(db, email_in.new_email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
     current_user.email = email_in.new_email
+    invalidate_after_commit(db, principal_cache, current_user.id)
     db.add(current_user)
     db.commit()
     return {"message": "Email updated"}
@@ -80,8 +83,13 @@ def change_password(
     if not crud_user.verify_password(pw_update.current_password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect current password")
     current_user.hashed_password = crud_user.get_password_hash(pw_update.new_password)
+    invalidate_after_commit(db, principal_cache, current_user.id)
     db.add(current_user)
+    # Sign out every device, this one included: the client logs in again
+    revoked = crud_refresh_token.revoke_user_sessions(db, current_user.id)
     db.commit()
+    for sid in revoked:
+        revoked_sessions.add(sid)
     return {"message": "Password changed successfully"}
 
 # Endpoints for /users will be defined here (e.g., favorites)
@@ -1,12 +1,13 @@
+import enum
 import uuid
 from datetime import datetime, date
-from typing import List, Optional, TypeVar, Generic
+from typing import Dict, List, Optional, TypeVar, Generic
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import AwareDatetime, BaseModel, EmailStr, Field, ConfigDict, model_validator
 
 # Import enums from models.py
 # Assuming models.py is in the same directory or adjust path accordingly
-from .models import UserTierEnum, ThemeCategoryEnum, ActivityTypeEnum
+from .models import UserTierEnum, ThemeCategoryEnum, ActivityTypeEnum, SyncEntityEnum
 
 # Generic Paginated Response Schema
 DataT = TypeVar('DataT')
@@ -31,12 +32,19 @@ class Msg(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    # Single use: POST /auth/refresh returns the next one
+    refresh_token: Optional[str] = None
     user: Optional["UserRead"] = None  # Include user info on login/register
 
 
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[uuid.UUID] = None
+    sid: Optional[uuid.UUID] = None  # Session (refresh-token family) of the token
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 # Theme Schemas
 
@@ -186,6 +194,19 @@ class ChildRead(ChildBase):
 # Book Schemas
 
 
+class BookSortEnum(str, enum.Enum):
+    RECOMMENDED = "recommended"
+    POPULARITY = "popularity"
+    NEWEST = "newest"
+
+
+class BookTypeFilterEnum(str, enum.Enum):
+    ALL = "all"
+    PREMIUM = "premium"
+    FREE = "free"
+    SUBSCRIPTION = "subscription"  # Neither premium nor free
+
+
 class BookBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=255)
     author_name: Optional[str] = Field(None, max_length=255)
@@ -283,6 +304,41 @@ class BookTocItemRead(BookTocItemBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Catalog import schemas (app/jobs/catalog_import.py)
+
+
+class CatalogBookImport(BookBase):
+    external_id: str = Field(..., min_length=1, max_length=255)
+    themes: List[str] = []  # Theme names
+    pages: List[BookPageBase] = []
+    toc: List[BookTocItemBase] = []
+
+
+class CatalogPageRow(BookPageBase):
+    book_external_id: str
+
+
+class CatalogTocRow(BookTocItemBase):
+    book_external_id: str
+
+
+class CatalogThemeLinkRow(BaseModel):
+    book_external_id: str
+    theme: str
+
+
+class CatalogImportError(BaseModel):
+    line: int
+    message: str
+
+
+class CatalogImportResult(BaseModel):
+    books: int = 0
+    pages: int = 0
+    toc_items: int = 0  # Newly created items only
+    theme_links: int = 0  # Newly created links only
+    errors: List[CatalogImportError] = []
+
 # Review Schemas
 
 
@@ -324,6 +380,9 @@ class ReviewRead(ReviewBase):
 class ReviewSummary(BaseModel):
     average_rating: Optional[float] = None
     total_reviews: int = 0
+    # Number of reviews per rating, keys 1-5
+    rating_histogram: Dict[int, int] = Field(
+        default_factory=lambda: {rating: 0 for rating in range(1, 6)})
 
 # Book Detail Schema (more comprehensive)
 
@@ -338,6 +397,14 @@ class BookDetailRead(BookRead):  # Inherits fields from BookRead
     model_config = ConfigDict(from_attributes=True)
 
 
+class BookDetailPageRead(BaseModel):
+    """Everything BookDetailPage renders, returned by GET /books/{id}/detail."""
+    book: BookDetailRead
+    reviews: List[ReviewRead] = []  # First page, newest first
+    reviews_next_cursor: Optional[str] = None
+    progress: Optional["UserBookProgressRead"] = None  # None for anonymous callers or unread books
+
+
 # User Favorite Schemas (mostly for response, creation/deletion by path)
 class UserFavoriteBase(BaseModel):
     user_id: uuid.UUID
@@ -392,6 +459,19 @@ class UserBookNoteRead(UserBookNoteBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class NoteSearchHit(BaseModel):
+    """A note matching GET /users/me/notes/search."""
+    id: uuid.UUID
+    book_id: uuid.UUID
+    book_title: str
+    child_id: Optional[uuid.UUID] = None
+    page_number: int
+    # HTML-escaped note excerpt with matches wrapped in <mark>...</mark>
+    snippet: str
+    created_at: datetime
+    updated_at: datetime
+
+
 class UserBookProgressBase(BaseModel):
     current_page: int = Field(1, gt=0)
 
@@ -405,6 +485,161 @@ class BookProgressUpdatePage(BaseModel):  # As per plan
     current_page: int = Field(..., gt=0)
 
 
+class ProgressPageAck(BaseModel):
+    """Response of the page-turn endpoint."""
+    current_page: int
+    last_read_at: datetime
+    buffered: bool  # True if written later by the write-behind buffer
+
+
+# Reading-event log schemas
+class ReadingEventCreate(BaseModel):
+    """One page view, as recorded by the reader."""
+    book_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+    page_number: int = Field(..., gt=0)
+    dwell_ms: int = Field(..., ge=0, le=60 * 60 * 1000)
+    occurred_at: AwareDatetime
+
+
+class ReadingEventBatch(BaseModel):
+    events: List[ReadingEventCreate] = Field(..., min_length=1, max_length=500)
+
+
+class ReadingEventAck(BaseModel):
+    accepted: int
+
+
+# Offline sync batch schemas (POST /users/me/sync/batch)
+
+
+class SyncOperationEnum(str, enum.Enum):
+    SET_PAGE = "set_page"
+    ADD_BOOKMARK = "add_bookmark"
+    REMOVE_BOOKMARK = "remove_bookmark"
+    ADD_NOTE = "add_note"
+    UPDATE_NOTE = "update_note"
+    DELETE_NOTE = "delete_note"
+
+
+class SyncStatusEnum(str, enum.Enum):
+    OK = "ok"
+    NOT_FOUND = "not_found"  # Book or note does not exist (or is not yours)
+    CONFLICT = "conflict"  # Invalid given earlier operations in the batch
+
+
+_SYNC_REQUIRED_FIELDS = {
+    SyncOperationEnum.SET_PAGE: ("page_number",),
+    SyncOperationEnum.ADD_BOOKMARK: ("page_number",),
+    SyncOperationEnum.REMOVE_BOOKMARK: ("page_number",),
+    SyncOperationEnum.ADD_NOTE: ("note_id", "page_number", "text"),
+    SyncOperationEnum.UPDATE_NOTE: ("note_id", "text"),
+    SyncOperationEnum.DELETE_NOTE: ("note_id",),
+}
+
+
+class SyncMutation(BaseModel):
+    op: SyncOperationEnum
+    book_id: uuid.UUID
+    page_number: Optional[int] = Field(None, gt=0)
+    # Notes are created with a client-generated id, so replays are idempotent
+    # and later operations in the same batch can refer to them
+    note_id: Optional[uuid.UUID] = None
+    text: Optional[str] = None
+    # When the change happened on the device; orders page updates against
+    # ones that reached the server directly. Defaults to the server time.
+    occurred_at: Optional[AwareDatetime] = None
+
+    @model_validator(mode="after")
+    def check_required_fields(self) -> "SyncMutation":
+        missing = [f for f in _SYNC_REQUIRED_FIELDS[self.op] if getattr(self, f) is None]
+        if missing:
+            raise ValueError(f"{self.op.value} requires {', '.join(missing)}")
+        return self
+
+
+class SyncBatchRequest(BaseModel):
+    mutations: List[SyncMutation] = Field(..., max_length=1000)
+
+
+class SyncMutationResult(BaseModel):
+    index: int  # Position in the request's mutations list
+    status: SyncStatusEnum
+    detail: Optional[str] = None
+
+
+class SyncBatchResponse(BaseModel):
+    results: List[SyncMutationResult]
+
+
+# Change feed schemas (GET /users/me/sync)
+
+
+class SyncProgressRead(BaseModel):
+    id: uuid.UUID
+    book_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+    current_page: int
+    last_read_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncBookmarkRead(UserBookBookmarkRead):
+    book_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+
+
+class SyncNoteRead(UserBookNoteRead):
+    book_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+
+
+class SyncTombstoneRead(BaseModel):
+    entity_type: SyncEntityEnum
+    entity_id: uuid.UUID
+    book_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+    deleted_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncChangesResponse(BaseModel):
+    """Rows changed or deleted since the client's `since` token.
+
+    Without a token every live row is returned and `deleted` is empty. A row
+    may be sent again in the next response; applying it twice is harmless.
+    """
+    progress: List[SyncProgressRead]
+    bookmarks: List[SyncBookmarkRead]
+    notes: List[SyncNoteRead]
+    deleted: List[SyncTombstoneRead]
+    # The token was older than the tombstones kept: this is every live row,
+    # and the client should drop local rows that are not in it
+    full_resync: bool = False
+    # Pass back as `since` on the next call
+    next_since: str
+
+
+class ReadingShelfBook(BaseModel):
+    """Compact book summary for the reading shelf."""
+    id: uuid.UUID
+    title: str
+    author_name: Optional[str] = None
+    cover_url: Optional[str] = None
+
+
+class ReadingShelfItem(BaseModel):
+    progress_id: uuid.UUID
+    child_id: Optional[uuid.UUID] = None
+    book: ReadingShelfBook
+    current_page: int
+    total_pages: Optional[int] = None
+    percent_complete: Optional[float] = None  # None when total_pages is unknown
+    last_read_at: datetime
+
+
 class UserBookProgressRead(UserBookProgressBase):
     # id: uuid.UUID # The plan's example response doesn't have progress_id itself
     # user_id: uuid.UUID
@@ -439,6 +674,20 @@ class LearningActivityRead(LearningActivityBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class HistoryGranularityEnum(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class LearningActivitySummaryRow(BaseModel):
+    """Number of activities of one type for one child (or the parent) in a period."""
+    period_start: date
+    child_id: Optional[uuid.UUID] = None
+    activity_type: ActivityTypeEnum
+    count: int
+
+
 # Schemas for auth routes not covered by User* schemas
 class EmailSchema(BaseModel):
     email: EmailStr
@@ -453,4 +702,6 @@ class PasswordResetSchema(BaseModel):
 Token.model_rebuild()
 # Ensure UserCreate resolves the "ChildCreate" forward reference used for nested registration
 UserCreate.model_rebuild()
+# BookDetailPageRead embeds UserBookProgressRead, defined further down
+BookDetailPageRead.model_rebuild()
 # Add other .model_rebuild() calls if additional circular dependencies arise
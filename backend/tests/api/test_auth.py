@@ -125,6 +125,26 @@ def test_user_login(client: TestClient, db_session: Session) -> None:
     assert data["user"]["name"] == test_user_name
 
 
+def test_login_sheds_load_when_hashing_pool_is_full(client: TestClient, db_session: Session, monkeypatch) -> None:
+    from backend.app.core.password_pool import password_pool
+
+    client.post(
+        f"{settings.API_V1_STR}/auth/register",
+        json={"email": "spike@example.com", "password": test_user_password, "name": "Spike"},
+    )
+    # No worker and no queue slot left: every hash is rejected
+    monkeypatch.setattr(password_pool, "workers", 0)
+    monkeypatch.setattr(password_pool, "max_queue", 0)
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "spike@example.com", "password": test_user_password},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    stats = client.get(f"{settings.API_V1_STR}/metrics/password-hashing").json()
+    assert stats["rejected"] >= 1
+
+
 def test_login_incorrect_password(client: TestClient, db_session: Session) -> None:
     """
     Test user login with incorrect password.
@@ -204,3 +224,51 @@ def test_reset_password(client: TestClient, db_session: Session) -> None:
     assert response.status_code == 200
     assert response.json() == {
         "message": "Password reset successfully (mocked)."}
+
+
+def test_verified_token_cache(client: TestClient, db_session: Session) -> None:
+    from backend.tests.api.test_users import get_auth_headers
+
+    headers = get_auth_headers(client, "tokens@example.com", test_user_password, "Tokens")
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
+    hits = client.get(f"{settings.API_V1_STR}/metrics/cache").json()["verified_tokens"]["hits"]
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
+    assert client.get(f"{settings.API_V1_STR}/metrics/cache").json()["verified_tokens"]["hits"] == hits + 1
+
+    # HS256 keys are secret, so none are published
+    assert client.get(f"{settings.API_V1_STR}/auth/jwks.json").json() == {"keys": []}
+
+
+def test_key_set_rotation(tmp_path) -> None:
+    import pytest
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from jose import JWTError
+    from backend.app.core.tokens import KeySet
+
+    private = {}
+    for kid in ("2026-01", "2026-07"):
+        private[kid] = ec.generate_private_key(ec.SECP256R1())
+        (tmp_path / f"{kid}.pem").write_bytes(private[kid].private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    old = KeySet.from_directory(tmp_path, "ES256", "2026-01")
+    old_token = old.sign({"sub": "a@example.com"})
+
+    # After rotation tokens signed with the previous key still verify
+    new = KeySet.from_directory(tmp_path, "ES256", "2026-07")
+    assert new.verify(old_token) == {"sub": "a@example.com"}
+    assert new.verify(new.sign({"sub": "b@example.com"})) == {"sub": "b@example.com"}
+    assert sorted(k["kid"] for k in new.jwks()["keys"]) == ["2026-01", "2026-07"]
+    assert all("d" not in k for k in new.jwks()["keys"])
+
+    # ... until the old key is removed
+    (tmp_path / "2026-01.pem").unlink()
+    with pytest.raises(JWTError):
+        KeySet.from_directory(tmp_path, "ES256", "2026-07").verify(old_token)
+
+    # A public key verifies but cannot be the signing key
+    (tmp_path / "2026-01.pem").write_bytes(private["2026-01"].public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+    assert KeySet.from_directory(tmp_path, "ES256", "2026-07").verify(old_token)["sub"] == "a@example.com"
+    with pytest.raises(ValueError):
+        KeySet.from_directory(tmp_path, "ES256", "2026-01")
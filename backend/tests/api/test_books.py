@@ -0,0 +1,224 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app import crud, schemas
+from backend.app.core.cache import catalog_cache
+
+
+def test_search_books(client: TestClient, db_session: Session) -> None:
+    for i, score in enumerate([5, 15, 25]):
+        crud.book.create_book(
+            db_session,
+            schemas.BookCreate(
+                title=f"Searchable Moon {i}", popularity_score=score, is_free=(i == 0)
+            ),
+        )
+    db_session.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/books/search",
+        params={"q": "searchable moon", "sort_by": "popularity", "limit": 2},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["pages"] == 2
+    assert data["page"] == 1
+    assert [b["popularity_score"] for b in data["items"]] == [25, 15]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/books/search",
+        params={"q": "searchable moon", "book_type": "free"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["title"] == "Searchable Moon 0"
+
+
+def test_list_books_cursor_pagination(client: TestClient, db_session: Session) -> None:
+    theme = crud.theme.create_theme(
+        db_session, schemas.ThemeCreate(name="Cursor API Theme", category="self")
+    )
+    for i in range(3):
+        crud.book.create_book(
+            db_session,
+            schemas.BookCreate(title=f"Cursor API {i}", popularity_score=i, theme_ids=[theme.id]),
+        )
+    db_session.commit()
+
+    url = f"{settings.API_V1_STR}/themes/{theme.id}/books"
+    first = client.get(url, params={"limit": 2})
+    assert first.status_code == 200
+    assert [b["popularity_score"] for b in first.json()] == [2, 1]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(url, params={"limit": 2, "cursor": cursor})
+    assert second.status_code == 200
+    assert [b["popularity_score"] for b in second.json()] == [0]
+    assert "X-Next-Cursor" not in second.headers
+
+    bad = client.get(f"{settings.API_V1_STR}/books", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+def test_catalog_cache_invalidated_by_book_writes(
+    client: TestClient, db_session: Session
+) -> None:
+    from backend.tests.api.test_users import get_auth_headers
+
+    headers = get_auth_headers(client, "cache@example.com", "CachePass1", "Cache User")
+    created = client.post(
+        f"{settings.API_V1_STR}/books/", json={"title": "Cached Title"}, headers=headers
+    )
+    assert created.status_code == 200
+    book_id = created.json()["id"]
+    url = f"{settings.API_V1_STR}/books/{book_id}"
+
+    before = client.get(f"{settings.API_V1_STR}/metrics/cache").json()["catalog"]
+    assert client.get(url).json()["title"] == "Cached Title"
+    assert client.get(url).json()["title"] == "Cached Title"
+    after = client.get(f"{settings.API_V1_STR}/metrics/cache").json()["catalog"]
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    resp = client.put(url, json={"title": "Renamed Title"}, headers=headers)
+    assert resp.status_code == 200
+    assert client.get(url).json()["title"] == "Renamed Title"
+
+    assert client.delete(url, headers=headers).status_code == 204
+    assert client.get(url).status_code == 404
+
+
+def test_cached_response_not_stored_under_version_bumped_during_load() -> None:
+    from pydantic import TypeAdapter
+    from backend.app.core.cache import VersionedCache, cached_json_response
+
+    cache = VersionedCache("test", maxsize=10, ttl=60)
+    adapter = TypeAdapter(list)
+    loads = []
+
+    def load():
+        loads.append(1)
+        if len(loads) == 1:
+            cache.bump_version()  # a write commits while the stale body is built
+        return [len(loads)], {}
+
+    assert cached_json_response(cache, "k", adapter, load).body == b"[1]"
+    assert cached_json_response(cache, "k", adapter, load).body == b"[2]"
+    assert cached_json_response(cache, "k", adapter, load).body == b"[2]"
+    assert len(loads) == 2
+
+
+def test_get_related_books(client: TestClient, db_session: Session) -> None:
+    from backend.app.jobs.related_books import rebuild_related_books
+
+    theme = crud.theme.create_theme(
+        db_session, schemas.ThemeCreate(name="Related API Theme", category="self")
+    )
+    book = crud.book.create_book(
+        db_session, schemas.BookCreate(title="Related API Source", theme_ids=[theme.id]))
+    other = crud.book.create_book(
+        db_session, schemas.BookCreate(title="Related API Other", theme_ids=[theme.id]))
+    db_session.commit()
+
+    url = f"{settings.API_V1_STR}/books/{book.id}/related"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json() == []
+
+    rebuild_related_books(db_session, [book.id])
+    db_session.commit()
+    catalog_cache.bump_version()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert [b["id"] for b in response.json()] == [str(other.id)]
+
+
+def test_get_book_detail(client: TestClient, db_session: Session) -> None:
+    from backend.tests.api.test_users import get_auth_headers
+
+    theme = crud.theme.create_theme(
+        db_session, schemas.ThemeCreate(name="Detail API Theme", category="self")
+    )
+    book = crud.book.create_book(
+        db_session, schemas.BookCreate(title="Detail API Book", theme_ids=[theme.id]))
+    crud.book.create_book_page(
+        db_session, schemas.BookPageCreate(book_id=book.id, page_number=1, image_url="p1.png"),
+        book_id=book.id)
+    db_session.commit()
+    headers = get_auth_headers(client, "detailuser@example.com", "DetailPass123", "Detail User")
+
+    url = f"{settings.API_V1_STR}/books/{book.id}/detail"
+    anonymous = client.get(url)
+    assert anonymous.status_code == 200
+    data = anonymous.json()
+    assert data["book"]["title"] == "Detail API Book"
+    assert [t["name"] for t in data["book"]["themes"]] == ["Detail API Theme"]
+    assert [p["page_number"] for p in data["book"]["pages"]] == [1]
+    assert data["book"]["reviews_summary"]["total_reviews"] == 0
+    assert data["reviews"] == []
+    assert data["progress"] is None
+
+    client.post(f"{settings.API_V1_STR}/books/{book.id}/reviews",
+                json={"rating": 5, "text": "Lovely"}, headers=headers)
+    client.put(f"{settings.API_V1_STR}/users/me/books/{book.id}/progress",
+               json={"current_page": 3}, headers=headers)
+
+    data = client.get(url, headers=headers).json()
+    assert data["book"]["reviews_summary"]["total_reviews"] == 1
+    assert [r["text"] for r in data["reviews"]] == ["Lovely"]
+    assert data["reviews"][0]["user"]["name"] == "Detail User"
+    assert data["progress"]["current_page"] == 3
+
+    missing = client.get(f"{settings.API_V1_STR}/books/{uuid.uuid4()}/detail")
+    assert missing.status_code == 404
+
+
+def test_admin_catalog_import(client: TestClient, db_session: Session) -> None:
+    from backend.tests.api.test_users import get_auth_headers
+    from backend.app import models
+
+    headers = get_auth_headers(client, "importer@example.com", "Importer123", "Importer")
+    files = {"file": ("books.csv", b"external_id,title\napi-imp-1,Api Import\n", "text/csv")}
+    url = f"{settings.API_V1_STR}/admin/catalog/import"
+
+    resp = client.post(url, params={"format": "csv"}, files=files, headers=headers)
+    assert resp.status_code == 403
+
+    user = crud.user.get_user_by_email(db_session, email="importer@example.com")
+    user.tier = models.UserTierEnum.ADMIN
+    db_session.commit()
+    resp = client.post(url, params={"format": "csv"}, files=files, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["books"] == 1
+    assert resp.json()["errors"] == []
+
+
+def test_duplicate_page_and_toc_item_conflict(client: TestClient, db_session: Session) -> None:
+    from backend.tests.api.test_users import get_auth_headers
+
+    headers = get_auth_headers(client, "dupes@example.com", "DupesPass1", "Dupes User")
+    book_id = client.post(
+        f"{settings.API_V1_STR}/books/", json={"title": "Dupes"}, headers=headers).json()["id"]
+    pages_url = f"{settings.API_V1_STR}/books/{book_id}/pages"
+    page = {"book_id": book_id, "page_number": 1, "image_url": "1.png"}
+    assert client.post(pages_url, json=page, headers=headers).status_code == 200
+    assert client.post(pages_url, json=page, headers=headers).status_code == 409
+    second = client.post(pages_url, json={**page, "page_number": 2}, headers=headers).json()
+    resp = client.put(f"{pages_url}/{second['id']}", json={"page_number": 1}, headers=headers)
+    assert resp.status_code == 409
+    resp = client.put(f"{pages_url}/{second['id']}", json={"page_number": 2}, headers=headers)
+    assert resp.status_code == 200
+
+    toc_url = f"{settings.API_V1_STR}/books/{book_id}/toc"
+    item = {"book_id": book_id, "page_number": 1, "title": "Start"}
+    assert client.post(toc_url, json=item, headers=headers).status_code == 200
+    assert client.post(toc_url, json=item, headers=headers).status_code == 409
+    other = client.post(toc_url, json={**item, "title": "Next"}, headers=headers).json()
+    resp = client.put(f"{toc_url}/{other['id']}", json={"title": "Start"}, headers=headers)
+    assert resp.status_code == 409
@@ -1,3 +1,4 @@
+import uuid
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from backend.app.core.config import settings
@@ -53,3 +54,178 @@ def test_progress_flow(client: TestClient, db_session: Session) -> None:
         headers=headers,
     )
     assert resp.status_code == 204
+
+
+def test_page_turn_write_behind(client: TestClient, db_session: Session, monkeypatch) -> None:
+    from backend.app.core.progress_buffer import progress_buffer
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    headers = get_auth_headers(client, "pageturn@example.com", "Pass1234", "Page Turner")
+    book_id = str(create_db_book_for_review(db=db_session, title_suffix="_api_turn").id)
+    db_session.commit()
+    progress_url = f"{settings.API_V1_STR}/users/me/books/{book_id}/progress"
+
+    # Written through when write-behind is off
+    resp = client.put(f"{progress_url}/page", json={"current_page": 3}, headers=headers)
+    assert resp.status_code == 202
+    assert resp.json()["buffered"] is False
+    assert client.get(progress_url, headers=headers).json()["current_page"] == 3
+
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    for page in (4, 5):
+        resp = client.put(f"{progress_url}/page", json={"current_page": page}, headers=headers)
+        assert resp.status_code == 202
+        assert resp.json()["buffered"] is True
+    # Reads see the buffered page before it is flushed
+    assert client.get(progress_url, headers=headers).json()["current_page"] == 5
+
+    assert progress_buffer.flush(db_session) == 1
+    db_session.commit()
+    assert client.get(progress_url, headers=headers).json()["current_page"] == 5
+
+    # Unknown books are rejected instead of buffered
+    missing_url = f"{settings.API_V1_STR}/users/me/books/{uuid.uuid4()}/progress/page"
+    assert client.put(missing_url, json={"current_page": 1}, headers=headers).status_code == 404
+
+
+def test_sync_batch(client: TestClient, db_session: Session) -> None:
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    headers = get_auth_headers(client, "syncer@example.com", "Pass1234", "Syncer")
+    book_id = str(create_db_book_for_review(db=db_session, title_suffix="_api_sync").id)
+    db_session.commit()
+
+    resp = client.post(
+        f"{settings.API_V1_STR}/users/me/sync/batch",
+        json={"mutations": [
+            {"op": "set_page", "book_id": book_id, "page_number": 6},
+            {"op": "add_bookmark", "book_id": book_id, "page_number": 6},
+        ]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json()["results"]] == ["ok", "ok"]
+
+    progress = client.get(f"{settings.API_V1_STR}/users/me/books/{book_id}/progress", headers=headers).json()
+    assert progress["current_page"] == 6
+    assert [b["page_number"] for b in progress["bookmarks"]] == [6]
+
+    resp = client.post(
+        f"{settings.API_V1_STR}/users/me/sync/batch",
+        json={"mutations": [{"op": "add_note", "book_id": book_id, "page_number": 1}]},
+        headers=headers,
+    )
+    assert resp.status_code == 422
+
+    # Device times must carry an offset
+    resp = client.post(
+        f"{settings.API_V1_STR}/users/me/sync/batch",
+        json={"mutations": [{"op": "set_page", "book_id": book_id, "page_number": 2,
+                             "occurred_at": "2026-01-01T10:00:00"}]},
+        headers=headers,
+    )
+    assert resp.status_code == 422
+
+
+def test_sync_changes(client: TestClient, db_session: Session) -> None:
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    headers = get_auth_headers(client, "feed@example.com", "Pass1234", "Feed Reader")
+    book_id = str(create_db_book_for_review(db=db_session, title_suffix="_api_feed").id)
+    db_session.commit()
+    note_id = "6f1b0c2e-4a5d-4e8f-9b7a-3c2d1e0f9a8b"
+    sync_url = f"{settings.API_V1_STR}/users/me/sync"
+    client.post(f"{sync_url}/batch", json={"mutations": [
+        {"op": "set_page", "book_id": book_id, "page_number": 3},
+        {"op": "add_bookmark", "book_id": book_id, "page_number": 3},
+        {"op": "add_note", "book_id": book_id, "note_id": note_id, "page_number": 3, "text": "Hi"},
+    ]}, headers=headers)
+
+    resp = client.get(sync_url, headers=headers)
+    assert resp.status_code == 200
+    full = resp.json()
+    assert [p["current_page"] for p in full["progress"]] == [3]
+    assert [(b["book_id"], b["page_number"]) for b in full["bookmarks"]] == [(book_id, 3)]
+    assert [n["id"] for n in full["notes"]] == [note_id]
+    assert full["deleted"] == []
+
+    client.post(f"{sync_url}/batch", json={"mutations": [
+        {"op": "remove_bookmark", "book_id": book_id, "page_number": 3},
+        {"op": "delete_note", "book_id": book_id, "note_id": note_id},
+    ]}, headers=headers)
+    delta = client.get(sync_url, params={"since": full["next_since"]}, headers=headers).json()
+    assert delta["bookmarks"] == [] and delta["notes"] == []
+    assert sorted(d["entity_type"] for d in delta["deleted"]) == ["bookmark", "note"]
+    assert note_id in {d["entity_id"] for d in delta["deleted"]}
+
+    assert client.get(sync_url, params={"since": "bogus"}, headers=headers).status_code == 400
+
+
+def test_reading_events(client: TestClient, db_session: Session) -> None:
+    from backend.app.core.reading_events import reading_event_buffer
+    from backend.app.models import ReadingEvent
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    reading_event_buffer.drain()
+    headers = get_auth_headers(client, "events@example.com", "Pass1234", "Event Reader")
+    book_id = str(create_db_book_for_review(db=db_session, title_suffix="_api_events").id)
+    db_session.commit()
+    url = f"{settings.API_V1_STR}/users/me/reading-events"
+
+    events = [{"book_id": book_id, "page_number": p, "dwell_ms": 2000,
+               "occurred_at": f"2026-10-18T10:00:0{p}Z"} for p in (1, 2, 3)]
+    resp = client.post(url, json={"events": events}, headers=headers)
+    assert resp.status_code == 202
+    assert resp.json() == {"accepted": 3}
+    # Buffered until the next flush
+    assert db_session.query(ReadingEvent).count() == 0
+    assert reading_event_buffer.flush(db_session) == 3
+    db_session.commit()
+    assert sorted(e.page_number for e in db_session.query(ReadingEvent)) == [1, 2, 3]
+
+    unknown = [{**events[0], "book_id": "00000000-0000-0000-0000-000000000001"}]
+    assert client.post(url, json={"events": unknown}, headers=headers).status_code == 404
+    naive = [{**events[0], "occurred_at": "2026-10-18T10:00:00"}]
+    assert client.post(url, json={"events": naive}, headers=headers).status_code == 422
+    assert client.post(url, json={"events": []}, headers=headers).status_code == 422
+    assert reading_event_buffer.stats()["pending"] == 0
+
+
+def test_search_notes(client: TestClient, db_session: Session) -> None:
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    headers = get_auth_headers(client, "notesearch@example.com", "Pass1234", "Note Searcher")
+    book_id = str(create_db_book_for_review(db=db_session, title_suffix="_api_note_search").id)
+    db_session.commit()
+    notes_url = f"{settings.API_V1_STR}/users/me/books/{book_id}/notes"
+    for page, text in ((1, "A brave little fox"), (2, "The fox was brave"), (3, "Rainy day")):
+        assert client.post(notes_url, json={"page_number": page, "text": text}, headers=headers).status_code == 200
+
+    url = f"{settings.API_V1_STR}/users/me/notes/search"
+    resp = client.get(url, params={"q": "brave fox", "limit": 1}, headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.json()) == 1
+    assert "<mark>fox</mark>" in resp.json()[0]["snippet"]
+    cursor = resp.headers["X-Next-Cursor"]
+    resp = client.get(url, params={"q": "brave fox", "limit": 1, "cursor": cursor}, headers=headers)
+    assert len(resp.json()) == 1
+    assert client.get(url, params={"q": ""}, headers=headers).status_code == 422
+    assert client.get(url, params={"q": "fox", "cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_reading_shelf(client: TestClient, db_session: Session) -> None:
+    from backend.tests.crud.test_crud_review import create_db_book_for_review
+
+    headers = get_auth_headers(client, "shelf@example.com", "Pass1234", "Shelf Reader")
+    book = create_db_book_for_review(db=db_session, title_suffix="_api_shelf")
+    book.total_pages = 8
+    db_session.commit()
+    progress_url = f"{settings.API_V1_STR}/users/me/books/{book.id}/progress"
+    assert client.put(progress_url, json={"current_page": 2}, headers=headers).status_code == 200
+
+    resp = client.get(f"{settings.API_V1_STR}/users/me/reading-shelf", headers=headers)
+    assert resp.status_code == 200
+    [item] = resp.json()
+    assert item["book"]["title"] == book.title
+    assert (item["current_page"], item["total_pages"], item["percent_complete"]) == (2, 8, 25.0)
+    assert "X-Next-Cursor" not in resp.headers
@@ -1,17 +1,81 @@
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from backend.app.core.config import settings
-from backend.tests.api.test_users import get_auth_headers
+
+
+def login(client: TestClient, email: str, password: str, name: str) -> dict:
+    client.post(
+        f"{settings.API_V1_STR}/auth/register",
+        json={"email": email, "password": password, "name": name},
+    )
+    resp = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": email, "password": password},
+    )
+    return resp.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
 
 
 def test_refresh_token(client: TestClient, db_session: Session) -> None:
-    email = "ref@example.com"
-    password = "Pass1234"
-    name = "Ref User"
-    headers = get_auth_headers(client, email, password, name)
+    tokens = login(client, "ref@example.com", "Pass1234", "Ref User")
+    assert tokens["refresh_token"]
+    refresh_url = f"{settings.API_V1_STR}/auth/refresh"
 
-    resp = client.post(f"{settings.API_V1_STR}/auth/refresh", headers=headers)
+    resp = client.post(refresh_url, json={"refresh_token": tokens["refresh_token"]})
     assert resp.status_code == 200
     data = resp.json()
     assert data["token_type"] == "bearer"
-    assert "access_token" in data
+    assert data["refresh_token"] != tokens["refresh_token"]
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(data)).status_code == 200
+
+    # Replaying a used refresh token revokes the whole session
+    assert client.post(refresh_url, json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.post(refresh_url, json={"refresh_token": data["refresh_token"]}).status_code == 401
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(data)).status_code == 401
+
+    assert client.post(refresh_url, json={"refresh_token": "unknown"}).status_code == 401
+
+
+def test_logout(client: TestClient, db_session: Session) -> None:
+    tokens = login(client, "bye@example.com", "Pass1234", "Bye User")
+    other = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "bye@example.com", "password": "Pass1234"},
+    ).json()
+
+    resp = client.post(f"{settings.API_V1_STR}/auth/logout", headers=bearer(tokens))
+    assert resp.status_code == 204
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(tokens)).status_code == 401
+    resp = client.post(f"{settings.API_V1_STR}/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+    # Other sessions of the same user are unaffected
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(other)).status_code == 200
+
+
+def test_change_password_ends_all_sessions(client: TestClient, db_session: Session) -> None:
+    tokens = login(client, "pwchange@example.com", "Pass1234", "Pw User")
+    other = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "pwchange@example.com", "password": "Pass1234"},
+    ).json()
+
+    resp = client.put(
+        f"{settings.API_V1_STR}/users/me/change-password",
+        json={"current_password": "Pass1234", "new_password": "Pass5678"},
+        headers=bearer(tokens),
+    )
+    assert resp.status_code == 200
+    for session in (tokens, other):
+        assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(session)).status_code == 401
+        resp = client.post(f"{settings.API_V1_STR}/auth/refresh", json={"refresh_token": session["refresh_token"]})
+        assert resp.status_code == 401
+
+    fresh = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "pwchange@example.com", "password": "Pass5678"},
+    ).json()
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(fresh)).status_code == 200
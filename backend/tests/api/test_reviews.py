@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from backend.app.core.config import settings
+from backend.tests.api.test_users import get_auth_headers
+from backend.tests.crud.test_crud_book import create_dummy_book_for_related_tests
+
+
+def test_review_summaries(client: TestClient, db_session: Session) -> None:
+    headers = get_auth_headers(client, "reviewsum@example.com", "ReviewSum123", "Review Sum")
+    book = create_dummy_book_for_related_tests(db_session, title_suffix="_summary")
+    other = create_dummy_book_for_related_tests(db_session, title_suffix="_summary_other")
+    db_session.commit()
+
+    resp = client.post(
+        f"{settings.API_V1_STR}/books/{book.id}/reviews",
+        json={"rating": 4, "text": "Nice"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+
+    resp = client.get(f"{settings.API_V1_STR}/books/{book.id}/reviews/summary")
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "average_rating": 4.0,
+        "total_reviews": 1,
+        "rating_histogram": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0},
+    }
+
+    resp = client.get(
+        f"{settings.API_V1_STR}/reviews/summaries",
+        params=[("book_id", str(book.id)), ("book_id", str(other.id))],
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data[str(book.id)]["total_reviews"] == 1
+    assert data[str(other.id)]["total_reviews"] == 0
@@ -35,3 +35,28 @@ def test_get_and_update_me(client: TestClient, db_session: Session) -> None:
     )
     assert update_resp.status_code == 200
     assert update_resp.json()["name"] == "Updated"
+
+
+def test_current_user_cache(client: TestClient, db_session: Session) -> None:
+    headers = get_auth_headers(client, "cached_me@example.com", "Secure123!", "Cached Me")
+    me_url = f"{settings.API_V1_STR}/users/me"
+    metrics_url = f"{settings.API_V1_STR}/metrics/cache"
+
+    assert client.get(me_url, headers=headers).status_code == 200
+    before = client.get(metrics_url).json()["principals"]
+    assert client.get(me_url, headers=headers).json()["name"] == "Cached Me"
+    assert client.get(metrics_url).json()["principals"]["hits"] == before["hits"] + 1
+
+    # Writes to the user drop the cached copy
+    client.put(me_url, json={"name": "Renamed"}, headers=headers)
+    assert client.get(me_url, headers=headers).json()["name"] == "Renamed"
+    resp = client.put(f"{me_url}/change-email", json={"new_email": "moved_me@example.com"}, headers=headers)
+    assert resp.status_code == 200
+    assert client.get(me_url, headers=headers).json()["email"] == "moved_me@example.com"
+
+    # Claims-only endpoints do not look the user up at all
+    misses = client.get(metrics_url).json()["principals"]["misses"]
+    assert client.get(f"{settings.API_V1_STR}/users/me/reading-shelf", headers=headers).status_code == 200
+    assert client.get(metrics_url).json()["principals"]["misses"] == misses
+    bad = {"Authorization": "Bearer not-a-token"}
+    assert client.get(f"{settings.API_V1_STR}/users/me/reading-shelf", headers=bad).status_code == 401
@@ -1,10 +1,14 @@
-from backend.app.db import get_db  # Import the original get_db dependency
+from backend.app.db import get_db, get_session_factory  # Import the original dependencies
 from backend.app.main import app  # Import your FastAPI app
 from fastapi.testclient import TestClient
 from backend.app.models import *
 from backend.app.db import Base  # We still need Base for metadata
 from backend.app.core.config import settings
+from backend.app.core.cache import catalog_cache, principal_cache, verified_token_cache
+from backend.app.core.revocation import revoked_sessions
+from contextlib import contextmanager
 from typing import Generator
+import threading
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy import create_engine
 import pytest
@@ -88,6 +92,22 @@ def db_session(db_engine) -> Generator[Session, None, None]:
         connection.close()  # Close the connection.
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> Generator[None, None, None]:
+    """
+    Each test rolls back its data, so cached responses must not leak into the next test.
+    """
+    catalog_cache.clear()
+    principal_cache.clear()
+    verified_token_cache.clear()
+    revoked_sessions.clear()
+    yield
+    catalog_cache.clear()
+    principal_cache.clear()
+    verified_token_cache.clear()
+    revoked_sessions.clear()
+
+
 @pytest.fixture(scope="function")
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     """
@@ -103,6 +123,17 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
 
     app.dependency_overrides[get_db] = override_get_db
 
+    # Routes that open their own sessions (possibly from several threads) get
+    # the same test session, one thread at a time.
+    session_lock = threading.Lock()
+
+    @contextmanager
+    def shared_session() -> Generator[Session, None, None]:
+        with session_lock:
+            yield db_session
+
+    app.dependency_overrides[get_session_factory] = lambda: shared_session
+
     with TestClient(app) as c:
         yield c
 
@@ -1,13 +1,17 @@
 import pytest
 import uuid
+from contextlib import contextmanager
 from typing import List
 
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm import Session
 
 from app import crud
 from app import models
 from app import schemas
 from app.models import Theme  # Explicit import for Theme model
+from app.core.pagination import InvalidCursorError
 
 
 def create_dummy_themes(db: Session, count: int = 1) -> List[models.Theme]:
@@ -231,6 +235,91 @@ def test_get_books(db_session: Session):
     assert len(books_with_no_book_theme) == 0
 
 
+def test_get_books_search_filters(db_session: Session):
+    """
+    Test the search filters, sorting and count used by GET /books/search.
+    """
+    theme = create_dummy_themes(db_session, count=1)[0]
+    books_data = [
+        {"title": "Search Fox Tale", "author_name": "Kit", "age_min": 3, "age_max": 5,
+            "is_free": True, "popularity_score": 10, "theme_ids": [theme.id]},
+        {"title": "Search Owl Story", "author_name": "Fox Writer", "age_min": 8, "age_max": 10,
+            "is_premium": True, "popularity_score": 30},
+        {"title": "Search Bear Nap", "author_name": "Kit", "popularity_score": 20},
+    ]
+    created = [crud.book.create_book(db=db_session, book=schemas.BookCreate(**data))
+               for data in books_data]
+
+    # Free text matches title and author, case-insensitively
+    fox_books = crud.book.get_books(db=db_session, q="fox")
+    assert sorted(b.title for b in fox_books) == [
+        "Search Fox Tale", "Search Owl Story"]
+    assert crud.book.count_books(db=db_session, q="fox") == 2
+
+    # Theme names behave like tags
+    by_theme_name = crud.book.get_books(db=db_session, q=theme.name)
+    assert [b.id for b in by_theme_name] == [created[0].id]
+
+    # LIKE wildcards in the query are matched literally
+    assert crud.book.count_books(db=db_session, q="%") == 0
+
+    # Age overlap; books without an age range always match
+    young = crud.book.get_books(db=db_session, q="Search", age_min=4, age_max=6)
+    assert sorted(b.title for b in young) == [
+        "Search Bear Nap", "Search Fox Tale"]
+
+    # Type filter
+    free = crud.book.get_books(
+        db=db_session, q="Search", book_type=schemas.BookTypeFilterEnum.FREE)
+    assert [b.id for b in free] == [created[0].id]
+    subscription = crud.book.get_books(
+        db=db_session, q="Search", book_type=schemas.BookTypeFilterEnum.SUBSCRIPTION)
+    assert [b.id for b in subscription] == [created[2].id]
+
+    # Popularity sort, then pagination over the sorted result
+    by_popularity = crud.book.get_books(
+        db=db_session, q="Search", sort_by=schemas.BookSortEnum.POPULARITY)
+    assert [b.popularity_score for b in by_popularity] == [30, 20, 10]
+    second_page = crud.book.get_books(
+        db=db_session, q="Search", sort_by=schemas.BookSortEnum.POPULARITY, skip=1, limit=1)
+    assert [b.id for b in second_page] == [created[2].id]
+
+
+def test_get_books_with_cursor(db_session: Session):
+    """
+    Test keyset pagination over get_books for both sort orders.
+    """
+    theme = create_dummy_themes(db_session, count=1)[0]
+    created_ids = {
+        crud.book.create_book(db=db_session, book=schemas.BookCreate(
+            title=f"Cursor Book {i}", popularity_score=i % 3, theme_ids=[theme.id])).id
+        for i in range(7)
+    }
+
+    for sort_by in (schemas.BookSortEnum.POPULARITY, schemas.BookSortEnum.NEWEST):
+        offset_order = [b.id for b in crud.book.get_books(
+            db=db_session, theme_id=theme.id, sort_by=sort_by)]
+        seen = []
+        cursor = None
+        while True:
+            page = crud.book.get_books(
+                db=db_session, theme_id=theme.id, sort_by=sort_by, limit=3, cursor=cursor)
+            seen.extend(b.id for b in page)
+            if len(page) < 3:
+                break
+            cursor = crud.book.encode_book_cursor(page[-1], sort_by)
+        assert seen == offset_order
+        assert set(seen) == created_ids
+
+    # A cursor from one ordering is rejected by another
+    popularity_cursor = crud.book.encode_book_cursor(
+        crud.book.get_books(db=db_session, theme_id=theme.id, limit=1)[0],
+        schemas.BookSortEnum.POPULARITY)
+    with pytest.raises(InvalidCursorError):
+        crud.book.get_books(db=db_session, sort_by=schemas.BookSortEnum.NEWEST,
+                            cursor=popularity_cursor)
+
+
 def test_update_book(db_session: Session):
     """
     Test updating an existing book's attributes and theme associations.
@@ -584,3 +673,202 @@ def test_delete_book_toc_item(db_session: Session):
     deleted_toc_retrieved = crud.book.get_book_toc_item(
         db=db_session, toc_item_id=toc_id_to_delete, book_id=book.id)
     assert deleted_toc_retrieved is None
+
+
+@contextmanager
+def count_rows_fetched(db: Session):
+    """Count statements and result rows the session fetches from the database."""
+    stats = {"statements": 0, "rows": 0}
+    engine = db.get_bind().engine
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            stats["statements"] += 1
+            stats["rows"] += max(cursor.rowcount, 0)
+
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def test_get_book_loader_profiles(db_session: Session):
+    themes = create_dummy_themes(db_session, count=3)
+    book = crud.book.create_book(db=db_session, book=schemas.BookCreate(
+        title="Profiled Book", theme_ids=[t.id for t in themes]))
+    for n in range(1, 13):
+        crud.book.create_book_page(db=db_session, page=schemas.BookPageCreate(
+            book_id=book.id, page_number=n, image_url=f"p{n}.png"), book_id=book.id)
+    for n in range(1, 6):
+        crud.book.create_book_toc_item(db=db_session, toc_item=schemas.BookTocItemCreate(
+            book_id=book.id, title=f"Ch{n}", page_number=n), book_id=book.id)
+    db_session.expunge_all()
+
+    # detail: 1 book + 3 themes + 12 pages + 5 TOC rows, not 12 x 5 x 3
+    with count_rows_fetched(db_session) as stats:
+        detail = crud.book.get_book(db=db_session, book_id=book.id)
+        assert len(detail.book_pages) == 12
+        assert len(detail.book_toc_items) == 5
+        assert len(detail.book_themes) == 3
+    assert stats["rows"] == 1 + 3 + 12 + 5
+    db_session.expunge_all()
+
+    # list: book + themes only
+    with count_rows_fetched(db_session) as stats:
+        listed = crud.book.get_book(db=db_session, book_id=book.id, profile="list")
+        assert {bt.theme.name for bt in listed.book_themes} == {t.name for t in themes}
+    assert stats["rows"] == 1 + 3
+    db_session.expunge_all()
+
+    # exists: a single row and no lazy loads allowed afterwards
+    with count_rows_fetched(db_session) as stats:
+        exists = crud.book.get_book(db=db_session, book_id=book.id, profile="exists")
+    assert exists is not None
+    assert stats == {"statements": 1, "rows": 1}
+    with pytest.raises(InvalidRequestError):
+        exists.book_pages
+
+    # Deleting through the exists profile still cascades to pages and TOC
+    crud.book.delete_book(db=db_session, db_book=exists)
+    assert crud.book.get_book_pages_by_book(db=db_session, book_id=book.id) == []
+
+    with pytest.raises(ValueError):
+        crud.book.get_book(db=db_session, book_id=book.id, profile="everything")
+
+
+def test_lru_ttl_cache_counters():
+    from app.core.cache import LRUTTLCache, VersionedCache
+
+    cache = LRUTTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    cache.set("d", 4, ttl=-1)  # already expired
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["evictions"] == 2
+    assert stats["expirations"] == 1
+
+    versioned = VersionedCache("test_versioned", maxsize=10, ttl=60)
+    versioned.set("k", "old")
+    versioned.bump_version()
+    assert versioned.get("k") is None
+
+
+def test_rebuild_related_books(db_session: Session):
+    from app.jobs.related_books import rebuild_related_books
+    from tests.crud.test_crud_user import create_db_user
+
+    themes = create_dummy_themes(db_session, count=2)
+    source = crud.book.create_book(db_session, schemas.BookCreate(
+        title="Related Source", age_min=3, age_max=5, theme_ids=[themes[0].id, themes[1].id]))
+    both_themes = crud.book.create_book(db_session, schemas.BookCreate(
+        title="Related Both Themes", age_min=4, age_max=6, theme_ids=[themes[0].id, themes[1].id]))
+    one_theme = crud.book.create_book(db_session, schemas.BookCreate(
+        title="Related One Theme", age_min=10, age_max=12, theme_ids=[themes[1].id]))
+    co_favorite = crud.book.create_book(db_session, schemas.BookCreate(
+        title="Related Co Favorite"))
+    crud.book.create_book(db_session, schemas.BookCreate(title="Related Unrelated"))
+    user = create_db_user(db=db_session, email_suffix="_related_books")
+    crud.favorite.add_favorite(db_session, user_id=user.id, book_id=source.id)
+    crud.favorite.add_favorite(db_session, user_id=user.id, book_id=co_favorite.id)
+
+    written = rebuild_related_books(db_session, [source.id])
+    assert written == 3
+
+    related = crud.book.get_related_books(db_session, book_id=source.id, limit=10)
+    # 2 themes + age overlap > ln(2) co-favorite + age overlap > 1 theme
+    assert [b.id for b in related] == [both_themes.id, co_favorite.id, one_theme.id]
+    assert crud.book.get_related_books(db_session, book_id=source.id, limit=1)[0].id == both_themes.id
+
+    # Rebuilding replaces the rows instead of adding to them
+    assert rebuild_related_books(db_session, [source.id], per_book=2) == 2
+    assert len(crud.book.get_related_books(db_session, book_id=source.id, limit=10)) == 2
+    # Books outside the rebuilt set are untouched
+    assert crud.book.get_related_books(db_session, book_id=both_themes.id) == []
+
+
+def test_recompute_popularity_scores(db_session: Session):
+    from datetime import datetime, timedelta, timezone
+    from app.jobs.popularity import recompute_popularity_scores, FAVORITE_WEIGHT, SCORE_SCALE
+    from app.core.config import settings
+    from tests.crud.test_crud_user import create_db_user
+
+    now = datetime.now(timezone.utc)
+    fresh = crud.book.create_book(db_session, schemas.BookCreate(title="Popular Fresh"))
+    stale = crud.book.create_book(db_session, schemas.BookCreate(title="Popular Stale"))
+    idle = crud.book.create_book(db_session, schemas.BookCreate(title="Popular Idle", popularity_score=50))
+    user = create_db_user(db=db_session, email_suffix="_popularity")
+    fav_fresh = crud.favorite.add_favorite(db_session, user_id=user.id, book_id=fresh.id)
+    fav_stale = crud.favorite.add_favorite(db_session, user_id=user.id, book_id=stale.id)
+    fav_fresh.favorited_at = now
+    fav_stale.favorited_at = now - timedelta(days=settings.POPULARITY_HALF_LIFE_DAYS)
+    crud.review.create_review(db_session, schemas.ReviewCreate(rating=5), book_id=fresh.id, user_id=user.id)
+    db_session.flush()
+
+    assert recompute_popularity_scores(db_session, now=now) >= 3
+    for book in (fresh, stale, idle):
+        db_session.refresh(book)
+    # One half-life old favorite counts half
+    assert stale.popularity_score == round(FAVORITE_WEIGHT * SCORE_SCALE / 2)
+    assert fresh.popularity_score > FAVORITE_WEIGHT * SCORE_SCALE
+    assert idle.popularity_score == 0
+
+    # A second run with the same inputs leaves every row alone
+    assert recompute_popularity_scores(db_session, now=now) == 0
+
+
+def test_import_catalog(db_session: Session):
+    import json
+    from app.jobs.catalog_import import import_catalog
+
+    theme = crud.theme.create_theme(
+        db_session, schemas.ThemeCreate(name="Import Theme", category="self"))
+    records = [
+        {"external_id": "imp-1", "title": "Imported One", "themes": ["Import Theme"],
+         "pages": [{"page_number": n, "image_url": f"1-{n}.png"} for n in (1, 2, 3)],
+         "toc": [{"title": "Start", "page_number": 1}]},
+        {"external_id": "imp-2", "title": "Imported Two", "popularity_score": 7},
+        {"external_id": "imp-3", "title": ""},  # invalid: empty title
+        {"external_id": "imp-4", "title": "Imported Four", "themes": ["No Such Theme"]},
+    ]
+    lines = [json.dumps(r) + "\n" for r in records] + ["not json\n"]
+
+    result = import_catalog(db_session, lines, chunk_size=2)
+    assert (result.books, result.pages, result.toc_items, result.theme_links) == (3, 3, 1, 1)
+    assert sorted(e.line for e in result.errors) == [3, 4, 5]
+
+    book = db_session.query(models.Book).filter(models.Book.external_id == "imp-1").one()
+    assert [p.page_number for p in book.book_pages] == [1, 2, 3]
+    db_session.refresh(theme)
+    assert theme.book_count == 1
+
+    # Re-importing updates in place; popularity_score is kept, links are not doubled
+    book.popularity_score = 99
+    db_session.flush()
+    again = [
+        {"external_id": "imp-1", "title": "Imported One v2", "popularity_score": 0,
+         "themes": ["Import Theme"], "pages": [{"page_number": 2, "image_url": "new.png"}],
+         "toc": [{"title": "Start", "page_number": 1}]},
+    ]
+    result = import_catalog(db_session, [json.dumps(r) for r in again])
+    assert result.errors == []
+    assert result.theme_links == 0
+    assert result.toc_items == 0
+    db_session.refresh(book)
+    db_session.refresh(theme)
+    assert book.title == "Imported One v2"
+    assert book.popularity_score == 99
+    assert theme.book_count == 1
+    assert db_session.query(models.Book).filter(models.Book.external_id == "imp-1").count() == 1
+    assert {p.page_number: p.image_url for p in book.book_pages}[2] == "new.png"
+
+    # CSV rows reference books by external_id
+    csv_lines = ["book_external_id,page_number,image_url\n", "imp-2,1,2-1.png\n", "missing,1,x.png\n"]
+    result = import_catalog(db_session, csv_lines, format="csv", kind="pages")
+    assert result.pages == 1
+    assert [e.line for e in result.errors] == [3]
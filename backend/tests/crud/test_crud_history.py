@@ -183,3 +183,179 @@ def test_get_learning_activities_all_for_user_including_children(db_session: Ses
 
     # To test fetching all (user + specific child), we already have test_get_learning_activities_by_child
     # To test fetching all (user + all children), the CRUD function would need modification or multiple calls.
+
+
+def test_get_learning_activities_by_user_with_cursor(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_hist_cursor")
+    created_ids = {
+        crud.history.create_learning_activity(
+            db=db_session,
+            activity=create_dummy_learning_activity_data(
+                user_id=db_user.id, description=f"Activity {i}"),
+        ).id
+        for i in range(5)
+    }
+
+    # Rows created in one transaction share created_at, so this also
+    # exercises the id tie-breaker of the keyset.
+    seen = []
+    cursor = None
+    while True:
+        page = crud.history.get_learning_activities_by_user(
+            db=db_session, user_id=db_user.id, limit=2, cursor=cursor)
+        seen.extend(a.id for a in page)
+        if len(page) < 2:
+            break
+        cursor = crud.history.encode_activity_cursor(page[-1])
+
+    assert len(seen) == len(created_ids)
+    assert set(seen) == created_ids
+
+    # Offset pagination still works and agrees with the keyset order
+    offset_page = crud.history.get_learning_activities_by_user(
+        db=db_session, user_id=db_user.id, skip=2, limit=2)
+    assert [a.id for a in offset_page] == seen[2:4]
+
+
+def test_activity_events_are_published_on_commit(db_session: Session):
+    from datetime import timezone
+    from app.core.events import activity_bus
+    from tests.crud.test_crud_review import create_db_book_for_review, create_dummy_review_data
+
+    activity_bus.drain()
+    db_user = create_db_user(db=db_session, email_suffix="_activity_bus")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_activity_bus")
+    book = create_db_book_for_review(db=db_session, title_suffix="_activity_bus")
+    book.total_pages = 3
+    db_session.commit()
+
+    progress = crud.progress.get_or_create_progress(db_session, user_id=db_user.id, book_id=book.id)
+    crud.progress.update_progress_page(db_session, db_progress=progress, current_page=2)
+    crud.progress.update_progress_page(db_session, db_progress=progress, current_page=3)
+    # Re-reading the last page is not another completion
+    crud.progress.update_progress_page(db_session, db_progress=progress, current_page=3)
+    crud.progress.upsert_progress_pages(db_session, [
+        (db_user.id, db_child.id, book.id, 3, datetime.now(timezone.utc))])
+    crud.review.create_review(db_session, review=create_dummy_review_data(), book_id=book.id, user_id=db_user.id)
+    crud.favorite.add_favorite(db_session, user_id=db_user.id, book_id=book.id)
+    assert activity_bus.stats()["pending"] == 0  # Not before the commit
+    db_session.commit()
+
+    assert activity_bus.flush(db_session) == 4
+    activities = db_session.query(models.LearningActivity).filter(
+        models.LearningActivity.user_id == db_user.id).all()
+    assert sorted((a.activity_type.value, str(a.child_id)) for a in activities) == sorted([
+        (ActivityTypeEnum.BOOK_READ_COMPLETED.value, "None"),
+        (ActivityTypeEnum.BOOK_READ_COMPLETED.value, str(db_child.id)),
+        (ActivityTypeEnum.REVIEW_POSTED.value, "None"),
+        (ActivityTypeEnum.BOOK_FAVORITED.value, "None"),
+    ])
+    assert all(a.related_entity_id == book.id for a in activities)
+
+    # An event of a child deleted before the flush is skipped, not retried
+    crud.review.create_review(db_session, review=create_dummy_review_data(), book_id=book.id, user_id=db_user.id)
+    crud.progress.upsert_progress_pages(db_session, [
+        (db_user.id, db_child.id, book.id, 1, datetime.now(timezone.utc))])
+    db_session.commit()
+    crud.progress.upsert_progress_pages(db_session, [
+        (db_user.id, db_child.id, book.id, 3, datetime.now(timezone.utc))])
+    db_session.commit()
+    crud.child.delete_child(db_session, db_child=db_child)
+    orphaned = activity_bus.stats()["orphaned"]
+    assert activity_bus.flush(db_session) == 1
+    assert activity_bus.stats()["orphaned"] == orphaned + 1
+    assert activity_bus.stats()["pending"] == 0
+
+    # Nothing is published for a transaction that is rolled back
+    other_book = create_db_book_for_review(db=db_session, title_suffix="_activity_bus_other")
+    savepoint = db_session.begin_nested()
+    crud.favorite.add_favorite(db_session, user_id=db_user.id, book_id=other_book.id)
+    savepoint.rollback()
+    assert activity_bus.stats()["pending"] == 0
+
+
+def test_learning_activity_daily_rollup(db_session: Session):
+    from datetime import date, timezone
+
+    db_user = create_db_user(db=db_session, email_suffix="_rollup")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_rollup")
+    completed, noted = ActivityTypeEnum.BOOK_READ_COMPLETED, ActivityTypeEnum.NOTE_TAKEN
+
+    def row(child_id, activity_type, created_at):
+        return {"id": uuid.uuid4(), "user_id": db_user.id, "child_id": child_id,
+                "activity_type": activity_type, "description": "x", "created_at": created_at}
+
+    crud.history.create_learning_activities(db_session, [
+        row(db_child.id, completed, datetime(2026, 9, 28, 10, tzinfo=timezone.utc)),  # Monday
+        row(db_child.id, completed, datetime(2026, 9, 28, 23, tzinfo=timezone.utc)),
+        row(db_child.id, completed, datetime(2026, 10, 2, 8, tzinfo=timezone.utc)),
+        row(None, noted, datetime(2026, 10, 5, 8, tzinfo=timezone.utc)),
+    ])
+    # A later batch adds to the same rollup rows
+    crud.history.create_learning_activities(db_session, [
+        row(db_child.id, completed, datetime(2026, 9, 28, 12, tzinfo=timezone.utc))])
+
+    daily = crud.history.get_learning_activity_summary(
+        db_session, db_user.id, schemas.HistoryGranularityEnum.DAY, since=date(2026, 9, 1))
+    assert [(r.period_start, r.child_id, r.activity_type, r.count) for r in daily] == [
+        (date(2026, 9, 28), db_child.id, completed, 3),
+        (date(2026, 10, 2), db_child.id, completed, 1),
+        (date(2026, 10, 5), None, noted, 1),
+    ]
+    weekly = crud.history.get_learning_activity_summary(
+        db_session, db_user.id, schemas.HistoryGranularityEnum.WEEK, since=date(2026, 10, 1))
+    assert [(r.period_start, r.count) for r in weekly] == [(date(2026, 9, 28), 4), (date(2026, 10, 5), 1)]
+    monthly = crud.history.get_learning_activity_summary(
+        db_session, db_user.id, schemas.HistoryGranularityEnum.MONTH, since=date(2026, 9, 15),
+        child_id=db_child.id)
+    assert [(r.period_start, r.count) for r in monthly] == [(date(2026, 9, 1), 3), (date(2026, 10, 1), 1)]
+
+    crud.history.create_learning_activity(db_session, create_dummy_learning_activity_data(
+        user_id=db_user.id, activity_type=noted))
+    today = datetime.now(timezone.utc).date()
+    assert [r.count for r in crud.history.get_learning_activity_summary(
+        db_session, db_user.id, schemas.HistoryGranularityEnum.DAY, since=today)] == [1]
+
+
+def test_archive_learning_activity_partition(db_session: Session, tmp_path):
+    from datetime import date, timezone
+    from app.jobs import archive, partitions
+
+    db_user = create_db_user(db=db_session, email_suffix="_archive")
+    other_user = create_db_user(db=db_session, email_suffix="_archive_other")
+    january = date(2024, 1, 1)
+    partitions.ensure_monthly_partitions(
+        db_session, "learning_activities", months_ahead=0, now=datetime(2024, 1, 15, tzinfo=timezone.utc))
+
+    def row(user_id, day):
+        return {"id": uuid.uuid4(), "user_id": user_id, "activity_type": ActivityTypeEnum.NOTE_TAKEN,
+                "description": f"note {day}", "created_at": datetime(2024, 1, day, tzinfo=timezone.utc)}
+    crud.history.create_learning_activities(
+        db_session, [row(db_user.id, 3), row(db_user.id, 20), row(other_user.id, 5)])
+
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    assert january in archive.archivable_months(db_session, now=now, retention_months=12)
+    assert january not in archive.archivable_months(db_session, now=datetime(2024, 6, 1, tzinfo=timezone.utc),
+                                                    retention_months=12)
+
+    assert archive.archive_partition(db_session, january, archive_dir=tmp_path) == 3
+    assert "learning_activities_y2024m01" not in partitions.existing_partitions(db_session, "learning_activities")
+    assert crud.history.get_learning_activities_by_user(db_session, user_id=db_user.id) == []
+    assert archive.archived_months(tmp_path) == [january]
+
+    # One file per user, so a request reads only its own user's rows
+    assert sorted(p.name for p in archive.archive_path(january, tmp_path).iterdir()) == sorted(
+        f"{u}.jsonl.gz" for u in (db_user.id, other_user.id))
+    archived = archive.read_archived_activities(january, db_user.id, archive_dir=tmp_path)
+    assert [a.description for a in archived] == ["note 20", "note 3"]
+    assert archive.read_archived_activities(january, uuid.uuid4(), archive_dir=tmp_path) == []
+    assert archive.read_archived_activities(date(2024, 2, 1), db_user.id, archive_dir=tmp_path) is None
+
+    # The rollup keeps the archived month's counts
+    summary = crud.history.get_learning_activity_summary(
+        db_session, db_user.id, schemas.HistoryGranularityEnum.MONTH, since=january)
+    assert [(r.period_start, r.count) for r in summary] == [(january, 2)]
+
+    # A late row for the archived month lands in the default partition
+    crud.history.create_learning_activities(db_session, [row(db_user.id, 25)])
+    assert archive.count_unarchived_late_rows(db_session, now=now, retention_months=12) == 1
@@ -325,3 +325,149 @@ def test_delete_note(db_session: Session):
         delete_non_existent_result = crud.progress.delete_note(
             db=db_session, db_note=non_existent_db_note)
     assert delete_non_existent_result is None
+
+
+def test_progress_buffer_coalesces_page_turns(db_session: Session):
+    from datetime import timedelta
+    from app.core.progress_buffer import PageTurn, ProgressBuffer
+
+    db_user = create_db_user(db=db_session, email_suffix="_prog_buffer_user")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_prog_buffer")
+    book = create_db_book_for_review(db=db_session, title_suffix="_prog_buffer_book")
+    other_book = create_db_book_for_review(db=db_session, title_suffix="_prog_buffer_other")
+    existing = crud.progress.get_or_create_progress(db_session, user_id=db_user.id, book_id=book.id)
+    t0 = existing.last_read_at
+
+    buffer = ProgressBuffer()
+    for page in (2, 3, 4):
+        buffer.record((db_user.id, None, book.id), PageTurn(page, t0 + timedelta(seconds=page)))
+    # An out-of-order older turn loses
+    buffer.record((db_user.id, None, book.id), PageTurn(1, t0 + timedelta(seconds=1)))
+    buffer.record((db_user.id, db_child.id, book.id), PageTurn(7, t0 + timedelta(seconds=1)))
+    buffer.record((db_user.id, None, other_book.id), PageTurn(9, t0 + timedelta(seconds=1)))
+    assert buffer.pending((db_user.id, None, book.id)).current_page == 4
+
+    assert buffer.flush(db_session) == 3
+    assert buffer.stats() == {"pending": 0, "recorded": 6, "written": 3, "dropped": 0}
+    db_session.refresh(existing)
+    assert existing.current_page == 4
+    assert crud.progress.get_progress(db_session, db_user.id, book.id, child_id=db_child.id).current_page == 7
+    assert crud.progress.get_progress(db_session, db_user.id, other_book.id).current_page == 9
+    assert db_session.query(models.UserBookProgress).filter(
+        models.UserBookProgress.user_id == db_user.id).count() == 3
+
+    # A buffered turn older than the stored row does not move it backwards
+    buffer.record((db_user.id, None, book.id), PageTurn(2, t0))
+    buffer.flush(db_session)
+    db_session.refresh(existing)
+    assert existing.current_page == 4
+
+    # A turn for a book deleted before the flush is dropped, the rest written
+    crud.book.delete_book(db_session, db_book=other_book)
+    buffer.record((db_user.id, None, other_book.id), PageTurn(10, t0 + timedelta(seconds=10)))
+    buffer.record((db_user.id, None, book.id), PageTurn(5, t0 + timedelta(seconds=10)))
+    assert buffer.flush(db_session) == 1
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["pending"] == 0
+    db_session.refresh(existing)
+    assert existing.current_page == 5
+
+
+def test_get_or_create_progress_is_idempotent(db_session: Session):
+    from sqlalchemy.exc import IntegrityError
+
+    db_user = create_db_user(db=db_session, email_suffix="_prog_upsert_user")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_prog_upsert")
+    book = create_db_book_for_review(db=db_session, title_suffix="_prog_upsert_book")
+
+    first = crud.progress.get_or_create_progress(db_session, user_id=db_user.id, book_id=book.id)
+    again = crud.progress.get_or_create_progress(db_session, user_id=db_user.id, book_id=book.id)
+    for_child = crud.progress.get_or_create_progress(
+        db_session, user_id=db_user.id, book_id=book.id, child_id=db_child.id)
+    assert first.id == again.id
+    assert for_child.id != first.id
+    assert first.current_page == 1
+
+    # NULL child_id takes part in the unique key
+    with pytest.raises(IntegrityError):
+        with db_session.begin_nested():
+            db_session.add(models.UserBookProgress(user_id=db_user.id, book_id=book.id))
+
+
+def test_search_notes(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_note_search_user")
+    other_user = create_db_user(db=db_session, email_suffix="_note_search_other")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_note_search")
+    book = create_db_book_for_review(db=db_session, title_suffix="_note_search_book")
+    own = crud.progress.get_or_create_progress(db_session, user_id=db_user.id, book_id=book.id)
+    child = crud.progress.get_or_create_progress(
+        db_session, user_id=db_user.id, book_id=book.id, child_id=db_child.id)
+    foreign = crud.progress.get_or_create_progress(db_session, user_id=other_user.id, book_id=book.id)
+
+    crud.progress.create_note(db_session, progress_id=own.id, page_number=1, text="Why is the sky blue?")
+    crud.progress.create_note(db_session, progress_id=child.id, page_number=2, text="The sky & \"sea\" were dark")
+    crud.progress.create_note(db_session, progress_id=own.id, page_number=3, text="Nothing to see here")
+    crud.progress.create_note(db_session, progress_id=foreign.id, page_number=1, text="sky sky sky")
+
+    hits = crud.progress.search_notes(db_session, user_id=db_user.id, query="sky")
+    assert sorted(h.page_number for h in hits) == [1, 2]
+    assert {h.book_title for h in hits} == {book.title}
+    child_hit = next(h for h in hits if h.child_id == db_child.id)
+    assert "<mark>sky</mark> &amp; &quot;sea&quot; were dark" in child_hit.snippet
+
+    only_child = crud.progress.search_notes(db_session, user_id=db_user.id, query="sky", child_id=db_child.id)
+    assert [h.page_number for h in only_child] == [2]
+    assert crud.progress.search_notes(db_session, user_id=db_user.id, query="sky -blue") == [only_child[0]]
+    assert crud.progress.search_notes(db_session, user_id=db_user.id, query="???") == []
+
+    # Japanese has no spaces between words; any run of characters matches
+    crud.progress.create_note(db_session, progress_id=child.id, page_number=4, text="きょうはねこをみた。")
+    for query in ("ねこ", "\"ねこをみた\"", "ねこ みた"):
+        hits_ja = crud.progress.search_notes(db_session, user_id=db_user.id, query=query)
+        assert [h.page_number for h in hits_ja] == [4], query
+    assert "きょうは<mark>ねこ</mark>をみた" in crud.progress.search_notes(
+        db_session, user_id=db_user.id, query="ねこ")[0].snippet
+    assert crud.progress.search_notes(db_session, user_id=db_user.id, query="ねみ") == []
+    assert crud.progress.search_notes(db_session, user_id=db_user.id, query="ねこ -みた") == []
+    db_session.query(models.UserBookNote).filter(models.UserBookNote.page_number == 4).delete()
+
+    # Keyset pagination walks both hits without repeats
+    first = crud.progress.search_notes(db_session, user_id=db_user.id, query="sky", limit=1)
+    cursor = crud.progress.encode_note_search_cursor(first[0])
+    second = crud.progress.search_notes(db_session, user_id=db_user.id, query="sky", limit=1, cursor=cursor)
+    assert {first[0].id, second[0].id} == {h.id for h in hits}
+    cursor = crud.progress.encode_note_search_cursor(second[0])
+    assert crud.progress.search_notes(db_session, user_id=db_user.id, query="sky", limit=1, cursor=cursor) == []
+
+
+def test_get_reading_shelf(db_session: Session):
+    from datetime import timedelta, timezone
+
+    db_user = create_db_user(db=db_session, email_suffix="_shelf_user")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_shelf")
+    books = [create_db_book_for_review(db=db_session, title_suffix=f"_shelf_{i}") for i in range(4)]
+    for book, total in zip(books, (10, 20, 5, None)):
+        book.total_pages = total
+    t0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    crud.progress.upsert_progress_pages(db_session, [
+        (db_user.id, None, books[0].id, 5, t0 + timedelta(hours=1)),
+        (db_user.id, db_child.id, books[1].id, 2, t0 + timedelta(hours=3)),
+        (db_user.id, None, books[2].id, 5, t0 + timedelta(hours=4)),  # finished
+        (db_user.id, None, books[3].id, 7, t0 + timedelta(hours=2)),
+    ])
+
+    shelf = crud.progress.get_reading_shelf(db_session, user_id=db_user.id)
+    assert [item.book.id for item in shelf] == [books[1].id, books[3].id, books[0].id]
+    assert [item.percent_complete for item in shelf] == [10.0, None, 50.0]
+    assert shelf[0].child_id == db_child.id
+    assert shelf[2].current_page == 5 and shelf[2].total_pages == 10
+
+    with_finished = crud.progress.get_reading_shelf(db_session, user_id=db_user.id, include_finished=True)
+    assert with_finished[0].book.id == books[2].id and with_finished[0].percent_complete == 100.0
+    assert [i.book.id for i in crud.progress.get_reading_shelf(
+        db_session, user_id=db_user.id, child_id=db_child.id)] == [books[1].id]
+
+    first = crud.progress.get_reading_shelf(db_session, user_id=db_user.id, limit=2)
+    rest = crud.progress.get_reading_shelf(
+        db_session, user_id=db_user.id, limit=2, cursor=crud.progress.encode_shelf_cursor(first[-1]))
+    assert [i.book.id for i in first + rest] == [i.book.id for i in shelf]
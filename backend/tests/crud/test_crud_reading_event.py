@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.jobs import partitions
+
+from tests.crud.test_crud_user import create_db_user
+from tests.crud.test_crud_child import create_db_child
+from tests.crud.test_crud_review import create_db_book_for_review
+
+
+def _partition_of(db: Session, event_id: uuid.UUID) -> str:
+    return db.scalar(text("SELECT tableoid::regclass::text FROM reading_events WHERE id = :id"),
+                     {"id": event_id})
+
+
+def test_create_reading_events_and_partitions(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_reading_events")
+    db_child = create_db_child(db=db_session, user_id=db_user.id, name_suffix="_reading_events")
+    book = create_db_book_for_review(db=db_session, title_suffix="_reading_events")
+    now = datetime(2031, 5, 20, 12, 0, tzinfo=timezone.utc)
+
+    events = [
+        schemas.ReadingEventCreate(book_id=book.id, child_id=db_child.id, page_number=page,
+                                   dwell_ms=1500, occurred_at=now - timedelta(minutes=10 - page))
+        for page in (1, 2, 3)
+    ]
+    # From a device clock ahead of the server
+    events.append(schemas.ReadingEventCreate(book_id=book.id, page_number=4, dwell_ms=0,
+                                             occurred_at=now + timedelta(days=3)))
+    assert crud.reading_event.invalid_event_reference(db_session, db_user.id, events) is None
+    rows = crud.reading_event.event_rows(db_user.id, events, now=now)
+    assert crud.reading_event.create_reading_events(db_session, rows) == 4
+
+    stored = crud.reading_event.get_reading_events_by_user(
+        db_session, db_user.id, since=now - timedelta(hours=1))
+    assert [e.page_number for e in stored] == [4, 3, 2, 1]
+    assert stored[0].occurred_at == now
+    # No monthly partition yet: the default one caught the rows
+    assert {_partition_of(db_session, e.id) for e in stored} == {"reading_events_default"}
+
+    created = partitions.ensure_monthly_partitions(db_session, "reading_events", months_ahead=1, now=now)
+    assert created == ["reading_events_y2031m05", "reading_events_y2031m06"]
+    # Stray rows were moved into their month
+    assert {_partition_of(db_session, e.id) for e in stored} == {"reading_events_y2031m05"}
+    assert partitions.ensure_monthly_partitions(db_session, "reading_events", months_ahead=1, now=now) == []
+
+    late = crud.reading_event.event_rows(db_user.id, [schemas.ReadingEventCreate(
+        book_id=book.id, page_number=5, dwell_ms=10, occurred_at=datetime(2031, 6, 1, tzinfo=timezone.utc))],
+        now=now + timedelta(days=30))
+    crud.reading_event.create_reading_events(db_session, late)
+    assert _partition_of(db_session, late[0]["id"]) == "reading_events_y2031m06"
+
+
+def test_invalid_event_reference(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_reading_events_ref")
+    other_user = create_db_user(db=db_session, email_suffix="_reading_events_ref_other")
+    other_child = create_db_child(db=db_session, user_id=other_user.id, name_suffix="_reading_events_ref")
+    book = create_db_book_for_review(db=db_session, title_suffix="_reading_events_ref")
+    at = datetime.now(timezone.utc)
+
+    unknown_book = [schemas.ReadingEventCreate(book_id=uuid.uuid4(), page_number=1, dwell_ms=1, occurred_at=at)]
+    assert crud.reading_event.invalid_event_reference(db_session, db_user.id, unknown_book) == "Book not found"
+    foreign_child = [schemas.ReadingEventCreate(book_id=book.id, child_id=other_child.id,
+                                                page_number=1, dwell_ms=1, occurred_at=at)]
+    assert crud.reading_event.invalid_event_reference(db_session, db_user.id, foreign_child) == "Child not found"
+    assert db_session.query(models.ReadingEvent).count() == 0
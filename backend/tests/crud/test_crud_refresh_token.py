@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import crud, models
+from app.core.revocation import RevokedSessions
+
+from tests.crud.test_crud_user import create_db_user
+
+
+def test_refresh_token_rotation_and_reuse(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_refresh")
+    raw, db_token = crud.refresh_token.create_refresh_token(db_session, db_user.id)
+    assert db_token.token_hash == crud.refresh_token.hash_refresh_token(raw) != raw
+
+    used, revoked = crud.refresh_token.use_refresh_token(db_session, raw)
+    assert (used.id, revoked) == (db_token.id, None)
+    next_raw, next_token = crud.refresh_token.create_refresh_token(db_session, db_user.id, family_id=used.family_id)
+
+    # Reuse revokes the family, including the token issued after it
+    assert crud.refresh_token.use_refresh_token(db_session, raw) == (None, db_token.family_id)
+    assert crud.refresh_token.use_refresh_token(db_session, next_raw) == (None, None)
+    assert crud.refresh_token.use_refresh_token(db_session, "unknown") == (None, None)
+
+
+def test_revoked_sessions_reload(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_revoked")
+    now = datetime.now(timezone.utc)
+    revoked = RevokedSessions()
+    assert revoked.reload(db_session, now=now) == 0
+
+    _, db_token = crud.refresh_token.create_refresh_token(db_session, db_user.id)
+    crud.refresh_token.revoke_session(db_session, db_token.family_id, db_user.id)
+    assert revoked.reload(db_session, now=now) == 1
+    assert revoked.is_revoked(db_token.family_id)
+    # Incremental: later reloads only re-read the overlap window
+    assert revoked.reload(db_session, now=now + timedelta(minutes=5)) == 1
+    assert revoked.reload(db_session, now=now + timedelta(minutes=5)) == 1
+
+    # Once no access token of the session can be alive, it is forgotten
+    later = now + timedelta(minutes=30)
+    assert revoked.reload(db_session, now=later) == 0
+    assert not revoked.is_revoked(db_token.family_id)
+
+    db_session.execute(update(models.RefreshToken).where(models.RefreshToken.id == db_token.id)
+                       .values(expires_at=now - timedelta(seconds=1)))
+    assert crud.refresh_token.delete_expired(db_session, now=later) == 2
+    assert db_session.get(models.RevokedSession, db_token.family_id, populate_existing=True) is None
@@ -262,3 +262,37 @@ def test_delete_review(db_session: Session):
         still_exists_check = crud.review.get_review(
             db=db_session, review_id=review_for_original_user_again.id)
         assert still_exists_check is None
+
+
+def test_review_summary_follows_review_writes(db_session: Session):
+    db_book = create_db_book_for_review(db=db_session, title_suffix="_review_stats_book")
+    other_book = create_db_book_for_review(db=db_session, title_suffix="_review_stats_other")
+    users = [create_db_user(db=db_session, email_suffix=f"_review_stats_{i}") for i in range(3)]
+
+    summary = crud.review.get_review_summary_by_book(db_session, book_id=db_book.id)
+    assert summary.total_reviews == 0
+    assert summary.average_rating == 0.0
+    assert summary.rating_histogram == {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    reviews = [
+        crud.review.create_review(db_session, create_dummy_review_data(rating=rating),
+                                  book_id=db_book.id, user_id=user.id)
+        for rating, user in zip([5, 4, 4], users)
+    ]
+    summary = crud.review.get_review_summary_by_book(db_session, book_id=db_book.id)
+    assert summary.total_reviews == 3
+    assert summary.average_rating == pytest.approx(13 / 3)
+    assert summary.rating_histogram == {1: 0, 2: 0, 3: 0, 4: 2, 5: 1}
+
+    crud.review.update_review(db_session, reviews[0], schemas.ReviewUpdate(rating=1))
+    crud.review.update_review(db_session, reviews[1], schemas.ReviewUpdate(text="Text only"))
+    crud.review.delete_review(db_session, reviews[2])
+    summary = crud.review.get_review_summary_by_book(db_session, book_id=db_book.id)
+    assert summary.total_reviews == 2
+    assert summary.average_rating == pytest.approx(2.5)
+    assert summary.rating_histogram == {1: 1, 2: 0, 3: 0, 4: 1, 5: 0}
+
+    summaries = crud.review.get_review_summaries_by_books(
+        db_session, [db_book.id, other_book.id])
+    assert summaries[db_book.id] == summary
+    assert summaries[other_book.id].total_reviews == 0
@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import crud, models, schemas
+from app.core.config import settings
+from app.core.pagination import InvalidCursorError, encode_cursor
+
+from tests.crud.test_crud_user import create_db_user
+from tests.crud.test_crud_review import create_db_book_for_review
+
+
+def test_apply_sync_batch(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_sync_user")
+    other_user = create_db_user(db=db_session, email_suffix="_sync_other")
+    book = create_db_book_for_review(db=db_session, title_suffix="_sync_book")
+    other_book = create_db_book_for_review(db=db_session, title_suffix="_sync_other_book")
+    foreign_progress = crud.progress.get_or_create_progress(db_session, other_user.id, book.id)
+    foreign_note = crud.progress.create_note(db_session, foreign_progress.id, page_number=1, text="Not yours")
+    kept_note, dropped_note = uuid.uuid4(), uuid.uuid4()
+    earlier = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    mutations = [
+        {"op": "set_page", "book_id": book.id, "page_number": 4},
+        {"op": "set_page", "book_id": book.id, "page_number": 2, "occurred_at": earlier},
+        {"op": "set_page", "book_id": other_book.id, "page_number": 9},
+        {"op": "add_bookmark", "book_id": book.id, "page_number": 3},
+        {"op": "add_bookmark", "book_id": book.id, "page_number": 5},
+        {"op": "remove_bookmark", "book_id": book.id, "page_number": 5},
+        {"op": "add_note", "book_id": book.id, "note_id": kept_note, "page_number": 3, "text": "Draft"},
+        {"op": "update_note", "book_id": book.id, "note_id": kept_note, "text": "Final"},
+        {"op": "add_note", "book_id": book.id, "note_id": dropped_note, "page_number": 1, "text": "Oops"},
+        {"op": "delete_note", "book_id": book.id, "note_id": dropped_note},
+        {"op": "add_note", "book_id": book.id, "note_id": dropped_note, "page_number": 1, "text": "Again"},
+        {"op": "update_note", "book_id": book.id, "note_id": foreign_note.id, "text": "Hijack"},
+        {"op": "set_page", "book_id": uuid.uuid4(), "page_number": 1},
+    ]
+    results = crud.sync.apply_sync_batch(
+        db_session, db_user.id, [schemas.SyncMutation(**m) for m in mutations])
+
+    assert [r.index for r in results] == list(range(len(mutations)))
+    assert [r.status.value for r in results] == ["ok"] * 10 + ["conflict", "not_found", "not_found"]
+
+    progress = crud.progress.get_progress(db_session, db_user.id, book.id)
+    assert progress.current_page == 4  # the older offline page turn loses
+    assert crud.progress.get_progress(db_session, db_user.id, other_book.id).current_page == 9
+    assert [b.page_number for b in crud.progress.get_bookmarks_by_progress(db_session, progress.id)] == [3]
+    notes = crud.progress.get_notes_by_progress(db_session, progress.id)
+    assert [(n.id, n.text) for n in notes] == [(kept_note, "Final")]
+    db_session.refresh(foreign_note)
+    assert foreign_note.text == "Not yours"
+
+    # Rejected mutations leave no progress row behind; an offline page turn
+    # on a book without one creates it with its own time
+    untouched_book = create_db_book_for_review(db=db_session, title_suffix="_sync_untouched")
+    fresh_book = create_db_book_for_review(db=db_session, title_suffix="_sync_fresh")
+    results = crud.sync.apply_sync_batch(db_session, db_user.id, [
+        schemas.SyncMutation(op="update_note", book_id=untouched_book.id, note_id=uuid.uuid4(), text="?"),
+        schemas.SyncMutation(op="set_page", book_id=fresh_book.id, page_number=6, occurred_at=earlier),
+    ])
+    assert [r.status.value for r in results] == ["not_found", "ok"]
+    assert crud.progress.get_progress(db_session, db_user.id, untouched_book.id) is None
+    fresh_progress = crud.progress.get_progress(db_session, db_user.id, fresh_book.id)
+    assert (fresh_progress.current_page, fresh_progress.last_read_at) == (6, earlier)
+
+    # Replaying the same batch changes nothing
+    crud.sync.apply_sync_batch(db_session, db_user.id, [schemas.SyncMutation(**m) for m in mutations[3:8]])
+    assert len(crud.progress.get_bookmarks_by_progress(db_session, progress.id)) == 1
+    assert len(crud.progress.get_notes_by_progress(db_session, progress.id)) == 1
+
+    delete_results = crud.sync.apply_sync_batch(db_session, db_user.id, [
+        schemas.SyncMutation(op="delete_note", book_id=book.id, note_id=kept_note)])
+    assert delete_results[0].status == schemas.SyncStatusEnum.OK
+    assert db_session.get(models.UserBookNote, kept_note, populate_existing=True) is None
+
+
+def test_get_changes_since(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_feed_user")
+    other_user = create_db_user(db=db_session, email_suffix="_feed_other")
+    book = create_db_book_for_review(db=db_session, title_suffix="_feed_book")
+    other_book = create_db_book_for_review(db=db_session, title_suffix="_feed_other_book")
+    progress = crud.progress.get_or_create_progress(db_session, db_user.id, book.id)
+    other_progress = crud.progress.get_or_create_progress(db_session, db_user.id, other_book.id)
+    bookmark = crud.progress.create_bookmark(db_session, progress.id, page_number=2)
+    note = crud.progress.create_note(db_session, progress.id, page_number=2, text="Before")
+    crud.progress.get_or_create_progress(db_session, other_user.id, book.id)
+
+    full = crud.sync.get_changes_since(db_session, db_user.id)
+    assert {p.id for p in full.progress} == {progress.id, other_progress.id}
+    assert [(b.id, b.book_id) for b in full.bookmarks] == [(bookmark.id, book.id)]
+    assert [n.id for n in full.notes] == [note.id]
+    assert full.deleted == []
+
+    # Everything above is one transaction, still running; make those rows
+    # look committed long ago so that only later writes count as changes
+    for model in (models.UserBookProgress, models.UserBookBookmark, models.UserBookNote):
+        db_session.execute(update(model).values(sync_version=1))
+    since = full.next_since
+    assert crud.sync.get_changes_since(db_session, db_user.id, since).notes == []
+
+    crud.progress.update_note(db_session, note, text="After")
+    crud.progress.delete_bookmark(db_session, bookmark)
+    crud.progress.upsert_progress_pages(db_session, [
+        (db_user.id, None, other_book.id, 5, datetime.now(timezone.utc))])
+    delta = crud.sync.get_changes_since(db_session, db_user.id, since)
+    assert [p.id for p in delta.progress] == [other_progress.id]
+    assert delta.bookmarks == []
+    assert [(n.id, n.text) for n in delta.notes] == [(note.id, "After")]
+    assert [(d.entity_type, d.entity_id) for d in delta.deleted] == [
+        (models.SyncEntityEnum.BOOKMARK, bookmark.id)]
+
+    # Deleting the book leaves a tombstone for each user's progress row
+    crud.book.delete_book(db_session, book)
+    deleted = crud.sync.get_changes_since(db_session, db_user.id, since).deleted
+    assert (models.SyncEntityEnum.PROGRESS, progress.id) in {(d.entity_type, d.entity_id) for d in deleted}
+
+    with pytest.raises(InvalidCursorError):
+        crud.sync.get_changes_since(db_session, db_user.id, "bogus")
+
+
+def test_expired_tombstones_force_full_resync(db_session: Session):
+    db_user = create_db_user(db=db_session, email_suffix="_tombstone_user")
+    book = create_db_book_for_review(db=db_session, title_suffix="_tombstone_book")
+    progress = crud.progress.get_or_create_progress(db_session, db_user.id, book.id)
+    crud.progress.delete_bookmark(db_session, crud.progress.create_bookmark(db_session, progress.id, page_number=3))
+    since = crud.sync.get_changes_since(db_session, db_user.id).next_since
+    assert crud.sync.get_changes_since(db_session, db_user.id, since).full_resync is False
+
+    old = datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+    db_session.execute(update(models.SyncTombstone).where(
+        models.SyncTombstone.user_id == db_user.id).values(deleted_at=old))
+    assert crud.sync.delete_expired_tombstones(db_session) >= 1
+    assert db_session.query(models.SyncTombstone).filter_by(user_id=db_user.id).count() == 0
+
+    # The deletion is gone from the feed, so an old token gets everything again
+    stale = encode_cursor("sync:since", 1, old)
+    changes = crud.sync.get_changes_since(db_session, db_user.id, stale)
+    assert changes.full_resync is True
+    assert [p.id for p in changes.progress] == [progress.id]
+    assert changes.deleted == []
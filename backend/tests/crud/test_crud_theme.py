@@ -192,3 +192,38 @@ def test_delete_theme(db_session: Session):
     db_theme = db_session.query(models.Theme).filter(
         models.Theme.id == theme_id_to_delete).first()
     assert db_theme is None
+
+
+def test_theme_book_count_follows_book_writes(db_session: Session):
+    theme_a = create_db_theme(db=db_session, name_suffix="_count_a")
+    theme_b = create_db_theme(db=db_session, name_suffix="_count_b")
+    assert theme_a.book_count == 0
+
+    book1 = crud.book.create_book(db=db_session, book=schemas.BookCreate(
+        title="Counted 1", theme_ids=[theme_a.id]))
+    book2 = crud.book.create_book(db=db_session, book=schemas.BookCreate(
+        title="Counted 2", theme_ids=[theme_a.id, theme_b.id]))
+    db_session.refresh(theme_a)
+    db_session.refresh(theme_b)
+    assert (theme_a.book_count, theme_b.book_count) == (2, 1)
+
+    # Move book1 from theme A to theme B
+    crud.book.update_book(db=db_session, db_book=book1,
+                          book_in=schemas.BookUpdate(theme_ids=[theme_b.id]))
+    db_session.refresh(theme_a)
+    db_session.refresh(theme_b)
+    assert (theme_a.book_count, theme_b.book_count) == (1, 2)
+
+    crud.book.delete_book(db=db_session, db_book=book2)
+    db_session.refresh(theme_a)
+    db_session.refresh(theme_b)
+    assert (theme_a.book_count, theme_b.book_count) == (0, 1)
+
+    # The counter agrees with the links it replaces
+    for theme in (theme_a, theme_b):
+        links = db_session.query(models.BookTheme).filter(
+            models.BookTheme.theme_id == theme.id).count()
+        assert theme.book_count == links
+
+    listed = {t.id: t for t in crud.theme.get_themes(db=db_session, limit=100)}
+    assert listed[theme_b.id].book_count == 1
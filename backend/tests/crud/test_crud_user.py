@@ -1,8 +1,10 @@
 import pytest
+import threading
 import uuid
 from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.crud.crud_user import get_password_hash, verify_password  # Corrected import
+from app.core.password_pool import PasswordHashingPool, PasswordPoolSaturatedError
 
 # Helper function to create user data for tests
 
@@ -244,3 +246,48 @@ def test_update_user_settings(db_session: Session):
         models.UserSettings.user_id == db_user.id).first()
     assert db_settings_verify.notify_platform_announcements is True
     assert db_settings_verify.notify_weekly_summary is False
+
+
+def test_password_hashing_pool_bounds_queue():
+    pool = PasswordHashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+    waiting = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+    for t in waiting:
+        t.start()
+    while pool.stats()["in_flight"] < 2:
+        release.wait(0.01)
+
+    # One call running, one queued: the third is shed
+    with pytest.raises(PasswordPoolSaturatedError):
+        pool.run(len, "x")
+    release.set()
+    for t in waiting:
+        t.join()
+
+    assert pool.run(len, "abc") == 3
+    stats = pool.stats()
+    assert (stats["completed"], stats["rejected"], stats["peak_queued"], stats["in_flight"]) == (3, 1, 1, 0)
+    pool.shutdown()
+
+
+def test_authenticate_rehashes_outdated_hash(db_session: Session):
+    from passlib.hash import bcrypt
+    from app.core.config import settings
+    from app.core.hashing import MIN_ROUNDS, calibrate
+
+    db_user = create_db_user(db=db_session, email_suffix="_rehash")
+    password = create_dummy_user_data(email_suffix="_rehash").password
+    db_user.hashed_password = bcrypt.using(rounds=4).hash(password)
+    db_session.flush()
+
+    assert crud.user.authenticate(db_session, db_user.email, "wrong password") is None
+    assert db_user.hashed_password.startswith("$2b$04$")
+
+    assert crud.user.authenticate(db_session, db_user.email, password).id == db_user.id
+    assert db_user.hashed_password.startswith(f"$2b${settings.PASSWORD_BCRYPT_ROUNDS:02d}$")
+    assert verify_password(password, db_user.hashed_password)
+    assert crud.user.authenticate(db_session, "nobody@example.com", password) is None
+
+    # Nothing meets an impossible target, so the floor is kept
+    rounds, timings = calibrate(target_ms=0, samples=1)
+    assert rounds == MIN_ROUNDS and [r for r, _ in timings] == [MIN_ROUNDS]
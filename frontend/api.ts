@@ -1,14 +1,70 @@
-export async function api<T>(path: string, options: RequestInit = {}): Promise<T> {
+import { User } from './types';
+
+export interface TokenResponse {
+  access_token: string;
+  refresh_token: string;
+  user: User;
+}
+
+async function request(path: string, options: RequestInit): Promise<Response> {
   const token = localStorage.getItem('authToken');
   const headers: Record<string, string> = {
     'Content-Type': 'application/json',
     ...(options.headers || {}) as Record<string, string>
   };
   if (token) headers['Authorization'] = `Bearer ${token}`;
-  const res = await fetch(`${import.meta.env.VITE_API_BASE_URL}${path}`, {
+  return fetch(`${import.meta.env.VITE_API_BASE_URL}${path}`, {
     ...options,
     headers
   });
+}
+
+export function storeSession(data: TokenResponse): void {
+  localStorage.setItem('authToken', data.access_token);
+  localStorage.setItem('refreshToken', data.refresh_token);
+  localStorage.setItem('authUser', JSON.stringify(data.user));
+}
+
+export function clearSession(): void {
+  localStorage.removeItem('authUser');
+  localStorage.removeItem('authToken');
+  localStorage.removeItem('refreshToken');
+}
+
+let refreshing: Promise<TokenResponse> | null = null;
+
+// Each refresh token works once and reusing one ends the session, so
+// concurrent callers share a single refresh.
+export function refreshSession(): Promise<TokenResponse> {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    refreshing = (async () => {
+      if (!refreshToken) throw new Error('No refresh token');
+      const res = await request('/auth/refresh', {
+        method: 'POST',
+        body: JSON.stringify({ refresh_token: refreshToken })
+      });
+      if (!res.ok) throw new Error(await res.text());
+      const data = await res.json() as TokenResponse;
+      storeSession(data);
+      return data;
+    })().finally(() => { refreshing = null; });
+  }
+  return refreshing;
+}
+
+export async function api<T>(path: string, options: RequestInit = {}): Promise<T> {
+  let res = await request(path, options);
+  // Access tokens are short-lived: renew once and retry
+  if (res.status === 401 && !path.startsWith('/auth/') && localStorage.getItem('refreshToken')) {
+    try {
+      await refreshSession();
+      res = await request(path, options);
+    } catch {
+      // Session ended; report the original 401
+    }
+  }
   if (!res.ok) throw new Error(await res.text());
+  if (res.status === 204) return undefined as T;
   return res.json() as Promise<T>;
 }
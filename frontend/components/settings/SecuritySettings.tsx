@@ -3,8 +3,10 @@ import Input from '../ui/Input';
 import Button from '../ui/Button';
 import { LockClosedIcon, GoogleIcon, TwitterIcon } from '../../assets/icons';
 import { api } from '../../api';
+import { useAuth } from '../../hooks/useAuth';
 
 const SecuritySettings: React.FC = () => {
+  const { user, login, logout } = useAuth();
   const [currentPassword, setCurrentPassword] = useState('');
   const [newPassword, setNewPassword] = useState('');
   const [confirmNewPassword, setConfirmNewPassword] = useState('');
@@ -32,6 +34,8 @@ const SecuritySettings: React.FC = () => {
         method: 'PUT',
         body: JSON.stringify({ current_password: currentPassword, new_password: newPassword })
       });
+      // The change ends every session, this one included: start a new one
+      if (user) await login(user.email, newPassword).catch(() => logout());
       setPasswordSuccess('パスワードが正常に変更されました。');
       setCurrentPassword('');
       setNewPassword('');
@@ -1,7 +1,7 @@
 
 import React, { createContext, useContext, useState, useEffect, useCallback } from 'react';
 import { User } from '../types';
-import { api } from '../api';
+import { api, clearSession, refreshSession, storeSession, TokenResponse } from '../api';
 
 interface AuthContextType {
   isAuthenticated: boolean;
@@ -21,16 +21,15 @@ export const AuthProvider: React.FC<{children: React.ReactNode}> = ({ children }
   // Check for stored session on mount
   useEffect(() => {
     const storedUser = localStorage.getItem('authUser');
-    const token = localStorage.getItem('authToken');
-    if (storedUser && token) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (storedUser && refreshToken) {
       setUser(JSON.parse(storedUser));
-      api<{ access_token: string; user: User }>('/auth/refresh', { method: 'POST' })
-        .then(data => {
-          localStorage.setItem('authToken', data.access_token);
-          localStorage.setItem('authUser', JSON.stringify(data.user));
-          setUser(data.user);
-        })
+      refreshSession()
+        .then(data => setUser(data.user))
         .catch(() => logout());
+    } else if (storedUser) {
+      // Stored before refresh tokens: log in again
+      logout();
     }
     setLoading(false); // Finished loading
   }, []);
@@ -38,7 +37,7 @@ export const AuthProvider: React.FC<{children: React.ReactNode}> = ({ children }
   const login = useCallback(async (email: string, pass: string): Promise<void> => {
     setLoading(true);
     try {
-      const data = await api<{ access_token: string; user: User }>(
+      const data = await api<TokenResponse>(
         '/auth/login',
         {
           method: 'POST',
@@ -46,8 +45,7 @@ export const AuthProvider: React.FC<{children: React.ReactNode}> = ({ children }
           body: new URLSearchParams({ username: email, password: pass })
         }
       );
-      localStorage.setItem('authToken', data.access_token);
-      localStorage.setItem('authUser', JSON.stringify(data.user));
+      storeSession(data);
       setUser(data.user);
     } finally {
       setLoading(false);
@@ -56,8 +54,11 @@ export const AuthProvider: React.FC<{children: React.ReactNode}> = ({ children }
 
   const logout = useCallback(() => {
     setLoading(true);
-    localStorage.removeItem('authUser');
-    localStorage.removeItem('authToken');
+    if (localStorage.getItem('refreshToken')) {
+      // Ends the session server-side too; the request reads the token before it is cleared
+      api('/auth/logout', { method: 'POST' }).catch(() => {});
+    }
+    clearSession();
     setUser(null);
     setLoading(false);
   }, []);
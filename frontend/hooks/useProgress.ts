@@ -1,6 +1,6 @@
 import { useCallback, useEffect, useState } from 'react';
 import { api } from '../api';
-import { UserBookProgress, UserBookBookmark, UserBookNote } from '../types';
+import { UserBookProgress, UserBookBookmark, UserBookNote, ProgressPageAck } from '../types';
 
 export function useProgress(bookId: string) {
   const [progress, setProgress] = useState<UserBookProgress | null>(null);
@@ -23,12 +23,14 @@ export function useProgress(bookId: string) {
     fetchProgress();
   }, [fetchProgress]);
 
+  // Page turns go to the lightweight endpoint, which may only buffer them;
+  // bookmarks and notes are unchanged, so merge the acknowledged page in.
   const updatePage = useCallback(async (page: number) => {
-    const data = await api<UserBookProgress>(`/users/me/books/${bookId}/progress`, {
+    const ack = await api<ProgressPageAck>(`/users/me/books/${bookId}/progress/page`, {
       method: 'PUT',
       body: JSON.stringify({ current_page: page })
     });
-    setProgress(data);
+    setProgress(prev => prev ? { ...prev, currentPage: ack.currentPage, lastReadAt: ack.lastReadAt } : prev);
   }, [bookId]);
 
   const addBookmark = useCallback(async (page: number) => {
@@ -212,6 +212,13 @@ export interface UserBookProgress {
   lastReadAt: string;
 }
 
+// Response of PUT /users/me/books/{id}/progress/page
+export interface ProgressPageAck {
+  currentPage: number;
+  lastReadAt: string;
+  buffered: boolean;
+}
+
 // For User Management
 export interface LearningActivity {
     id: string;